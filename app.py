@@ -1,74 +1,344 @@
-from flask import Flask, render_template
+# gevent/eventlet have to patch the standard library before Flask and the SDKs import it
+if __name__ == '__main__':
+    from src.config.settings import get_settings
+    from src.core.web.server import monkey_patch
+    monkey_patch(get_settings().socketio_async_mode)
+
+from flask import Flask, Response, render_template, request, jsonify
 from flask_socketio import SocketIO, emit
 import base64
+import hmac
 import logging
-from src.core.chat.service import ChatService
-from src.core.voice.service import VoiceService
+from functools import partial
+import threading
+from src.core.voice.pipeline import SpeechPipeline
+from src.core.web.dispatcher import ConnectionDispatcher
+from src.core.web.warmup import Warmup
+from src.core.web.broker import LocalPubSubManager
+from src.core.web.server import check_search_mode, check_server_mode, serve
+from src.config.settings import get_settings
+from src.core.metrics.registry import metrics, new_request_id
+from src.core.tokens import count_tokens
 
 class WebApp:
     def __init__(self):
+        self.settings = get_settings()
         self.app = Flask(__name__)
         self.socketio = SocketIO(self.app, 
                                cors_allowed_origins="*",
-                               logger=True, 
-                               engineio_logger=True)
-        self.chat_service = ChatService()
-        self.voice_service = VoiceService()
+                               async_mode=self.settings.socketio_async_mode,
+                               logger=self.settings.socketio_debug_logging,
+                               engineio_logger=self.settings.socketio_debug_logging,
+                               **self._queue_options())
+        # Services pull in langchain and the upstream SDKs, so they are built by
+        # the warm-up (or the first request) rather than here
+        self._services_lock = threading.Lock()
+        self._chat_service = None
+        self._voice_service = None
+
+        # Voice notes being uploaded while the user is still recording, by sid
+        self._streams_lock = threading.Lock()
+        self._voice_streams = {}
+
+        # Slow turns run on a worker pool so one conversation never blocks another
+        self.dispatcher = ConnectionDispatcher(
+            max_workers=self.settings.worker_pool_size,
+            queue_depth=self.settings.worker_queue_depth,
+            max_pending=self.settings.worker_max_pending
+        )
+        metrics.gauge('dispatcher_pending_turns', lambda: {(): self.dispatcher.pending})
         
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
         
         self._setup_routes()
+        self.warmup = self._build_warmup()
+        self.socketio.start_background_task(self.warmup.run)
+
+    def _queue_options(self) -> dict:
+        options = {}
+        url = self.settings.socketio_message_queue
+        if url and url.startswith('local://'):
+            options['client_manager'] = LocalPubSubManager(channel=url[len('local://'):] or 'socketio')
+        elif url:
+            options['message_queue'] = url
+        if self.settings.server_workers > 1:
+            # Workers share one socket, so a polling session could hop processes;
+            # a websocket stays on the worker that accepted it
+            options['transports'] = ['websocket']
+        return options
+
+    @property
+    def chat_service(self):
+        if self._chat_service is None:
+            with self._services_lock:
+                if self._chat_service is None:
+                    from src.core.chat.service import ChatService
+                    self._chat_service = ChatService()
+        return self._chat_service
+
+    @property
+    def voice_service(self):
+        if self._voice_service is None:
+            with self._services_lock:
+                if self._voice_service is None:
+                    from src.core.voice.service import VoiceService
+                    self._voice_service = VoiceService()
+        return self._voice_service
+
+    def _build_warmup(self) -> Warmup:
+        warmup = Warmup()
+        if self.settings.warmup_preload_services:
+            # Imports langchain/openai/supabase and loads the indexes and caches
+            warmup.add('chat_service', lambda: self.chat_service)
+            warmup.add('voice_service', lambda: self.voice_service)
+            warmup.add('tokenizer', lambda: count_tokens("warm-up"))
+        if self.settings.http_warmup_on_startup:
+            warmup.add('connections', self._warm_connections)
+        if self.settings.tts_prerender_on_startup:
+            warmup.add('canned_audio', self._prerender_canned_audio)
+        return warmup
+
+    @staticmethod
+    def _warm_connections():
+        # httpx and the SDKs load here, off the start-up path
+        from src.core.clients.registry import get_clients
+        get_clients().warm()
+
+    def _prerender_canned_audio(self):
+        # Fallback replies are fixed strings; render them once in the background
+        from src.core.chat.service import NO_MATCH_RESPONSE, ERROR_RESPONSE
+        phrases = [NO_MATCH_RESPONSE, ERROR_RESPONSE] + self.settings.tts_prerender_phrases
+        self.voice_service.prerender(phrases)
 
     def _setup_routes(self):
         @self.app.route('/')
         def index():
             return render_template('index.html')
 
+        @self.app.route('/search/refresh', methods=['POST'])
+        def refresh_search_index():
+            # Lets the ingestion job make new videos searchable without a restart
+            if not self._refresh_allowed():
+                return jsonify({'error': 'forbidden'}), 403
+            added = self.chat_service.search.refresh_index(full=request.args.get('full') == '1')
+            return jsonify({'added': added})
+
+        @self.app.route('/healthz')
+        def liveness():
+            return jsonify({'status': 'ok', 'uptime_seconds': self.warmup.status()['uptime_seconds']})
+
+        @self.app.route('/readyz')
+        def readiness():
+            # Load balancers hold traffic back until warm-up has finished
+            status = self.warmup.status()
+            return jsonify(status), 200 if status['ready'] else 503
+
+        if self.settings.metrics_enabled:
+            @self.app.route('/metrics')
+            def metrics_endpoint():
+                return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
         @self.socketio.on('message')
         def handle_message(data):
-            try:
-                if data['type'] == 'text':
-                    # Handle text message
-                    response = self.chat_service.process_chat(data['message'])
-                    emit('response', {
-                        'response': response.response,
-                        'sources': response.sources  # Include video URLs
-                    })
+            self._submit_turn(request.sid, data)
+
+        @self.socketio.on('voice_chunk')
+        def handle_voice_chunk(data):
+            # Timeslices are appended here; segmenting and Whisper calls run in the background
+            message = data.get('message')
+            if message and not isinstance(message, (bytes, bytearray, memoryview)):
+                self.logger.warning(f"Rejecting voice chunk from {request.sid}: {type(message).__name__} payload")
+                emit('error', {'error': "Voice chunks must be sent as binary audio"})
+                return
+            with self._streams_lock:
+                stream = stale = self._voice_streams.get(request.sid)
+                if stream is None or data.get('start'):
+                    stream = self._voice_streams[request.sid] = self.voice_service.stream_transcriber(
+                        on_partial=self._speculative_search if self.settings.voice_stream_speculative_search else None
+                    )
+                if data.get('final'):
+                    del self._voice_streams[request.sid]
+            if stale is not None and stale is not stream and not stale.full:
+                # Abandoned mid-recording; a full one was already submitted as a turn
+                stale.abort()
+            was_full = stream.full
+            if message:
+                stream.append(message)
+            # An oversized note is answered from what fits; its later chunks are ignored
+            if not was_full and (data.get('final') or stream.full):
+                self._submit_turn(request.sid, {
+                    'type': 'voice',
+                    'stream': stream,
+                    'pipeline': data.get('pipeline', False),
+                    'binary': data.get('binary', False)
+                })
+
+        @self.socketio.on('disconnect')
+        def handle_disconnect():
+            self.dispatcher.discard(request.sid)
+            with self._streams_lock:
+                stream = self._voice_streams.pop(request.sid, None)
+            if stream is not None and not stream.full:
+                stream.abort()
 
-                elif data['type'] == 'voice':
-                    # Handle voice message
-                    voice_data = data['message'].split(',')[1]
-                    audio_bytes = base64.b64decode(voice_data)
+    def _refresh_allowed(self) -> bool:
+        token = self.settings.search_refresh_token
+        if token:
+            return hmac.compare_digest(request.headers.get('X-Refresh-Token', ''), token)
+        # Without a token only the local ingestion job may trigger a refresh
+        return request.remote_addr in ('127.0.0.1', '::1')
+
+    def _submit_turn(self, sid, data):
+        if not self.dispatcher.submit(sid, self._process_message, sid, data):
+            self.logger.warning(f"Rejecting message from {sid}: queue full")
+            metrics.inc('turns_rejected_total')
+            emit('busy', {'response': "I'm a little busy right now, try again in a moment!"})
+
+    def _speculative_search(self, partial_transcript):
+        # Warms the embedding cache and search coalescing for the final question
+        metrics.inc('speculative_searches_total')
+        self.socketio.start_background_task(self.chat_service.search.search, partial_transcript)
+
+    def _process_message(self, sid, data):
+        # Tags every span and sampled log line of this turn
+        request_id = new_request_id()
+        with metrics.span(f"turn_{data.get('type')}"):
+            self._handle_turn(sid, data, request_id)
+
+    def _handle_turn(self, sid, data, request_id):
+        try:
+            if data['type'] == 'text' and data.get('stream'):
+                # Stream tokens as they are generated, then close with the sources
+                response = self.chat_service.process_chat(
+                    data['message'],
+                    on_token=partial(self._emit_chunk, sid)
+                )
+                self._emit(sid, 'response_end', {
+                    'response': response.response,
+                    'sources': response.sources,
+                    'url_message': response.url_message
+                })
+
+            elif data['type'] == 'text':
+                # Handle text message
+                response = self.chat_service.process_chat(data['message'])
+                self._emit(sid, 'response', {
+                    'response': response.response,
+                    'sources': response.sources  # Include video URLs
+                })
+
+            elif data['type'] == 'voice' and data.get('pipeline'):
+                # Synthesize and send the reply sentence by sentence while GPT is still writing
+                text_result = self._speech_to_text(data)
+                if not text_result.success:
+                    raise Exception("Failed to convert speech to text")
+
+                pipeline = SpeechPipeline(
+                    self.voice_service,
+                    on_segment=partial(self._emit_audio_chunk, sid, data.get('binary', False)),
+                    min_chars=self.settings.tts_pipeline_min_sentence_chars
+                )
+                chat_response = self.chat_service.process_chat(text_result.content, on_token=pipeline.feed)
+                segments = pipeline.close()
+                self._emit(sid, 'voice_end', {
+                    'text': chat_response.response,
+                    'sources': chat_response.sources,
+                    'url_message': chat_response.url_message,
+                    'segments': segments
+                })
+
+            elif data['type'] == 'voice':
+                # Convert voice to text
+                text_result = self._speech_to_text(data)
+                if not text_result.success:
+                    raise Exception("Failed to convert speech to text")
                     
-                    # Convert voice to text
-                    text_result = self.voice_service.speech_to_text(audio_bytes)
-                    if not text_result.success:
-                        raise Exception("Failed to convert speech to text")
-                        
-                    # Get chat response with video references
-                    chat_response = self.chat_service.process_chat(text_result.content)
+                # Get chat response with video references
+                chat_response = self.chat_service.process_chat(text_result.content)
+                
+                # Convert response to voice
+                voice_response = self.voice_service.text_to_speech(chat_response.response)
+                if not voice_response.success:
+                    raise Exception("Failed to convert text to speech")
                     
-                    # Convert response to voice
-                    voice_response = self.voice_service.text_to_speech(chat_response.response)
-                    if not voice_response.success:
-                        raise Exception("Failed to convert text to speech")
-                        
-                    # Send audio response with sources
-                    audio_base64 = base64.b64encode(voice_response.content).decode('utf-8')
-                    emit('response', {
-                        'response': f"data:audio/mpeg;base64,{audio_base64}",
+                # Send audio response with sources
+                if data.get('binary'):
+                    self._emit(sid, 'response', {
+                        'audio': voice_response.content,  # sent as a binary attachment
+                        'mime': 'audio/mpeg',
+                        'text': chat_response.response,
+                        'sources': chat_response.sources
+                    })
+                else:
+                    self._emit(sid, 'response', {
+                        'response': self._audio_data_url(voice_response.content),
                         'text': chat_response.response,
                         'sources': chat_response.sources  # Include video URLs
                     })
 
-            except Exception as e:
-                self.logger.error(f"Error handling message: {str(e)}")
-                emit('response', {'response': "Sorry, something went wrong. Please try again."})
+        except Exception as e:
+            self.logger.error(f"[{request_id}] Error handling message: {str(e)}")
+            metrics.inc('turn_errors_total', type=str(data.get('type')))
+            self._emit(sid, 'response', {'response': "Sorry, something went wrong. Please try again."})
+
+    def _speech_to_text(self, data):
+        stream = data.get('stream')
+        if stream is not None:
+            # Streamed upload: most segments are already transcribed
+            return stream.finish()
+        return self.voice_service.speech_to_text(self._decode_voice(data))
+
+    @staticmethod
+    def _decode_voice(data):
+        message = data['message']
+        # Binary attachments arrive as bytes and are passed through untouched
+        if isinstance(message, (bytes, bytearray, memoryview)):
+            return message
+        # Legacy clients send a base64 data URL
+        return base64.b64decode(message[message.index(',') + 1:])
+
+    @staticmethod
+    def _audio_data_url(audio):
+        return f"data:audio/mpeg;base64,{base64.b64encode(audio).decode('utf-8')}"
+
+    def _emit(self, sid, event, payload):
+        # Workers run outside the request context, so address the client explicitly
+        self.socketio.emit(event, payload, to=sid)
+
+    def _emit_audio_chunk(self, sid, binary, index, text, result):
+        if not result.success:
+            self.logger.error(f"Failed to synthesize segment {index}: {result.error}")
+            audio = None
+        else:
+            audio = result.content if binary else self._audio_data_url(result.content)
+        self._emit(sid, 'audio_chunk', {'index': index, 'text': text, 'audio': audio, 'mime': 'audio/mpeg'})
+        self.socketio.sleep(0)
+
+    def _emit_chunk(self, sid, token):
+        self._emit(sid, 'response_chunk', {'chunk': token})
+        # Yield so the chunk is flushed to the client before the next token
+        self.socketio.sleep(0)
 
-    def run(self, port=4000, debug=True):
-        self.socketio.run(self.app, port=port, debug=debug)
+    def run(self, port=None, debug=None):
+        self.socketio.run(
+            self.app,
+            host=self.settings.server_host,
+            port=port or self.settings.server_port,
+            debug=self.settings.server_debug if debug is None else debug
+        )
 
 if __name__ == '__main__':
-    app = WebApp()
-    app.run()
\ No newline at end of file
+    settings = get_settings()
+    queue = settings.socketio_message_queue
+    if settings.server_workers > 1 and (not queue or queue.startswith('local://')):
+        raise SystemExit("SERVER_WORKERS > 1 needs a cross-process SOCKETIO_MESSAGE_QUEUE, e.g. redis://localhost:6379/0")
+    check_server_mode(settings.socketio_async_mode, settings.server_host, settings.server_workers, settings.server_debug)
+    check_search_mode(settings.search_mode, settings.search_index_mode, settings.search_index_path, settings.server_workers)
+    serve(
+        WebApp,
+        host=settings.server_host,
+        port=settings.server_port,
+        workers=settings.server_workers,
+        debug=settings.server_debug
+    )
\ No newline at end of file
@@ -0,0 +1,274 @@
+"""Local stand-ins for the paid upstreams, with configurable latency.
+
+Each fake mimics just enough of the real client surface used by the
+services (openai resources, the langchain-facing chat/embeddings clients,
+supabase-py query builders and the ElevenLabs HTTP call) and records how
+long every simulated call took in a shared StageRecorder.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import hashlib
+import random
+import threading
+import time
+
+@dataclass
+class LatencyModel:
+    """Latency distribution parsed from specs like 'const:0.2', 'uniform:0.1,0.4',
+    'normal:0.3,0.05' or 'lognormal:0.3,0.4' (median and sigma), all in seconds"""
+    kind: str
+    a: float
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        kind, _, params = spec.partition(':')
+        values = [float(v) for v in params.split(',') if v]
+        if kind not in ('const', 'uniform', 'normal', 'lognormal') or not values:
+            raise ValueError(f"Invalid latency spec: {spec}")
+        return cls(kind, values[0], values[1] if len(values) > 1 else 0.0)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == 'const':
+            return self.a
+        if self.kind == 'uniform':
+            return rng.uniform(self.a, self.b)
+        if self.kind == 'normal':
+            return max(0.0, rng.gauss(self.a, self.b))
+        return self.a * rng.lognormvariate(0.0, self.b)
+
+class StageRecorder:
+    """Thread-safe collection of per-stage durations in seconds"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.counters: Dict[str, int] = defaultdict(int)
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    @contextmanager
+    def time(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+class _Fake:
+    def __init__(self, latency: LatencyModel, recorder: StageRecorder, seed: Optional[int] = None):
+        self.latency = latency
+        self.recorder = recorder
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def _delay(self, scale: float = 1.0) -> None:
+        with self._rng_lock:
+            seconds = self.latency.sample(self._rng) * scale
+        time.sleep(seconds)
+
+def fake_embedding(text: Any, dimensions: int = 1536) -> List[float]:
+    """Deterministic pseudo-embedding, so identical text always maps to the same vector"""
+    seed = int.from_bytes(hashlib.sha256(repr(text).encode('utf-8')).digest()[:8], 'big')
+    rng = random.Random(seed)
+    return [rng.gauss(0.0, 1.0) for _ in range(dimensions)]
+
+class FakeEmbeddings(_Fake):
+    """Stands in for `AzureOpenAI(...).embeddings` (Ada)"""
+
+    def create(self, input, **kwargs):
+        with self.recorder.time('ada'):
+            self._delay()
+            inputs = input if isinstance(input, list) else [input]
+            return {'data': [{'index': i, 'embedding': fake_embedding(item)} for i, item in enumerate(inputs)]}
+
+class FakeChatCompletions(_Fake):
+    """Stands in for `AzureOpenAI(...).chat.completions` (GPT), streaming or not.
+
+    The latency model gives time to first token; later tokens follow every
+    `token_interval` seconds.
+    """
+
+    REPLY = (
+        "Oh no, sleepless nights are the worst! I literally made a video about this. "
+        "Trust me on this one, okay?"
+    )
+
+    def __init__(self, latency: LatencyModel, recorder: StageRecorder, token_interval: float = 0.02, seed=None):
+        super().__init__(latency, recorder, seed)
+        self.token_interval = token_interval
+
+    def create(self, messages, stream: bool = False, **kwargs):
+        tokens = [word + ' ' for word in self.REPLY.split(' ')]
+        if stream:
+            return self._stream(tokens)
+        with self.recorder.time('gpt'):
+            self._delay()
+            time.sleep(self.token_interval * len(tokens))
+        return {
+            'choices': [{'message': {'role': 'assistant', 'content': self.REPLY}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': len(tokens), 'total_tokens': len(tokens)}
+        }
+
+    def _stream(self, tokens):
+        started = time.perf_counter()
+        self._delay()
+        self.recorder.record('gpt_first_token', time.perf_counter() - started)
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.token_interval)
+            yield {'choices': [{'delta': {'role': 'assistant', 'content': token}, 'finish_reason': None}]}
+        yield {'choices': [{'delta': {}, 'finish_reason': 'stop'}]}
+        self.recorder.record('gpt', time.perf_counter() - started)
+
+class _Namespace:
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+class FakeWhisper(_Fake):
+    """Stands in for `AzureOpenAI(...)` as used for Whisper transcription"""
+
+    QUESTIONS = [
+        "How do I get a toddler to sleep?",
+        "What do I do about tantrums?",
+        "Any tips for potty training?",
+        "How do I get my kid to eat vegetables?",
+    ]
+
+    def __init__(self, latency: LatencyModel, recorder: StageRecorder, seed=None):
+        super().__init__(latency, recorder, seed)
+        self.audio = _Namespace(transcriptions=_Namespace(create=self._transcribe))
+
+    def _transcribe(self, model, file, **kwargs):
+        with self.recorder.time('whisper'):
+            self._delay()
+            with self._rng_lock:
+                text = self._rng.choice(self.QUESTIONS)
+        return _Namespace(text=text)
+
+class FakeAzureOpenAI:
+    """Stands in for an `AzureOpenAI(...)` client: GPT, Ada and Whisper behind one object,
+    so deployments that share an endpoint and key still find their resource"""
+
+    def __init__(self, chat: FakeChatCompletions, embeddings: FakeEmbeddings, whisper: FakeWhisper):
+        self.chat = _Namespace(completions=chat)
+        self.embeddings = embeddings
+        self.audio = whisper.audio
+
+class _FakeResponse:
+    def __init__(self, status_code: int, content: bytes):
+        self.status_code = status_code
+        self.content = content
+
+class FakeElevenLabs(_Fake):
+    """Stands in for the pooled ElevenLabs HTTP client; latency scales with text length"""
+
+    def post(self, url, json=None, headers=None, **kwargs):
+        text = (json or {}).get('text', '')
+        with self.recorder.time('elevenlabs'):
+            self._delay(scale=max(1.0, len(text) / 100))
+        # Roughly 1 KB of MP3 per 10 characters of speech
+        return _FakeResponse(200, b'\xff\xfb' + bytes(len(text) * 100))
+
+class _FakeQuery:
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self._rows = rows
+        self._range = None
+        self._ids = None
+        self._limit = None
+
+    def select(self, columns):
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end)
+        return self
+
+    def in_(self, column, values):
+        self._ids = set(values)
+        return self
+
+    def order(self, column):
+        self._rows = sorted(self._rows, key=lambda row: row[column])
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def execute(self):
+        rows = self._rows
+        if self._ids is not None:
+            rows = [row for row in rows if row['id'] in self._ids]
+        if self._range is not None:
+            rows = rows[self._range[0]:self._range[1] + 1]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        return _Namespace(data=rows)
+
+class _FakeRpc:
+    def __init__(self, fake: "FakeSupabase", name: str, params: Dict[str, Any]):
+        self._fake = fake
+        self._name = name
+        self._params = params
+
+    def execute(self):
+        with self._fake.recorder.time('supabase_rpc'):
+            self._fake._delay()
+            count = self._params.get('match_count', 3)
+            if self._name == 'match_video_chunks':
+                # Same shape as the SQL function: one row per chunk, several per video
+                data = [
+                    {'video_url': row['video_url'], 'chunk_index': row['chunk_index'],
+                     'content': row['content'], 'similarity': 0.9 - i * 0.01}
+                    for i, row in enumerate(self._fake.chunks[:count])
+                ]
+            else:
+                data = [
+                    {'content': row['script'], 'url': row['url'], 'similarity': 0.9 - i * 0.01}
+                    for i, row in enumerate(self._fake.rows[:count])
+                ]
+        return _Namespace(data=data)
+
+class FakeSupabase(_Fake):
+    """Stands in for the supabase client: table reads for local indexes and both match RPCs"""
+
+    def __init__(
+        self, latency: LatencyModel, recorder: StageRecorder, videos: int = 50, chunks_per_video: int = 3, seed=None
+    ):
+        super().__init__(latency, recorder, seed)
+        self.rows = [
+            {
+                'id': i,
+                'title': f"How To Handle Parenting Situation {i}",
+                'script': f"Script {i}: a short babysitting tip about sleep, tantrums and potty training.",
+                'url': f"https://www.instagram.com/reel/fake{i}/",
+                'embedding': fake_embedding(f"video {i}", 1536)
+            }
+            for i in range(videos)
+        ]
+        self.chunks = [
+            {
+                'id': i * chunks_per_video + j,
+                'video_url': row['url'],
+                'chunk_index': j,
+                'content': f"{row['script']} Part {j}.",
+                'embedding': fake_embedding(f"video {i} chunk {j}", 1536)
+            }
+            for i, row in enumerate(self.rows)
+            for j in range(chunks_per_video)
+        ]
+
+    def table(self, name):
+        return _FakeQuery(self.chunks if name == 'video_chunks' else self.rows)
+
+    def rpc(self, name, params):
+        return _FakeRpc(self, name, params)
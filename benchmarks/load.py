@@ -0,0 +1,158 @@
+from dataclasses import dataclass, field
+from typing import Dict, List
+import io
+import math
+import random
+import struct
+import threading
+import time
+import wave
+import socketio
+from benchmarks.fakes import StageRecorder
+
+TEXT_QUERIES = [
+    "how do I get a toddler to sleep",
+    "my kid throws tantrums at the store",
+    "potty training tips",
+    "how to get kids to eat vegetables",
+]
+
+def voice_note(seconds_silence: float = 1.0, seconds_tone: float = 1.5, sample_rate: int = 16000) -> bytes:
+    """A WAV with silence around a tone, so voice-activity trimming has work to do"""
+    frames = []
+    silence = int(seconds_silence * sample_rate)
+    tone = int(seconds_tone * sample_rate)
+    frames.extend([0] * silence)
+    frames.extend(int(8000 * math.sin(2 * math.pi * 220 * i / sample_rate)) for i in range(tone))
+    frames.extend([0] * silence)
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(struct.pack(f"<{len(frames)}h", *frames))
+    return buffer.getvalue()
+
+@dataclass
+class _Turn:
+    kind: str
+    started: float
+    first: float = 0.0
+    done: threading.Event = field(default_factory=threading.Event)
+    outcome: str = "ok"
+
+class LoadClient:
+    """One simulated user: a Socket.IO connection sending turns back to back"""
+
+    def __init__(self, url: str, recorder: StageRecorder, voice_ratio: float, timeout: float, seed: int):
+        self.url = url
+        self.recorder = recorder
+        self.voice_ratio = voice_ratio
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.audio = voice_note()
+        self.sio = socketio.Client(reconnection=False)
+        self._turn = None
+
+        self.sio.on('response_chunk', lambda data: self._first())
+        self.sio.on('audio_chunk', lambda data: self._first())
+        self.sio.on('response_end', lambda data: self._finish("ok"))
+        self.sio.on('voice_end', lambda data: self._finish("ok"))
+        self.sio.on('busy', lambda data: self._finish("busy"))
+        # Without streaming the server only sends 'response', which also carries errors
+        self.sio.on('response', lambda data: self._finish("error"))
+
+    def run(self, turns: int) -> None:
+        self.sio.connect(self.url, transports=['websocket'])
+        try:
+            for _ in range(turns):
+                self._one_turn()
+        finally:
+            self.sio.disconnect()
+
+    def _one_turn(self) -> None:
+        voice = self.rng.random() < self.voice_ratio
+        self._turn = turn = _Turn(kind='voice' if voice else 'text', started=time.perf_counter())
+        if voice:
+            self.sio.emit('message', {'type': 'voice', 'message': self.audio, 'binary': True, 'pipeline': True})
+        else:
+            self.sio.emit('message', {'type': 'text', 'message': self.rng.choice(TEXT_QUERIES), 'stream': True})
+
+        if not turn.done.wait(self.timeout):
+            turn.outcome = "timeout"
+        self.recorder.count(f"{turn.kind}_{turn.outcome}")
+        if turn.outcome != "ok":
+            return
+        first_label = 'client_voice_first_audio' if voice else 'client_text_first_token'
+        self.recorder.record(first_label, (turn.first or time.perf_counter()) - turn.started)
+        self.recorder.record(f"client_{turn.kind}_total", time.perf_counter() - turn.started)
+
+    def _first(self) -> None:
+        turn = self._turn
+        if turn is not None and not turn.first:
+            turn.first = time.perf_counter()
+
+    def _finish(self, outcome: str) -> None:
+        turn = self._turn
+        if turn is not None and not turn.done.is_set():
+            turn.outcome = outcome
+            turn.done.set()
+
+def run_load(url: str, clients: int, turns: int, voice_ratio: float, recorder: StageRecorder,
+             timeout: float = 60.0, seed: int = 0) -> float:
+    """Drive `clients` concurrent connections for `turns` turns each; returns wall time"""
+    workers = [
+        LoadClient(url, recorder, voice_ratio, timeout, seed + i)
+        for i in range(clients)
+    ]
+    threads = [threading.Thread(target=w.run, args=(turns,), daemon=True) for w in workers]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile, q in [0, 100]"""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+def summarize(recorder: StageRecorder, wall_seconds: float) -> Dict:
+    stages = {}
+    for stage, values in sorted(recorder.samples.items()):
+        stages[stage] = {
+            'count': len(values),
+            'p50_ms': percentile(values, 50) * 1000,
+            'p95_ms': percentile(values, 95) * 1000,
+            'p99_ms': percentile(values, 99) * 1000,
+            'mean_ms': sum(values) / len(values) * 1000,
+            'throughput_per_s': len(values) / wall_seconds if wall_seconds else 0.0
+        }
+    completed = sum(v for k, v in recorder.counters.items() if k.endswith('_ok'))
+    return {
+        'wall_seconds': wall_seconds,
+        'turns_per_second': completed / wall_seconds if wall_seconds else 0.0,
+        'counters': dict(recorder.counters),
+        'stages': stages
+    }
+
+def format_report(summary: Dict) -> str:
+    lines = [
+        f"{'stage':<26}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'per s':>9}"
+    ]
+    for stage, s in summary['stages'].items():
+        lines.append(
+            f"{stage:<26}{s['count']:>7}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}"
+            f"{s['p99_ms']:>10.1f}{s['mean_ms']:>10.1f}{s['throughput_per_s']:>9.2f}"
+        )
+    lines.append("")
+    lines.append(f"wall time {summary['wall_seconds']:.2f}s, {summary['turns_per_second']:.2f} completed turns/s")
+    lines.append("outcomes: " + ", ".join(f"{k}={v}" for k, v in sorted(summary['counters'].items())))
+    return "\n".join(lines)
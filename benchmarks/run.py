@@ -0,0 +1,169 @@
+"""Offline benchmark: run WebApp against local stand-ins and drive it with Socket.IO clients.
+
+    python -m benchmarks.run --clients 20 --turns 5 --voice-ratio 0.5 \
+        --gpt lognormal:0.6,0.3 --elevenlabs lognormal:0.8,0.3
+
+No Azure, ElevenLabs or Supabase credentials are needed; placeholder
+settings are used unless real ones are already in the environment.
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+PLACEHOLDER_ENV = {
+    'GPT4_API_KEY': 'bench', 'GPT4_ENDPOINT': 'https://gpt.bench.local', 'GPT4_DEPLOYMENT_NAME': 'gpt4',
+    'WHISPER_API_KEY': 'bench', 'WHISPER_ENDPOINT': 'https://whisper.bench.local',
+    'WHISPER_DEPLOYMENT_NAME': 'whisper',
+    'ADA_API_KEY': 'bench', 'ADA_ENDPOINT': 'https://ada.bench.local', 'ADA_DEPLOYMENT_NAME': 'ada',
+    'AZURE_API_VERSION': '2024-02-01',
+    'SUPABASE_URL': 'https://bench.supabase.co',
+    # supabase-py only checks that the key looks like a JWT
+    'SUPABASE_KEY': 'eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYmVuY2gifQ.YmVuY2g',
+    'VIDEO_FOLDER_PATH': '.',
+    'ELEVENLABS_API_KEY': 'bench', 'ELEVENLABS_VOICE_ID': 'bench',
+}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=10)
+    parser.add_argument('--turns', type=int, default=5, help="turns per client")
+    parser.add_argument('--voice-ratio', type=float, default=0.5)
+    parser.add_argument('--port', type=int, default=4100)
+    parser.add_argument('--videos', type=int, default=50, help="size of the fake catalog")
+    parser.add_argument('--caches', action='store_true', help="keep embedding/answer/TTS caches on")
+    parser.add_argument('--whisper', default='lognormal:0.8,0.3')
+    parser.add_argument('--ada', default='lognormal:0.15,0.3')
+    parser.add_argument('--supabase', default='lognormal:0.08,0.3')
+    parser.add_argument('--gpt', default='lognormal:0.6,0.3', help="time to first token")
+    parser.add_argument('--gpt-token-interval', type=float, default=0.02)
+    parser.add_argument('--elevenlabs', default='lognormal:0.7,0.3', help="per 100 characters")
+    parser.add_argument('--json', help="also write the summary to this file")
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+def configure_environment(args) -> None:
+    for key, value in PLACEHOLDER_ENV.items():
+        os.environ.setdefault(key, value)
+    os.environ['HTTP_WARMUP_ON_STARTUP'] = 'false'
+    os.environ['TTS_PRERENDER_ON_STARTUP'] = 'false'
+    if not args.caches:
+        os.environ['EMBEDDING_CACHE_SIZE'] = '0'
+        os.environ['ANSWER_CACHE_ENABLED'] = 'false'
+        os.environ['TTS_CACHE_DIR'] = ''
+
+def install_fakes(args, recorder):
+    """Seed the client registry before WebApp builds its services.
+
+    The services wrap these stand-ins with the upstream scheduler like the
+    real SDK clients, so quotas, priorities and retries are measured too.
+    """
+    from src.config.settings import get_settings
+    from src.core.clients.registry import get_clients
+    from benchmarks.fakes import (
+        LatencyModel, FakeAzureOpenAI, FakeChatCompletions, FakeElevenLabs, FakeEmbeddings, FakeSupabase,
+        FakeWhisper
+    )
+
+    settings = get_settings()
+    seed = args.seed
+    fakes = {
+        'supabase': FakeSupabase(LatencyModel.parse(args.supabase), recorder, videos=args.videos, seed=seed),
+        'whisper': FakeWhisper(LatencyModel.parse(args.whisper), recorder, seed=seed + 1),
+        'ada': FakeEmbeddings(LatencyModel.parse(args.ada), recorder, seed=seed + 2),
+        'gpt': FakeChatCompletions(
+            LatencyModel.parse(args.gpt), recorder, token_interval=args.gpt_token_interval, seed=seed + 3
+        ),
+        'elevenlabs': FakeElevenLabs(LatencyModel.parse(args.elevenlabs), recorder, seed=seed + 4),
+    }
+    azure = FakeAzureOpenAI(fakes['gpt'], fakes['ada'], fakes['whisper'])
+    get_clients().inject(
+        supabase=fakes['supabase'],
+        http={'elevenlabs': fakes['elevenlabs']},
+        azure={
+            (settings.gpt4_api_key, settings.gpt4_endpoint): azure,
+            (settings.ada_api_key, settings.ada_endpoint): azure,
+            (settings.whisper_api_key, settings.whisper_endpoint): azure,
+        }
+    )
+    return fakes
+
+def install_offline_tokenizer() -> None:
+    """langchain's embeddings wrapper tokenizes queries with tiktoken, whose
+    cl100k vocabulary is downloaded on first use. Offline, a byte-level
+    encoding stands in so the real wrapper (and its scheduled Ada client)
+    still runs; only the token ids sent to the fake Ada differ. The app's
+    own token counting keeps its offline estimate."""
+    import tiktoken
+    try:
+        tiktoken.get_encoding('cl100k_base')
+        return
+    except Exception:
+        pass
+    fallback = tiktoken.Encoding(
+        name='bytes',
+        pat_str=r"""\S+|\s+""",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={'<|endoftext|>': 256}
+    )
+    tiktoken.encoding_for_model = lambda model_name: fallback
+
+def start_server(args, recorder):
+    from app import WebApp
+
+    install_fakes(args, recorder)
+    install_offline_tokenizer()
+    web = WebApp()
+    # Measure steady state, not the first requests racing the warm-up
+    web.warmup.wait()
+
+    thread = threading.Thread(
+        target=web.socketio.run,
+        args=(web.app,),
+        kwargs={'host': '127.0.0.1', 'port': args.port, 'debug': False, 'use_reloader': False,
+                'log_output': False, 'allow_unsafe_werkzeug': True},
+        daemon=True
+    )
+    thread.start()
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', args.port), timeout=0.2).close()
+            return web
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("Benchmark server did not start")
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    logging.basicConfig(level=logging.WARNING)
+    for name in ('socketio', 'engineio', 'src', 'app'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    # The dev server logs a spurious assertion whenever a websocket closes
+    logging.getLogger('werkzeug').setLevel(logging.CRITICAL)
+
+    from benchmarks.fakes import StageRecorder
+    from benchmarks.load import run_load, summarize, format_report
+
+    recorder = StageRecorder()
+    start_server(args, recorder)
+    wall = run_load(
+        f"http://127.0.0.1:{args.port}",
+        clients=args.clients,
+        turns=args.turns,
+        voice_ratio=args.voice_ratio,
+        recorder=recorder,
+        seed=args.seed
+    )
+    summary = summarize(recorder, wall)
+    print(format_report(summary))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+-- Ingestion upserts video_content rows with on_conflict='url', which needs a
+-- unique constraint on url. Remove duplicate urls first if the table has any.
+alter table video_content
+    add constraint video_content_url_key unique (url);
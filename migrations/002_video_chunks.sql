@@ -0,0 +1,32 @@
+-- Chunked script index (CHUNKED_INDEX_ENABLED=true): overlapping transcript
+-- chunks with their own Ada embeddings, searched by match_video_chunks.
+create table if not exists video_chunks (
+    id bigserial primary key,
+    video_url text not null references video_content (url) on delete cascade,
+    chunk_index integer not null,
+    content text not null,
+    embedding vector(1536) not null,
+    unique (video_url, chunk_index)
+);
+
+create index if not exists video_chunks_embedding_idx
+    on video_chunks using ivfflat (embedding vector_cosine_ops) with (lists = 100);
+
+create or replace function match_video_chunks(
+    query_embedding vector(1536),
+    match_threshold float,
+    match_count int
+)
+returns table (video_url text, chunk_index integer, content text, similarity float)
+language sql stable
+as $$
+    select
+        video_chunks.video_url,
+        video_chunks.chunk_index,
+        video_chunks.content,
+        1 - (video_chunks.embedding <=> query_embedding) as similarity
+    from video_chunks
+    where 1 - (video_chunks.embedding <=> query_embedding) > match_threshold
+    order by video_chunks.embedding <=> query_embedding
+    limit match_count;
+$$;
@@ -1,7 +1,7 @@
 from functools import lru_cache
 from pydantic_settings import BaseSettings
 from pydantic import Field
-from typing import Optional
+from typing import Optional, List
 
 class Settings(BaseSettings):
     # Azure OpenAI Services
@@ -33,6 +33,131 @@ class Settings(BaseSettings):
     elevenlabs_api_key: str = Field(..., env='ELEVENLABS_API_KEY')
     elevenlabs_voice_id: str = Field(..., env='ELEVENLABS_VOICE_ID')
 
+    # Similarity search
+    search_index_mode: str = Field('remote', env='SEARCH_INDEX_MODE')  # 'remote' RPC or 'local' in-process index
+    search_index_path: Optional[str] = Field(None, env='SEARCH_INDEX_PATH')
+    search_match_threshold: float = Field(0.8, env='SEARCH_MATCH_THRESHOLD')
+    search_mode: str = Field('vector', env='SEARCH_MODE')  # 'vector', 'lexical' or 'hybrid'
+    lexical_min_coverage: float = Field(1.0, env='LEXICAL_MIN_COVERAGE')
+    lexical_margin: float = Field(1.5, env='LEXICAL_MARGIN')
+    # Lexical hits sharing fewer of the query's terms are not matches at all
+    lexical_floor_coverage: float = Field(0.5, env='LEXICAL_FLOOR_COVERAGE')
+    # The ingestion job calls this after storing videos; the route needs the token
+    search_refresh_url: Optional[str] = Field(None, env='SEARCH_REFRESH_URL')
+    search_refresh_token: Optional[str] = Field(None, env='SEARCH_REFRESH_TOKEN')
+
+    # Chunked script index (video_chunks table, match_video_chunks RPC)
+    chunked_index_enabled: bool = Field(False, env='CHUNKED_INDEX_ENABLED')
+    chunk_size_tokens: int = Field(400, env='CHUNK_SIZE_TOKENS')
+    chunk_overlap_tokens: int = Field(80, env='CHUNK_OVERLAP_TOKENS')
+    search_chunk_candidates: int = Field(20, env='SEARCH_CHUNK_CANDIDATES')
+    chat_context_token_budget: int = Field(1200, env='CHAT_CONTEXT_TOKEN_BUDGET')
+
+    # Query embedding cache
+    embedding_cache_size: int = Field(10000, env='EMBEDDING_CACHE_SIZE')
+    embedding_cache_path: Optional[str] = Field(None, env='EMBEDDING_CACHE_PATH')
+
+    # Semantic answer cache
+    answer_cache_enabled: bool = Field(True, env='ANSWER_CACHE_ENABLED')
+    answer_cache_threshold: float = Field(0.95, env='ANSWER_CACHE_THRESHOLD')
+    answer_cache_ttl_seconds: float = Field(3600, env='ANSWER_CACHE_TTL_SECONDS')
+    answer_cache_size: int = Field(1000, env='ANSWER_CACHE_SIZE')
+
+    # Text-to-speech audio cache
+    tts_cache_dir: Optional[str] = Field('cache/tts', env='TTS_CACHE_DIR')  # empty disables the cache
+    tts_cache_max_bytes: int = Field(512 * 1024 * 1024, env='TTS_CACHE_MAX_BYTES')
+    tts_prerender_on_startup: bool = Field(True, env='TTS_PRERENDER_ON_STARTUP')
+    tts_prerender_phrases: List[str] = Field(default_factory=list, env='TTS_PRERENDER_PHRASES')  # JSON list
+
+    # Voice note preprocessing before Whisper
+    voice_preprocess_enabled: bool = Field(True, env='VOICE_PREPROCESS_ENABLED')
+    voice_vad_threshold_db: float = Field(-40.0, env='VOICE_VAD_THRESHOLD_DB')
+    voice_vad_padding_ms: int = Field(200, env='VOICE_VAD_PADDING_MS')
+
+    # Voice notes uploaded in timeslices while recording
+    voice_stream_workers: int = Field(4, env='VOICE_STREAM_WORKERS')
+    voice_stream_pause_ms: int = Field(500, env='VOICE_STREAM_PAUSE_MS')  # silence that ends a stable segment
+    voice_stream_min_segment_ms: int = Field(3000, env='VOICE_STREAM_MIN_SEGMENT_MS')
+    voice_stream_max_bytes: int = Field(24 * 1024 * 1024, env='VOICE_STREAM_MAX_BYTES')  # later chunks are dropped
+    # Each partial transcript starts a search (an Ada call and an RPC); off unless asked for
+    voice_stream_speculative_search: bool = Field(False, env='VOICE_STREAM_SPECULATIVE_SEARCH')
+    voice_stream_speculative_interval_ms: int = Field(2000, env='VOICE_STREAM_SPECULATIVE_INTERVAL_MS')
+
+    # Sentence-pipelined voice replies
+    tts_pipeline_workers: int = Field(4, env='TTS_PIPELINE_WORKERS')
+    tts_pipeline_min_sentence_chars: int = Field(20, env='TTS_PIPELINE_MIN_SENTENCE_CHARS')
+
+    # Socket.IO request handling
+    socketio_async_mode: str = Field('threading', env='SOCKETIO_ASYNC_MODE')
+    worker_pool_size: int = Field(16, env='WORKER_POOL_SIZE')
+    worker_queue_depth: int = Field(4, env='WORKER_QUEUE_DEPTH')  # per connection
+    worker_max_pending: int = Field(256, env='WORKER_MAX_PENDING')  # across all connections
+
+    # Server processes; more than one needs a cross-process message queue
+    server_host: str = Field('127.0.0.1', env='SERVER_HOST')
+    server_port: int = Field(4000, env='SERVER_PORT')
+    server_workers: int = Field(1, env='SERVER_WORKERS')
+    server_debug: bool = Field(False, env='SERVER_DEBUG')
+    socketio_message_queue: Optional[str] = Field(None, env='SOCKETIO_MESSAGE_QUEUE')  # redis://..., or local:// in-process
+    search_index_check_seconds: float = Field(2.0, env='SEARCH_INDEX_CHECK_SECONDS')  # picks up snapshots other workers wrote
+
+    # Shared upstream HTTP clients
+    http_max_connections: int = Field(50, env='HTTP_MAX_CONNECTIONS')
+    http_max_keepalive: int = Field(20, env='HTTP_MAX_KEEPALIVE')
+    http2_enabled: bool = Field(True, env='HTTP2_ENABLED')
+    http_connect_timeout: float = Field(5.0, env='HTTP_CONNECT_TIMEOUT')
+    azure_read_timeout: float = Field(60.0, env='AZURE_READ_TIMEOUT')
+    elevenlabs_read_timeout: float = Field(30.0, env='ELEVENLABS_READ_TIMEOUT')
+    http_warmup_on_startup: bool = Field(True, env='HTTP_WARMUP_ON_STARTUP')
+    warmup_preload_services: bool = Field(True, env='WARMUP_PRELOAD_SERVICES')  # SDKs, indexes and caches
+
+    # Upstream quotas per deployment, per minute; 0 means unlimited
+    gpt_rpm: int = Field(0, env='GPT_RPM')
+    gpt_tpm: int = Field(0, env='GPT_TPM')
+    ada_rpm: int = Field(0, env='ADA_RPM')
+    ada_tpm: int = Field(0, env='ADA_TPM')
+    whisper_rpm: int = Field(0, env='WHISPER_RPM')
+    elevenlabs_rpm: int = Field(0, env='ELEVENLABS_RPM')
+    elevenlabs_cpm: int = Field(0, env='ELEVENLABS_CPM')  # characters
+    upstream_quota_path: Optional[str] = Field(None, env='UPSTREAM_QUOTA_PATH')  # sqlite shared by app and ingestion
+    upstream_batch_reserve: float = Field(0.2, env='UPSTREAM_BATCH_RESERVE')  # quota share ingestion leaves for live traffic
+    upstream_max_retries: int = Field(5, env='UPSTREAM_MAX_RETRIES')
+    upstream_backoff_base: float = Field(0.5, env='UPSTREAM_BACKOFF_BASE')
+    upstream_backoff_max: float = Field(30.0, env='UPSTREAM_BACKOFF_MAX')
+
+    # Video ingestion pipeline
+    ingest_extract_workers: Optional[int] = Field(None, env='INGEST_EXTRACT_WORKERS')  # defaults to CPU count
+    ingest_transcribe_concurrency: int = Field(4, env='INGEST_TRANSCRIBE_CONCURRENCY')
+    ingest_enrich_concurrency: int = Field(16, env='INGEST_ENRICH_CONCURRENCY')
+    ingest_store_concurrency: int = Field(32, env='INGEST_STORE_CONCURRENCY')
+    ingest_queue_size: int = Field(16, env='INGEST_QUEUE_SIZE')
+    ingest_manifest_path: str = Field('ingest_manifest.sqlite', env='INGEST_MANIFEST_PATH')
+    ingest_work_dir: str = Field('temp_audio', env='INGEST_WORK_DIR')
+    ingest_audio_extractor: str = Field('ffmpeg', env='INGEST_AUDIO_EXTRACTOR')  # 'ffmpeg' or 'moviepy'
+    ingest_audio_sample_rate: int = Field(16000, env='INGEST_AUDIO_SAMPLE_RATE')
+    ingest_audio_bitrate: str = Field('32k', env='INGEST_AUDIO_BITRATE')
+
+    # Ingestion batching; stage concurrency above bounds how full a batch can get
+    ingest_embedding_batch_size: int = Field(16, env='INGEST_EMBEDDING_BATCH_SIZE')
+    ingest_embedding_batch_tokens: int = Field(32000, env='INGEST_EMBEDDING_BATCH_TOKENS')
+    ingest_write_batch_size: int = Field(25, env='INGEST_WRITE_BATCH_SIZE')
+    ingest_batch_flush_seconds: float = Field(2.0, env='INGEST_BATCH_FLUSH_SECONDS')
+
+    # Skip reposts and re-exports: match audio fingerprints before any API call
+    ingest_dedup_enabled: bool = Field(True, env='INGEST_DEDUP_ENABLED')
+    ingest_dedup_min_similarity: float = Field(0.7, env='INGEST_DEDUP_MIN_SIMILARITY')  # 1 - bit error rate; unrelated audio ~0.5
+    ingest_dedup_min_coverage: float = Field(0.8, env='INGEST_DEDUP_MIN_COVERAGE')  # overlap share of the longer video
+    ingest_dedup_max_offset_seconds: float = Field(10.0, env='INGEST_DEDUP_MAX_OFFSET_SECONDS')
+    ingest_dedup_max_candidates: int = Field(20, env='INGEST_DEDUP_MAX_CANDIDATES')
+
+    # Share one execution between identical concurrent searches, answers and TTS calls
+    singleflight_enabled: bool = Field(True, env='SINGLEFLIGHT_ENABLED')
+
+    # Observability
+    metrics_enabled: bool = Field(True, env='METRICS_ENABLED')  # exposes /metrics
+    query_log_sample_rate: float = Field(0.1, env='QUERY_LOG_SAMPLE_RATE')  # share of queries logged at INFO
+    socketio_debug_logging: bool = Field(False, env='SOCKETIO_DEBUG_LOGGING')
+
     class Config:
         env_file = ".env"
         
@@ -0,0 +1,197 @@
+from pathlib import Path
+from typing import List, Optional, Union
+import asyncio
+import shutil
+import subprocess
+import threading
+
+# Whisper rejects uploads over 25 MB; stay a little under it
+WHISPER_MAX_UPLOAD_BYTES = 24 * 1024 * 1024
+
+class FFmpegError(RuntimeError):
+    pass
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+def _encode_args(sample_rate: int, bitrate: str) -> List[str]:
+    # Mono, speech sample rate, compressed: a few KB per second of audio
+    return ["-vn", "-ac", "1", "-ar", str(sample_rate), "-c:a", "libmp3lame", "-b:a", bitrate, "-f", "mp3"]
+
+def _bitrate_bps(bitrate: str) -> int:
+    value = bitrate.lower()
+    if value.endswith("k"):
+        return int(float(value[:-1]) * 1000)
+    return int(value)
+
+async def _run(args: List[str], stdin: Optional[bytes] = None) -> bytes:
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-hide_banner", "-loglevel", "error", *args,
+        stdin=asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate(stdin)
+    if process.returncode != 0:
+        raise FFmpegError(stderr.decode("utf-8", "replace").strip() or f"ffmpeg exited with {process.returncode}")
+    return stdout
+
+async def probe_duration(source: Union[str, Path]) -> Optional[float]:
+    """Container duration in seconds from ffprobe, or None when it cannot tell"""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", str(source),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        stdout, _ = await process.communicate()
+        return float(stdout.decode().strip())
+    except (OSError, ValueError):
+        return None
+
+def has_audio_frames(mp3: bytes) -> bool:
+    """Whether MP3 output holds any audio frame, not just an ID3 header"""
+    start = 0
+    if mp3[:3] == b"ID3" and len(mp3) >= 10:
+        # Tag size is a 28-bit syncsafe integer after the 10-byte header
+        size = (mp3[6] & 0x7F) << 21 | (mp3[7] & 0x7F) << 14 | (mp3[8] & 0x7F) << 7 | (mp3[9] & 0x7F)
+        start = 10 + size
+    position = mp3.find(b"\xff", start)
+    while position != -1 and position + 1 < len(mp3):
+        if mp3[position + 1] & 0xE0 == 0xE0:
+            return True
+        position = mp3.find(b"\xff", position + 1)
+    return False
+
+def _run_sync(args: List[str], stdin: Optional[bytes] = None) -> bytes:
+    process = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", *args],
+        input=stdin,
+        stdin=None if stdin is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    if process.returncode != 0:
+        raise FFmpegError(process.stderr.decode("utf-8", "replace").strip() or f"ffmpeg exited with {process.returncode}")
+    return process.stdout
+
+def decode_pcm(data: bytes, sample_rate: int = 16000) -> bytes:
+    """Decode any container ffmpeg understands into mono signed 16-bit PCM"""
+    return _run_sync(["-i", "pipe:0", "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "pipe:1"], stdin=data)
+
+class PcmDecoder:
+    """One long-lived ffmpeg process decoding a growing upload into mono 16-bit PCM.
+
+    Each byte fed in is decoded once, so following a recording chunk by
+    chunk costs time linear in its length instead of re-decoding all of it
+    on every chunk.
+    """
+
+    def __init__(self, sample_rate: int = 16000):
+        self._process = subprocess.Popen(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error",
+             "-i", "pipe:0", "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "pipe:1"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        self._lock = threading.Lock()
+        self._pcm = bytearray()
+        self._base = 0  # byte offset of _pcm[0] in the decoded stream
+        self._stderr = b""
+        self._reader = threading.Thread(target=self._read, name="ffmpeg-pcm", daemon=True)
+        self._reader.start()
+        self._errors = threading.Thread(target=self._read_errors, name="ffmpeg-stderr", daemon=True)
+        self._errors.start()
+
+    def _read(self) -> None:
+        while True:
+            block = self._process.stdout.read1(65536)
+            if not block:
+                return
+            with self._lock:
+                self._pcm.extend(block)
+
+    def _read_errors(self) -> None:
+        self._stderr = self._process.stderr.read()
+
+    def _error(self) -> FFmpegError:
+        self._errors.join(timeout=1)
+        message = self._stderr.decode("utf-8", "replace").strip()
+        return FFmpegError(message or f"ffmpeg exited with {self._process.poll()}")
+
+    def feed(self, data: bytes) -> None:
+        try:
+            self._process.stdin.write(data)
+            self._process.stdin.flush()
+        except (BrokenPipeError, ValueError):
+            raise self._error()
+
+    def pcm(self, start: int = 0) -> bytes:
+        """Whole samples decoded so far, from byte offset `start`"""
+        with self._lock:
+            end = len(self._pcm) - len(self._pcm) % 2
+            return bytes(self._pcm[max(0, start - self._base):end])
+
+    def release(self, offset: int) -> None:
+        """Forget the PCM before byte offset `offset`; it won't be asked for again"""
+        with self._lock:
+            drop = min(max(0, offset - self._base), len(self._pcm))
+            del self._pcm[:drop]
+            self._base += drop
+
+    def close(self, start: int = 0) -> bytes:
+        """Decode whatever is still buffered and return the PCM from `start`; raises on decode errors"""
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._reader.join()
+        if self._process.wait() != 0:
+            raise self._error()
+        return self.pcm(start)
+
+    def kill(self) -> None:
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
+
+def encode_pcm(pcm: bytes, sample_rate: int = 16000, bitrate: str = "32k") -> bytes:
+    """Encode mono signed 16-bit PCM as compact MP3"""
+    return _run_sync(
+        ["-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "-i", "pipe:0", *_encode_args(sample_rate, bitrate), "pipe:1"],
+        stdin=pcm
+    )
+
+async def extract_audio(
+    source: Union[str, Path],
+    sample_rate: int = 16000,
+    bitrate: str = "32k",
+    max_segment_bytes: int = WHISPER_MAX_UPLOAD_BYTES
+) -> List[bytes]:
+    """Decode a media file's audio track straight into memory as compact MP3.
+
+    Returns one buffer, or several when the encoded audio is larger than
+    `max_segment_bytes`, each cut on a time boundary so it can be uploaded
+    to Whisper on its own.
+    """
+    audio = await _run(["-i", str(source), *_encode_args(sample_rate, bitrate), "pipe:1"])
+    if len(audio) <= max_segment_bytes:
+        return [audio] if audio else []
+
+    # Too big for one upload: re-encode in fixed-length windows with headroom
+    seconds = int(max_segment_bytes * 8 / _bitrate_bps(bitrate) * 0.9)
+    duration = await probe_duration(source)
+    segments = []
+    start = 0
+    while duration is None or start < duration:
+        segment = await _run([
+            "-ss", str(start), "-t", str(seconds), "-i", str(source),
+            *_encode_args(sample_rate, bitrate), "pipe:1"
+        ])
+        # Past the end ffmpeg still writes an ID3 header, never an empty pipe
+        if not has_audio_frames(segment):
+            break
+        segments.append(segment)
+        start += seconds
+    return segments
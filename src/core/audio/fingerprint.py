@@ -0,0 +1,99 @@
+from pathlib import Path
+from typing import Tuple, Union
+import wave
+import numpy as np
+
+# Spectral hash in the style of Haitsma & Kalker: one 32-bit sub-fingerprint
+# per hop, each bit the sign of an energy difference between adjacent bands
+# across adjacent frames. It survives re-encoding, gain changes and small
+# shifts, so reposts and re-exports of a reel hash alike.
+FRAME_SECONDS = 0.256
+HOP_SECONDS = 0.032
+BANDS = 33
+LOW_HZ = 300.0
+HIGH_HZ = 2000.0
+FINGERPRINT_SAMPLE_RATE = 8000  # enough for the 300-2000 Hz bands
+
+_POPCOUNT8 = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+def fingerprint(samples: np.ndarray, sample_rate: int, block_frames: int = 1024) -> np.ndarray:
+    """uint32 sub-fingerprints of mono PCM; empty when the clip is shorter than one frame"""
+    # Plain decimation is enough for bands this far below Nyquist
+    step = max(1, sample_rate // FINGERPRINT_SAMPLE_RATE)
+    samples = samples[::step].astype(np.float32)
+    sample_rate //= step
+
+    frame = int(sample_rate * FRAME_SECONDS)
+    hop = int(sample_rate * HOP_SECONDS)
+    if len(samples) < frame + hop:
+        return np.zeros(0, dtype=np.uint32)
+
+    windows = np.lib.stride_tricks.sliding_window_view(samples, frame)[::hop]
+    freqs = np.fft.rfftfreq(frame, 1.0 / sample_rate)
+    edges = np.searchsorted(freqs, np.geomspace(LOW_HZ, HIGH_HZ, BANDS + 1))
+    window = np.hanning(frame).astype(np.float32)
+
+    energies = []
+    # Blocks keep the FFT buffer small on long videos
+    for start in range(0, len(windows), block_frames):
+        power = np.abs(np.fft.rfft(windows[start:start + block_frames] * window, axis=1)) ** 2
+        energies.append(np.add.reduceat(power[:, edges[0]:edges[-1]], edges[:-1] - edges[0], axis=1))
+    energy = np.concatenate(energies)
+
+    band_diff = energy[:, :-1] - energy[:, 1:]
+    bits = (band_diff[1:] - band_diff[:-1]) > 0
+    weights = np.uint64(1) << np.arange(BANDS - 1, dtype=np.uint64)
+    return (bits.astype(np.uint64) * weights).sum(axis=1).astype(np.uint32)
+
+def read_wav(path: Union[str, Path]) -> Tuple[np.ndarray, int]:
+    """Mono 16-bit samples and sample rate of a PCM WAV file"""
+    with wave.open(str(path), 'rb') as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"Unsupported WAV sample width: {f.getsampwidth()} bytes")
+        channels = f.getnchannels()
+        samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+        rate = f.getframerate()
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+def lookup_keys(fp: np.ndarray) -> np.ndarray:
+    """Distinct 24-bit prefixes of the sub-fingerprints, for finding candidates by exact match"""
+    return np.unique(fp >> 8)
+
+def duration(fp: np.ndarray) -> float:
+    return len(fp) * HOP_SECONDS
+
+def _similarity(a: np.ndarray, b: np.ndarray) -> float:
+    errors = int(_POPCOUNT8[np.bitwise_xor(a, b).view(np.uint8)].sum())
+    return 1.0 - errors / (len(a) * 32.0)
+
+def compare(a: np.ndarray, b: np.ndarray, max_offset_seconds: float = 10.0, coarse_step: int = 4) -> Tuple[float, float]:
+    """(similarity, coverage) of two fingerprints at their best alignment.
+
+    Similarity is one minus the bit error rate over the overlap, so unrelated
+    audio scores about 0.5. Coverage is the overlap as a share of the longer
+    fingerprint: a short clip lifted from a long video is not its duplicate.
+    Offsets are searched on every `coarse_step`-th frame, then the best one
+    is scored in full.
+    """
+    if len(a) == 0 or len(b) == 0:
+        return 0.0, 0.0
+    max_offset = int(max_offset_seconds / HOP_SECONDS)
+
+    def aligned(offset: int) -> Tuple[np.ndarray, np.ndarray]:
+        # offset > 0: b starts `offset` frames into a
+        x = a[max(offset, 0):]
+        y = b[max(-offset, 0):]
+        overlap = min(len(x), len(y))
+        return x[:overlap], y[:overlap]
+
+    best_offset, best = 0, -1.0
+    for offset in range(-min(max_offset, len(b) - 1), min(max_offset, len(a) - 1) + 1):
+        x, y = aligned(offset)
+        similarity = _similarity(x[::coarse_step], y[::coarse_step])
+        if similarity > best:
+            best_offset, best = offset, similarity
+
+    x, y = aligned(best_offset)
+    return _similarity(x, y), len(x) / max(len(a), len(b))
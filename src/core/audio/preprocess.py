@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+import io
+import logging
+import time
+import wave
+import numpy as np
+from src.core.audio import ffmpeg
+
+@dataclass
+class PreprocessReport:
+    input_bytes: int
+    output_bytes: int
+    input_seconds: float
+    output_seconds: float
+    elapsed_ms: float
+
+    def __str__(self) -> str:
+        return (
+            f"{self.input_bytes / 1024:.1f} KB / {self.input_seconds:.2f}s -> "
+            f"{self.output_bytes / 1024:.1f} KB / {self.output_seconds:.2f}s "
+            f"in {self.elapsed_ms:.0f} ms"
+        )
+
+@dataclass
+class PreprocessedAudio:
+    audio: bytes
+    filename: str
+    has_speech: bool
+    report: PreprocessReport
+
+def is_empty_clip(data: bytes) -> bool:
+    """True for an empty upload or a WAV without samples; needs no ffmpeg"""
+    if len(data) == 0:
+        return True
+    if data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        return False
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as f:
+            return f.getnframes() == 0
+    except (wave.Error, EOFError):
+        return False
+
+def speech_bounds(
+    samples: np.ndarray,
+    sample_rate: int,
+    threshold_db: float = -40.0,
+    frame_ms: int = 30,
+    padding_ms: int = 200,
+    min_speech_ms: int = 150
+) -> Optional[Tuple[int, int]]:
+    """Sample range holding speech, by frame RMS energy; None when the clip is silent"""
+    frame = max(1, sample_rate * frame_ms // 1000)
+    count = len(samples) // frame
+    if count == 0:
+        return None
+
+    frames = samples[:count * frame].astype(np.float32).reshape(count, frame) / 32768.0
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    loud = np.flatnonzero(20 * np.log10(np.maximum(rms, 1e-10)) > threshold_db)
+    if loud.size * frame_ms < min_speech_ms:
+        return None
+
+    padding = sample_rate * padding_ms // 1000
+    start = max(0, loud[0] * frame - padding)
+    end = min(len(samples), (loud[-1] + 1) * frame + padding)
+    return start, end
+
+def last_pause(
+    samples: np.ndarray,
+    sample_rate: int,
+    threshold_db: float = -40.0,
+    frame_ms: int = 30,
+    pause_ms: int = 500,
+    min_offset: int = 0
+) -> Optional[int]:
+    """Sample index in the middle of the last silent run of at least `pause_ms`.
+
+    Cutting there never splits a word. Pauses whose midpoint falls before
+    `min_offset` are ignored; None when there is no usable pause.
+    """
+    frame = max(1, sample_rate * frame_ms // 1000)
+    count = len(samples) // frame
+    if count == 0:
+        return None
+
+    frames = samples[:count * frame].astype(np.float32).reshape(count, frame) / 32768.0
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    silent = (20 * np.log10(np.maximum(rms, 1e-10)) <= threshold_db).astype(np.int8)
+    edges = np.diff(np.concatenate(([0], silent, [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    long_enough = (ends - starts) * frame_ms >= pause_ms
+    cuts = (starts[long_enough] + ends[long_enough]) // 2 * frame
+    cuts = cuts[cuts >= min_offset]
+    return int(cuts[-1]) if cuts.size else None
+
+class AudioPreprocessor:
+    """Trim silence and shrink a voice note before it is uploaded to Whisper.
+
+    The clip is decoded to 16 kHz mono PCM, leading and trailing silence is
+    cut with an energy-based voice-activity check, and the rest is
+    re-encoded as low-bitrate MP3.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        bitrate: str = "32k",
+        threshold_db: float = -40.0,
+        padding_ms: int = 200,
+        min_speech_ms: int = 150
+    ):
+        self.sample_rate = sample_rate
+        self.bitrate = bitrate
+        self.threshold_db = threshold_db
+        self.padding_ms = padding_ms
+        self.min_speech_ms = min_speech_ms
+        self.logger = logging.getLogger(__name__)
+
+    def process(self, data: bytes) -> PreprocessedAudio:
+        started = time.perf_counter()
+        samples = np.frombuffer(ffmpeg.decode_pcm(data, self.sample_rate), dtype=np.int16)
+        bounds = speech_bounds(
+            samples,
+            self.sample_rate,
+            threshold_db=self.threshold_db,
+            padding_ms=self.padding_ms,
+            min_speech_ms=self.min_speech_ms
+        )
+
+        audio = b""
+        if bounds is not None:
+            start, end = bounds
+            audio = ffmpeg.encode_pcm(samples[start:end].tobytes(), self.sample_rate, self.bitrate)
+
+        report = PreprocessReport(
+            input_bytes=len(data),
+            output_bytes=len(audio),
+            input_seconds=len(samples) / self.sample_rate,
+            output_seconds=(bounds[1] - bounds[0]) / self.sample_rate if bounds else 0.0,
+            elapsed_ms=(time.perf_counter() - started) * 1000
+        )
+        return PreprocessedAudio(audio=audio, filename="audio.mp3", has_speech=bounds is not None, report=report)
@@ -0,0 +1,105 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Union
+import hashlib
+import itertools
+import threading
+import time
+import numpy as np
+from src.core.cache.embedding import CacheStats
+
+@dataclass
+class _AnswerEntry:
+    embedding: np.ndarray
+    url: str
+    part_hashes: Dict[int, str]
+    value: Any
+    created_at: float
+
+Sources = Union[str, Dict[int, str]]
+
+def source_fingerprints(sources: Sources) -> Dict[int, str]:
+    """Hash per script part (chunk index -> text); a whole script is part 0"""
+    parts = {0: sources} if isinstance(sources, str) else sources
+    return {index: hashlib.sha256(text.encode('utf-8')).hexdigest() for index, text in parts.items()}
+
+def _changed(old: Dict[int, str], new: Dict[int, str]) -> bool:
+    return any(old[index] != digest for index, digest in new.items() if index in old)
+
+class AnswerCache:
+    """Semantic cache of chat answers.
+
+    A lookup hits when a stored question is at least `threshold` cosine-similar
+    to the new one *and* was answered from the same video. Entries remember a
+    hash of each script part (chunk) they were generated from. Another
+    question about the same video may retrieve different chunks, which is
+    not a change; a chunk whose text differs under the same index is, so
+    re-ingesting a video invalidates its answers on the next lookup.
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 3600, max_entries: int = 1000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._entries: "OrderedDict[int, _AnswerEntry]" = OrderedDict()
+
+    def get(self, embedding: List[float], url: str, sources: Sources) -> Optional[Any]:
+        query = self._normalize(embedding)
+        part_hashes = source_fingerprints(sources)
+        now = time.monotonic()
+
+        with self._lock:
+            best_id, best_score = None, self.threshold
+            for entry_id, entry in list(self._entries.items()):
+                if now - entry.created_at > self.ttl_seconds:
+                    del self._entries[entry_id]
+                    continue
+                if entry.url != url:
+                    continue
+                if _changed(entry.part_hashes, part_hashes):
+                    # The script behind this answer changed; never serve it again
+                    del self._entries[entry_id]
+                    continue
+                score = float(entry.embedding @ query)
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                self.stats.misses += 1
+                return None
+
+            self._entries.move_to_end(best_id)
+            self.stats.hits += 1
+            return self._entries[best_id].value
+
+    def put(self, embedding: List[float], url: str, sources: Sources, value: Any) -> None:
+        entry = _AnswerEntry(
+            embedding=self._normalize(embedding),
+            url=url,
+            part_hashes=source_fingerprints(sources),
+            value=value,
+            created_at=time.monotonic()
+        )
+        with self._lock:
+            self._entries[next(self._ids)] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url: Optional[str] = None) -> None:
+        """Drop answers for one video, or everything when no url is given"""
+        with self._lock:
+            if url is None:
+                self._entries.clear()
+                return
+            for entry_id in [i for i, e in self._entries.items() if e.url == url]:
+                del self._entries[entry_id]
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
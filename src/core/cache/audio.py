@@ -0,0 +1,131 @@
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+from src.core.cache.embedding import CacheStats
+
+class AudioCache:
+    """Content-addressed on-disk store for synthesized speech.
+
+    The file name is a hash of everything that affects the audio (text,
+    voice, model and voice settings), so identical requests map to the same
+    file. Total size is capped; the least recently used files are evicted
+    first, using mtime as the recency marker so several workers can share
+    one directory. The running total lives in a file next to the audio and
+    is only updated under an exclusive lock on the directory, so the cap
+    holds for all workers together; whenever it is exceeded the directory is
+    rescanned, which also corrects any drift.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024, suffix: str = '.mp3'):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.stats = CacheStats()
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._lock_path = self.directory / '.lock'
+        self._total_path = self.directory / '.size'
+
+    @staticmethod
+    def make_key(text: str, voice_id: str, model_id: str, voice_settings: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            {'text': text, 'voice_id': voice_id, 'model_id': model_id, 'voice_settings': voice_settings},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            audio = path.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self.stats.misses += 1
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        with self._lock:
+            self.stats.hits += 1
+        return audio
+
+    def put(self, key: str, audio: bytes) -> None:
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_bytes(audio)
+        except OSError as e:
+            self.logger.warning(f"Audio cache write failed: {str(e)}")
+            return
+        with self._lock, self._directory_lock():
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            try:
+                tmp_path.replace(path)
+            except OSError as e:
+                self.logger.warning(f"Audio cache write failed: {str(e)}")
+                return
+            total = self._read_total()
+            total = self._scan() if total is None else total + len(audio) - replaced
+            if total > self.max_bytes:
+                total = self._evict()
+            self._total_path.write_text(str(total))
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    @contextmanager
+    def _directory_lock(self) -> Iterator[None]:
+        """Exclusive across every process using this directory"""
+        with open(self._lock_path, 'a') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _read_total(self) -> Optional[int]:
+        try:
+            return int(self._total_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _entries(self) -> Dict[Path, os.stat_result]:
+        entries = {}
+        for path in self.directory.glob(f"*{self.suffix}"):
+            try:
+                entries[path] = path.stat()
+            except FileNotFoundError:
+                pass
+        return entries
+
+    def _scan(self) -> int:
+        return sum(stat.st_size for stat in self._entries().values())
+
+    def _evict(self) -> int:
+        """Drop the least recently used files until under the cap; returns the new total"""
+        entries = self._entries()
+        total = sum(stat.st_size for stat in entries.values())
+        for path in sorted(entries, key=lambda path: entries[path].st_mtime):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= entries[path].st_size
+        return total
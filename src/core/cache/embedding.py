@@ -0,0 +1,117 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import numpy as np
+
+def normalize_query(query: str) -> str:
+    """Collapse case and whitespace so trivially different phrasings share an entry"""
+    return re.sub(r'\s+', ' ', query.strip().lower()).rstrip('?!. ')
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+class EmbeddingCache:
+    """LRU cache of query embeddings, optionally backed by sqlite.
+
+    Entries are keyed on the normalised query text and the embedding
+    deployment name, so switching models never serves stale vectors. The
+    sqlite file survives restarts and can be shared by several workers.
+    """
+
+    def __init__(self, max_entries: int = 10000, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                "key TEXT PRIMARY KEY, embedding BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(query: str, deployment: str) -> str:
+        digest = hashlib.sha256(normalize_query(query).encode('utf-8')).hexdigest()
+        return f"{deployment}:{digest}"
+
+    def get(self, query: str, deployment: str) -> Optional[List[float]]:
+        key = self.make_key(query, deployment)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return embedding
+
+            embedding = self._db_get(key)
+            if embedding is not None:
+                self._remember(key, embedding)
+                self.stats.hits += 1
+                return embedding
+
+            self.stats.misses += 1
+            return None
+
+    def put(self, query: str, deployment: str, embedding: List[float]) -> None:
+        key = self.make_key(query, deployment)
+        with self._lock:
+            self._remember(key, embedding)
+            self._db_put(key, embedding)
+
+    def get_or_compute(self, query: str, deployment: str, compute) -> List[float]:
+        """Return the cached embedding or call `compute(query)` and store the result"""
+        embedding = self.get(query, deployment)
+        if embedding is None:
+            embedding = compute(query)
+            self.put(query, deployment, embedding)
+        return embedding
+
+    def _remember(self, key: str, embedding: List[float]) -> None:
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _db_get(self, key: str) -> Optional[List[float]]:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT embedding FROM query_embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Embedding cache read failed: {str(e)}")
+            return None
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32).tolist()
+
+    def _db_put(self, key: str, embedding: List[float]) -> None:
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO query_embeddings (key, embedding) VALUES (?, ?)",
+                (key, np.asarray(embedding, dtype=np.float32).tobytes())
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Embedding cache write failed: {str(e)}")
@@ -0,0 +1,68 @@
+from typing import Any, Callable, Dict, Hashable, Optional, TypeVar
+import threading
+from src.core.metrics.registry import metrics
+
+T = TypeVar('T')
+
+class _Call:
+    def __init__(self, state: Any):
+        self.done = threading.Event()
+        self.state = state
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller (the leader) runs the function; callers arriving while
+    it is in flight block and receive the same result, or the same
+    exception. Nothing is remembered once the call returns, so this
+    complements the caches instead of replacing them: it absorbs the burst
+    that arrives before the cache is warm.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], T],
+        state: Any = None,
+        on_join: Optional[Callable[[Any], None]] = None
+    ) -> T:
+        """Run `fn` once per key in flight; `on_join(state)` lets followers hook into the leader's `state`"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call(state)
+            else:
+                call.waiters += 1
+
+        if not leader:
+            metrics.inc('coalesced_calls_total', stage=self.name)
+            if on_join is not None:
+                on_join(call.state)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        metrics.inc('coalesced_leaders_total', stage=self.name)
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -1,12 +1,22 @@
 # chat_service.py
 
 from dataclasses import dataclass, field
-from typing import Optional, List
+from typing import Optional, List, Callable
 import logging
+import threading
 from langchain_openai import AzureChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from src.core.search.service import SimilaritySearch
+from src.core.cache.answers import AnswerCache
+from src.core.cache.embedding import normalize_query
+from src.core.cache.singleflight import SingleFlight
 from src.config.settings import get_settings
+from src.core.clients.registry import get_clients
+from src.core.tokens import count_tokens
+from src.core.metrics.registry import metrics, log_sampled
+
+NO_MATCH_RESPONSE = "Sorry love, I haven't made a video about that yet"
+ERROR_RESPONSE = "Oh my goat! Something went wrong! Can you try asking that again?"
 
 @dataclass
 class ChatResponse:
@@ -24,6 +34,35 @@ class ChatResponse:
             "error": self.error
         }
 
+class _TokenFanout:
+    """Tokens of one in-flight answer, replayed to callers that join late"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._tokens: List[str] = []
+        self._subscribers: List[Callable[[str], None]] = []
+
+    @property
+    def streamed(self) -> bool:
+        return bool(self._tokens)
+
+    def subscribe(self, on_token: Callable[[str], None]) -> None:
+        with self._lock:
+            for token in self._tokens:
+                on_token(token)
+            self._subscribers.append(on_token)
+
+    def emit(self, token: str) -> None:
+        with self._lock:
+            self._tokens.append(token)
+            for on_token in self._subscribers:
+                try:
+                    on_token(token)
+                except Exception as e:
+                    # One caller's broken socket must not abort everyone's answer
+                    self.logger.error(f"Token subscriber failed: {str(e)}")
+
 class ChatService:
     def __init__(self):
         self.settings = get_settings()
@@ -37,28 +76,92 @@ class ChatService:
             model=self.settings.gpt4_deployment_name,
             temperature=0.7
         )
+        # langchain hands `http_client` to its async client too, so swap in the
+        # pooled sync client after construction instead
+        clients = get_clients()
+        self.chat_model.client = clients.scheduled('gpt', clients.azure_openai(
+            self.settings.gpt4_api_key,
+            self.settings.gpt4_endpoint
+        ).chat.completions)
         self.search = SimilaritySearch()
+        self.answer_cache = AnswerCache(
+            threshold=self.settings.answer_cache_threshold,
+            ttl_seconds=self.settings.answer_cache_ttl_seconds,
+            max_entries=self.settings.answer_cache_size
+        ) if self.settings.answer_cache_enabled else None
+        metrics.register_cache('answer', self.answer_cache)
+        self.inflight = SingleFlight('chat') if self.settings.singleflight_enabled else None
+
+    def process_chat(self, query: str, on_token: Optional[Callable[[str], None]] = None) -> ChatResponse:
+        """Answer a query; when `on_token` is given the completion is streamed through it"""
+        with metrics.span('chat'):
+            if self.inflight is None:
+                return self._process_chat(query, on_token)
+            return self._coalesced_chat(query, on_token)
+
+    def _coalesced_chat(self, query: str, on_token: Optional[Callable[[str], None]]) -> ChatResponse:
+        """Share one answer between identical questions in flight, streaming it to every caller"""
+        fanout = _TokenFanout()
+        if on_token is not None:
+            fanout.subscribe(on_token)
+        leader_fanout = []
+
+        def join(state: _TokenFanout):
+            leader_fanout.append(state)
+            if on_token is not None:
+                state.subscribe(on_token)
+
+        response = self.inflight.do(
+            normalize_query(query),
+            lambda: self._process_chat(query, fanout.emit if on_token is not None else None),
+            state=fanout,
+            on_join=join
+        )
+        # A streaming caller that joined a non-streaming leader still needs the text
+        if on_token is not None and leader_fanout and not leader_fanout[0].streamed:
+            on_token(response.response)
+        return response
 
-    def process_chat(self, query: str) -> ChatResponse:  # Fixed indentation here
+    def _process_chat(self, query: str, on_token: Optional[Callable[[str], None]]) -> ChatResponse:
         try:
-            self.logger.info(f"Processing query: {query}")
+            log_sampled(self.logger, f"Processing query: {query}")
 
             # Perform the search query
             search_results = self.search.search(query)
-            self.logger.info(f"Found {len(search_results)} search results")
+            log_sampled(self.logger, f"Found {len(search_results)} search results")
 
             # Check if there are search results
             if not search_results:
-                return ChatResponse(
-                    response="Sorry love, I haven't made a video about that yet",
+                return self._emit_whole(ChatResponse(
+                    response=NO_MATCH_RESPONSE,
                     sources=['']
-                )
+                ), on_token)
 
             # Get top match
             result = search_results[0]
-            script_content = result.get('content', 'No content available').strip()
+            if result.get('chunks'):
+                script_content = self._assemble_context(result['chunks'])
+                # Chunk selection depends on the question; the cache checks each chunk instead
+                sources = {c['chunk_index']: c['content'] for c in result['chunks']}
+            else:
+                script_content = result.get('content', 'No content available').strip()
+                sources = script_content
             top_url = result.get('url', '#')
 
+            # Near-identical question answered from the same script: skip the LLM
+            query_embedding = None
+            if self.answer_cache is not None:
+                # A lexical fast-path hit must not pay for an embedding just for the cache
+                if result.get('source') == 'lexical':
+                    query_embedding = self.search.peek_query_embedding(query)
+                else:
+                    query_embedding = self.search.embed_query(query)
+            if query_embedding is not None:
+                cached = self.answer_cache.get(query_embedding, top_url, sources)
+                if cached is not None:
+                    log_sampled(self.logger, "Answer cache hit")
+                    return self._emit_whole(cached, on_token)
+
             # Format context to emphasize script content
             context_message = (
                 f"VIDEO SCRIPT CONTENT:\n{script_content}\n\n"
@@ -89,22 +192,59 @@ class ChatService:
             ]
 
             # Generate response using Azure Chat
-            response = self.chat_model.invoke(messages)
+            with metrics.span('gpt'):
+                if on_token is None:
+                    content = self.chat_model.invoke(messages).content
+                else:
+                    content = self._stream_completion(messages, on_token)
 
             # Create URL message
             url_message = f"Watch the full video here: {top_url}" if top_url and top_url != '#' else ""
 
             # Return ChatResponse with separate response and URL
-            return ChatResponse(
-                response=response.content,
+            chat_response = ChatResponse(
+                response=content,
                 sources=[top_url],
                 url_message=url_message
             )
+            if query_embedding is not None:
+                self.answer_cache.put(query_embedding, top_url, sources, chat_response)
+            return chat_response
 
         except Exception as e:
             self.logger.error(f"Error in chat: {str(e)}", exc_info=True)
+            metrics.inc('stage_errors_total', stage='chat')
             return ChatResponse(
-                response="Oh my goat! Something went wrong! Can you try asking that again?",
+                response=ERROR_RESPONSE,
                 sources=[],
                 error=str(e)
-            )
\ No newline at end of file
+            )
+
+    def _assemble_context(self, chunks: List[dict]) -> str:
+        """Best-scoring chunks that fit the token budget, restored to script order"""
+        budget = self.settings.chat_context_token_budget
+        selected, used = [], 0
+        for chunk in chunks:  # already sorted by similarity
+            tokens = count_tokens(chunk['content'])
+            if selected and used + tokens > budget:
+                continue
+            selected.append(chunk)
+            used += tokens
+        selected.sort(key=lambda c: c['chunk_index'])
+        return "\n...\n".join(c['content'].strip() for c in selected)
+
+    def _stream_completion(self, messages, on_token: Callable[[str], None]) -> str:
+        """Forward completion tokens as they arrive and return the full text"""
+        parts = []
+        for chunk in self.chat_model.stream(messages):
+            if chunk.content:
+                parts.append(chunk.content)
+                on_token(chunk.content)
+        return "".join(parts)
+
+    @staticmethod
+    def _emit_whole(response: ChatResponse, on_token: Optional[Callable[[str], None]]) -> ChatResponse:
+        """Canned and cached answers reach streaming callers as a single chunk"""
+        if on_token is not None:
+            on_token(response.response)
+        return response
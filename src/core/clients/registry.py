@@ -0,0 +1,135 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+import logging
+import threading
+import httpx
+from src.config.settings import Settings, get_settings
+from src.core.clients.scheduler import ScheduledResource, UpstreamScheduler
+from src.core.tokens import estimate_request_tokens
+
+if TYPE_CHECKING:
+    from openai import AzureOpenAI
+
+ELEVENLABS_BASE_URL = "https://api.elevenlabs.io"
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+class ClientRegistry:
+    """Process-wide owner of upstream clients.
+
+    Every service borrows its HTTP connection pool from here instead of
+    building its own, so keep-alive connections (and HTTP/2 where the `h2`
+    package is installed) are reused across Whisper, Ada, GPT, ElevenLabs
+    and Supabase calls. Each upstream gets its own connect/read timeouts.
+    The openai and supabase SDKs are imported on first use, not at startup.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._http: Dict[str, httpx.Client] = {}
+        self._azure: Dict[Tuple[str, str], 'AzureOpenAI'] = {}
+        self._supabase = None
+        self.scheduler = UpstreamScheduler(settings)
+
+        self._timeouts = {
+            'azure': httpx.Timeout(settings.azure_read_timeout, connect=settings.http_connect_timeout),
+            'elevenlabs': httpx.Timeout(settings.elevenlabs_read_timeout, connect=settings.http_connect_timeout),
+        }
+
+    def http_client(self, upstream: str) -> httpx.Client:
+        """Shared pooled client for one upstream ('azure' or 'elevenlabs')"""
+        with self._lock:
+            client = self._http.get(upstream)
+            if client is None:
+                client = httpx.Client(
+                    base_url=ELEVENLABS_BASE_URL if upstream == 'elevenlabs' else "",
+                    http2=self.settings.http2_enabled and _http2_available(),
+                    timeout=self._timeouts[upstream],
+                    limits=httpx.Limits(
+                        max_connections=self.settings.http_max_connections,
+                        max_keepalive_connections=self.settings.http_max_keepalive
+                    )
+                )
+                self._http[upstream] = client
+            return client
+
+    def azure_openai(self, api_key: str, endpoint: str) -> 'AzureOpenAI':
+        """AzureOpenAI client for one deployment endpoint, backed by the shared pool"""
+        key = (endpoint, api_key)
+        http_client = self.http_client('azure')
+        with self._lock:
+            client = self._azure.get(key)
+            if client is None:
+                from openai import AzureOpenAI
+                client = AzureOpenAI(
+                    api_key=api_key,
+                    api_version=self.settings.azure_api_version,
+                    azure_endpoint=endpoint,
+                    http_client=http_client,
+                    max_retries=0  # the scheduler owns retries and backoff
+                )
+                self._azure[key] = client
+            return client
+
+    def scheduled(self, upstream: str, resource) -> ScheduledResource:
+        """SDK resource whose `create` calls are admitted and retried by the scheduler"""
+        return ScheduledResource(self.scheduler, upstream, resource, weigh=estimate_request_tokens)
+
+    def supabase(self):
+        with self._lock:
+            if self._supabase is None:
+                from supabase import create_client
+                self._supabase = create_client(
+                    self.settings.supabase_url,
+                    self.settings.supabase_key
+                )
+            return self._supabase
+
+    def inject(self, supabase=None, http: Optional[Dict[str, Any]] = None,
+               azure: Optional[Dict[Tuple[str, str], Any]] = None) -> None:
+        """Pre-seed clients, e.g. with local stand-ins for benchmarks; keys match the getters"""
+        with self._lock:
+            if supabase is not None:
+                self._supabase = supabase
+            self._http.update(http or {})
+            self._azure.update({(endpoint, key): client for (key, endpoint), client in (azure or {}).items()})
+
+    def warm(self) -> None:
+        """Open connections to every upstream ahead of the first real request"""
+        targets = [
+            ('azure', self.settings.gpt4_endpoint),
+            ('azure', self.settings.whisper_endpoint),
+            ('azure', self.settings.ada_endpoint),
+            ('elevenlabs', ELEVENLABS_BASE_URL),
+        ]
+        for upstream, url in dict.fromkeys(targets):
+            try:
+                # Any response, even 404, leaves a warm TLS connection in the pool
+                self.http_client(upstream).head(url)
+            except httpx.HTTPError as e:
+                self.logger.warning(f"Warm-up failed for {url}: {str(e)}")
+        try:
+            # Supabase keeps its own pool inside postgrest; a tiny query opens it
+            self.supabase().table('video_content').select('id').limit(1).execute()
+        except Exception as e:
+            self.logger.warning(f"Warm-up failed for Supabase: {str(e)}")
+        self.logger.info("Upstream connections warmed")
+
+    def close(self) -> None:
+        with self._lock:
+            for client in self._http.values():
+                client.close()
+            self._http.clear()
+            self._azure.clear()
+
+@lru_cache
+def get_clients() -> ClientRegistry:
+    return ClientRegistry(get_settings())
@@ -0,0 +1,267 @@
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import heapq
+import itertools
+import logging
+import random
+import sqlite3
+import threading
+import time
+from src.config.settings import Settings
+from src.core.metrics.registry import metrics
+
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # live chat and voice turns
+    BATCH = 1  # ingestion backfills
+
+class QuotaBuckets:
+    """Requests-per-minute and tokens-per-minute buckets for each upstream.
+
+    Each bucket holds up to one minute of quota and refills continuously.
+    With `db_path` the levels live in sqlite, so the web workers and the
+    ingestion job draw from the same quota instead of each assuming all
+    of it is theirs.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, float]], db_path: Optional[str] = None):
+        self.limits = limits
+        self.logger = logging.getLogger(__name__)
+        self._levels: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS quota_buckets ("
+                "upstream TEXT, kind TEXT, level REAL, updated REAL, PRIMARY KEY (upstream, kind))"
+            )
+
+    def try_take(self, upstream: str, amounts: Dict[str, float], reserve: float = 0.0) -> float:
+        """Take `amounts` if every bucket stays above `reserve` of its capacity; else seconds to wait"""
+        limits = {kind: rate for kind, rate in self.limits.get(upstream, {}).items() if rate > 0}
+        if not limits:
+            return 0.0
+        if self._db is None:
+            return self._take(upstream, limits, amounts, reserve, self._levels)
+        try:
+            self._db.execute("BEGIN IMMEDIATE")
+            rows = self._db.execute(
+                "SELECT kind, level, updated FROM quota_buckets WHERE upstream = ?", (upstream,)
+            ).fetchall()
+            levels = {(upstream, kind): (level, updated) for kind, level, updated in rows}
+            wait = self._take(upstream, limits, amounts, reserve, levels)
+            if wait == 0.0:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO quota_buckets (upstream, kind, level, updated) VALUES (?, ?, ?, ?)",
+                    [(upstream, kind, level, updated) for (_, kind), (level, updated) in levels.items()]
+                )
+            self._db.execute("COMMIT")
+            return wait
+        except sqlite3.Error as e:
+            # Quota bookkeeping must never take the upstream call down with it
+            self.logger.warning(f"Shared quota unavailable, using local buckets: {str(e)}")
+            if self._db.in_transaction:
+                self._db.execute("ROLLBACK")
+            return self._take(upstream, limits, amounts, reserve, self._levels)
+
+    @staticmethod
+    def _take(upstream, limits, amounts, reserve, levels) -> float:
+        now = time.time()
+        refilled, wait = {}, 0.0
+        for kind, rate in limits.items():
+            level, updated = levels.get((upstream, kind), (rate, now))
+            level = min(rate, level + (now - updated) * rate / 60)
+            floor = rate * reserve
+            # A request bigger than the bucket would never fit; let it drain the bucket instead
+            amount = min(amounts.get(kind, 0.0), rate - floor)
+            if level - amount < floor:
+                wait = max(wait, (amount + floor - level) * 60 / rate)
+            refilled[kind] = (level, amount)
+        if wait > 0:
+            return wait
+        for kind, (level, amount) in refilled.items():
+            levels[(upstream, kind)] = (level - amount, now)
+        return 0.0
+
+@dataclass
+class _Lane:
+    cond: threading.Condition = field(default_factory=threading.Condition)
+    waiting: List[Tuple[int, int]] = field(default_factory=list)
+    blocked_until: float = 0.0
+
+class UpstreamScheduler:
+    """Admission control and retries for every Azure OpenAI and ElevenLabs call.
+
+    Callers queue per upstream ('gpt', 'ada', 'whisper', 'elevenlabs') in
+    priority order, so a waiting interactive request always goes ahead of
+    queued ingestion work, and batch callers may not dip into the last
+    `upstream_batch_reserve` of any bucket. Throttling and transient
+    failures are retried with jittered exponential backoff, waiting at
+    least as long as the upstream's Retry-After; a 429 pauses the whole
+    upstream, not just the caller that saw it.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.logger = logging.getLogger(__name__)
+        self.default_priority = Priority.INTERACTIVE
+        limits = {
+            'gpt': {'requests': settings.gpt_rpm, 'tokens': settings.gpt_tpm},
+            'ada': {'requests': settings.ada_rpm, 'tokens': settings.ada_tpm},
+            'whisper': {'requests': settings.whisper_rpm},
+            'elevenlabs': {'requests': settings.elevenlabs_rpm, 'tokens': settings.elevenlabs_cpm},
+        }
+        self.buckets = QuotaBuckets(limits, db_path=settings.upstream_quota_path)
+        limited = sorted(upstream for upstream, rates in limits.items() if any(rate > 0 for rate in rates.values()))
+        if limited and not settings.upstream_quota_path:
+            # Each process would assume the whole quota is its own, and ingestion couldn't yield to chat
+            self.logger.warning(
+                f"Quotas are set for {', '.join(limited)} but UPSTREAM_QUOTA_PATH is not: "
+                f"every process enforces them separately and can exceed them together"
+            )
+        self._lanes: Dict[str, _Lane] = {}
+        self._lanes_lock = threading.Lock()
+        self._tickets = itertools.count()
+        metrics.gauge('upstream_queue_depth', self._queue_depths)
+
+    def call(
+        self,
+        upstream: str,
+        fn: Callable[..., Any],
+        *args,
+        tokens: float = 0.0,
+        priority: Optional[Priority] = None,
+        **kwargs
+    ) -> Any:
+        """Run `fn(*args, **kwargs)` once quota allows, retrying throttled and transient failures"""
+        priority = self.default_priority if priority is None else priority
+        lane = self._lane(upstream)
+        attempt = 0
+        while True:
+            self._acquire(upstream, lane, priority, tokens)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                status, retry_after = self._classify(e)
+                if status is None or attempt >= self.settings.upstream_max_retries:
+                    raise
+            else:
+                status = getattr(result, 'status_code', None)
+                if status not in RETRYABLE_STATUS or attempt >= self.settings.upstream_max_retries:
+                    return result
+                retry_after = self._retry_after(getattr(result, 'headers', None))
+
+            delay = self._backoff(attempt, retry_after)
+            metrics.inc('upstream_retries_total', upstream=upstream, status=str(status))
+            self.logger.warning(f"{upstream} returned {status}, retrying in {delay:.2f}s (attempt {attempt + 1})")
+            if status == 429:
+                # Everyone backs off, not just this caller
+                with lane.cond:
+                    lane.blocked_until = max(lane.blocked_until, time.monotonic() + delay)
+                    lane.cond.notify_all()
+            time.sleep(delay)
+            attempt += 1
+
+    def _acquire(self, upstream: str, lane: _Lane, priority: Priority, tokens: float) -> None:
+        ticket = (int(priority), next(self._tickets))
+        reserve = self.settings.upstream_batch_reserve if priority == Priority.BATCH else 0.0
+        started = time.monotonic()
+        with lane.cond:
+            heapq.heappush(lane.waiting, ticket)
+            try:
+                while True:
+                    if lane.waiting[0] != ticket:
+                        lane.cond.wait(timeout=1.0)
+                        continue
+                    wait = lane.blocked_until - time.monotonic()
+                    if wait <= 0:
+                        wait = self.buckets.try_take(upstream, {'requests': 1, 'tokens': tokens}, reserve)
+                        if wait <= 0:
+                            break
+                    # Wake early if a higher-priority caller queues up behind us
+                    lane.cond.wait(timeout=min(wait, 1.0))
+            finally:
+                lane.waiting.remove(ticket)
+                heapq.heapify(lane.waiting)
+                lane.cond.notify_all()
+        metrics.observe(
+            'upstream_queue_wait_seconds', time.monotonic() - started,
+            upstream=upstream, priority=priority.name.lower()
+        )
+
+    def _lane(self, upstream: str) -> _Lane:
+        with self._lanes_lock:
+            lane = self._lanes.get(upstream)
+            if lane is None:
+                lane = self._lanes[upstream] = _Lane()
+            return lane
+
+    def _queue_depths(self) -> Dict[Tuple[Tuple[str, str], ...], float]:
+        depths = {}
+        for upstream, lane in list(self._lanes.items()):
+            for priority in Priority:
+                count = sum(1 for p, _ in list(lane.waiting) if p == priority)
+                depths[(('priority', priority.name.lower()), ('upstream', upstream))] = count
+        return depths
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        cap = min(self.settings.upstream_backoff_max, self.settings.upstream_backoff_base * 2 ** attempt)
+        delay = random.uniform(cap / 2, cap)
+        return max(delay, retry_after or 0.0)
+
+    def _classify(self, error: Exception) -> Tuple[Optional[int], Optional[float]]:
+        """(status, retry_after) for retryable errors from the openai SDK or httpx; (None, None) otherwise"""
+        response = getattr(error, 'response', None)
+        status = getattr(error, 'status_code', None) or getattr(response, 'status_code', None)
+        if status in RETRYABLE_STATUS:
+            return status, self._retry_after(getattr(response, 'headers', None))
+        # Connection resets and timeouts: openai.APIConnectionError or httpx.TransportError
+        names = {cls.__name__ for cls in type(error).__mro__}
+        if status is None and names & {'APIConnectionError', 'APITimeoutError', 'TransportError'}:
+            return 0, None
+        return None, None
+
+    @staticmethod
+    def _retry_after(headers) -> Optional[float]:
+        if not headers:
+            return None
+        value = headers.get('retry-after-ms')
+        if value:
+            try:
+                return float(value) / 1000
+            except ValueError:
+                pass
+        value = headers.get('retry-after')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                return None
+
+class ScheduledResource:
+    """Wraps an SDK resource (e.g. `client.chat.completions`) so its `create` goes through the scheduler.
+
+    Lets langchain keep calling `client.create(...)` while admission and
+    retries happen underneath.
+    """
+
+    def __init__(self, scheduler: UpstreamScheduler, upstream: str, resource, weigh: Callable[[dict], float] = None):
+        self._scheduler = scheduler
+        self._upstream = upstream
+        self._resource = resource
+        self._weigh = weigh
+
+    def create(self, *args, **kwargs):
+        tokens = self._weigh(kwargs) if self._weigh is not None else 0.0
+        return self._scheduler.call(self._upstream, self._resource.create, *args, tokens=tokens, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._resource, name)
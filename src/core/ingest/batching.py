@@ -0,0 +1,95 @@
+from typing import Awaitable, Callable, Generic, List, Optional, Tuple, TypeVar
+import asyncio
+import logging
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+class AsyncBatcher(Generic[T, R]):
+    """Coalesce individual awaits into batched upstream calls.
+
+    `submit` returns the result for one item, but items are handed to
+    `flush_fn` in groups: a batch is sent when it reaches `max_items`, when
+    its summed `weigh(item)` would exceed `max_weight`, or `flush_interval`
+    seconds after its first item arrived. If a batch call fails, each item is
+    retried on its own so one bad input cannot fail its neighbours.
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[List[T]], Awaitable[List[R]]],
+        max_items: int,
+        flush_interval: float,
+        max_weight: Optional[int] = None,
+        weigh: Optional[Callable[[T], int]] = None,
+        name: str = "batch"
+    ):
+        self.flush_fn = flush_fn
+        self.max_items = max_items
+        self.flush_interval = flush_interval
+        self.max_weight = max_weight
+        self.weigh = weigh or (lambda item: 1)
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+
+        self._items: List[Tuple[T, asyncio.Future]] = []
+        self._weight = 0
+        self._timer: Optional[asyncio.Task] = None
+        self._inflight = set()
+
+    async def submit(self, item: T) -> R:
+        weight = self.weigh(item)
+        if self._items and self.max_weight is not None and self._weight + weight > self.max_weight:
+            self._flush()
+
+        future = asyncio.get_running_loop().create_future()
+        self._items.append((item, future))
+        self._weight += weight
+
+        if len(self._items) >= self.max_items or (
+            self.max_weight is not None and self._weight >= self.max_weight
+        ):
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        return await future
+
+    async def close(self) -> None:
+        """Send whatever is buffered and wait for every outstanding batch"""
+        self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        self._flush()
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._items:
+            return
+        batch, self._items, self._weight = self._items, [], 0
+        task = asyncio.create_task(self._send(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        try:
+            results = await self.flush_fn([item for item, _ in batch])
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            self.logger.warning(f"{self.name} batch of {len(batch)} failed, retrying items one by one: {str(e)}")
+
+        for item, future in batch:
+            try:
+                future.set_result((await self.flush_fn([item]))[0])
+            except Exception as e:
+                future.set_exception(e)
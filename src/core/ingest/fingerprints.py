@@ -0,0 +1,105 @@
+from typing import List, Optional, Tuple
+import sqlite3
+import threading
+import time
+import numpy as np
+from src.core.audio.fingerprint import compare, lookup_keys
+
+# SQLite's default limit on bound parameters is 999 on older builds
+_KEYS_PER_QUERY = 500
+
+class FingerprintIndex:
+    """Persistent audio fingerprints of the videos ingestion has kept.
+
+    Shares the manifest's sqlite connection and lock (its own tables), so
+    the two never hold competing write transactions on one file. Candidates
+    for a new fingerprint come from shared 24-bit hash prefixes and from
+    videos of similar length; only those are aligned and compared in full.
+    """
+
+    def __init__(self, db: sqlite3.Connection, lock: threading.RLock):
+        self._db = db
+        self._lock = lock
+        with self._lock:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints ("
+                "content_hash TEXT PRIMARY KEY, frames INTEGER NOT NULL, fingerprint BLOB NOT NULL, "
+                "updated_at REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS fingerprints_frames ON fingerprints (frames)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprint_keys (key INTEGER NOT NULL, content_hash TEXT NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS fingerprint_keys_key ON fingerprint_keys (key)")
+            self._db.commit()
+
+    def add(self, content_hash: str, fp: np.ndarray) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM fingerprint_keys WHERE content_hash = ?", (content_hash,))
+            self._db.execute(
+                "INSERT OR REPLACE INTO fingerprints (content_hash, frames, fingerprint, updated_at) VALUES (?, ?, ?, ?)",
+                (content_hash, len(fp), fp.astype('<u4').tobytes(), time.time())
+            )
+            self._db.executemany(
+                "INSERT INTO fingerprint_keys (key, content_hash) VALUES (?, ?)",
+                ((int(key), content_hash) for key in lookup_keys(fp))
+            )
+            self._db.commit()
+
+    def remove(self, content_hash: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM fingerprint_keys WHERE content_hash = ?", (content_hash,))
+            self._db.execute("DELETE FROM fingerprints WHERE content_hash = ?", (content_hash,))
+            self._db.commit()
+
+    def get(self, content_hash: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fingerprint FROM fingerprints WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+        return np.frombuffer(row[0], dtype='<u4').astype(np.uint32) if row else None
+
+    def _candidates(self, fp: np.ndarray, min_coverage: float, limit: int, exclude: Optional[str]) -> List[str]:
+        # Read-only queries: nothing here opens a write transaction
+        keys = [int(key) for key in lookup_keys(fp)]
+        hits = {}
+        with self._lock:
+            for start in range(0, len(keys), _KEYS_PER_QUERY):
+                batch = keys[start:start + _KEYS_PER_QUERY]
+                rows = self._db.execute(
+                    f"SELECT content_hash, COUNT(*) FROM fingerprint_keys "
+                    f"WHERE key IN ({','.join('?' * len(batch))}) GROUP BY content_hash",
+                    batch
+                ).fetchall()
+                for content_hash, count in rows:
+                    hits[content_hash] = hits.get(content_hash, 0) + count
+            # Re-encodes can share few exact hashes; videos of about the same length are checked too
+            by_length = self._db.execute(
+                "SELECT content_hash FROM fingerprints WHERE frames BETWEEN ? AND ? "
+                "ORDER BY ABS(frames - ?) LIMIT ?",
+                (int(len(fp) * min_coverage), int(len(fp) / min_coverage) + 1, len(fp), limit)
+            ).fetchall()
+        by_keys = sorted(hits, key=hits.get, reverse=True)[:limit]
+        return [h for h in dict.fromkeys(by_keys + [row[0] for row in by_length]) if h != exclude]
+
+    def match(
+        self,
+        fp: np.ndarray,
+        min_similarity: float,
+        min_coverage: float,
+        max_offset_seconds: float,
+        max_candidates: int = 20,
+        exclude: Optional[str] = None
+    ) -> Optional[Tuple[str, float]]:
+        """(content_hash, similarity) of the closest stored near-duplicate, if any"""
+        if len(fp) == 0:
+            return None
+        best = None
+        for content_hash in self._candidates(fp, min_coverage, max_candidates, exclude):
+            stored = self.get(content_hash)
+            if stored is None:
+                continue
+            similarity, coverage = compare(fp, stored, max_offset_seconds)
+            if similarity >= min_similarity and coverage >= min_coverage and (best is None or similarity > best[1]):
+                best = (content_hash, similarity)
+        return best
@@ -0,0 +1,160 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from src.core.ingest.fingerprints import FingerprintIndex
+
+STAGES = ("audio", "transcript", "title", "embedding", "chunks", "stored", "duplicate_of")
+
+@dataclass
+class ManifestEntry:
+    content_hash: str
+    path: str
+    size: int
+    mtime: float
+    audio_path: Optional[str] = None
+    transcript: Optional[str] = None
+    title: Optional[str] = None
+    embedding: Optional[List[float]] = None
+    chunks: Optional[List[Dict[str, Any]]] = None
+    stored: bool = False
+    error: Optional[str] = None
+    duplicate_of: Optional[str] = None  # content hash of the video this one repeats
+
+    @property
+    def complete(self) -> bool:
+        return self.stored or self.duplicate_of is not None
+
+def file_hash(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class IngestManifest:
+    """Durable record of what ingestion has already done for each video.
+
+    Videos are identified by content hash; size and mtime are kept so an
+    unchanged file can be recognised without re-hashing it. Every stage
+    output is written as soon as it exists, so a crash only loses the stage
+    that was in flight. Byte-identical copies at other paths share their
+    original's row and are listed in `copies`.
+    """
+
+    def __init__(self, db_path: str):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        # Stages call in from worker threads as well as the event loop
+        self._lock = threading.RLock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS videos ("
+            "content_hash TEXT PRIMARY KEY, path TEXT NOT NULL, size INTEGER NOT NULL, "
+            "mtime REAL NOT NULL, audio_path TEXT, transcript TEXT, title TEXT, "
+            "embedding TEXT, stored INTEGER NOT NULL DEFAULT 0, error TEXT, updated_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS videos_path ON videos (path)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS copies (path TEXT PRIMARY KEY, content_hash TEXT NOT NULL)"
+        )
+        # Manifests written before chunked indexing lack the chunks column
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(videos)")}
+        if "chunks" not in columns:
+            self._db.execute("ALTER TABLE videos ADD COLUMN chunks TEXT")
+        if "duplicate_of" not in columns:
+            self._db.execute("ALTER TABLE videos ADD COLUMN duplicate_of TEXT")
+        self._db.commit()
+
+    def fingerprint_index(self) -> FingerprintIndex:
+        """Fingerprint index on this manifest's connection"""
+        return FingerprintIndex(self._db, self._lock)
+
+    def lookup_hash(self, path: Path, size: int, mtime: float) -> Optional[str]:
+        """Known content hash for a file whose size and mtime are unchanged"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content_hash FROM videos WHERE path = ? AND size = ? AND mtime = ?",
+                (str(path), size, mtime)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get(self, content_hash: str) -> Optional[ManifestEntry]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content_hash, path, size, mtime, audio_path, transcript, title, "
+                "embedding, chunks, stored, error, duplicate_of FROM videos WHERE content_hash = ?",
+                (content_hash,)
+            ).fetchone()
+        if row is None:
+            return None
+        return ManifestEntry(
+            content_hash=row[0], path=row[1], size=row[2], mtime=row[3],
+            audio_path=row[4], transcript=row[5], title=row[6],
+            embedding=json.loads(row[7]) if row[7] else None,
+            chunks=json.loads(row[8]) if row[8] else None,
+            stored=bool(row[9]), error=row[10], duplicate_of=row[11]
+        )
+
+    def register(self, content_hash: str, path: Path) -> ManifestEntry:
+        """Record (or re-point) a video and return what is already known about it"""
+        stat = path.stat()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO videos (content_hash, path, size, mtime, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(content_hash) DO UPDATE SET path = excluded.path, size = excluded.size, "
+                "mtime = excluded.mtime",
+                (content_hash, str(path), stat.st_size, stat.st_mtime, time.time())
+            )
+            self._db.execute("DELETE FROM copies WHERE path = ?", (str(path),))
+            self._db.commit()
+        return self.get(content_hash)
+
+    def record_copy(self, content_hash: str, path: Path) -> None:
+        """Record a byte-identical copy of a registered video"""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO copies (path, content_hash) VALUES (?, ?)", (str(path), content_hash)
+            )
+            self._db.commit()
+
+    def record(self, content_hash: str, stage: str, value) -> None:
+        """Persist one stage output; `value=None` clears it"""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown ingestion stage: {stage}")
+        column = "audio_path" if stage == "audio" else stage
+        if stage in ("embedding", "chunks") and value is not None:
+            value = json.dumps(value)
+        elif stage == "stored":
+            value = int(bool(value))
+        with self._lock:
+            self._db.execute(
+                f"UPDATE videos SET {column} = ?, error = NULL, updated_at = ? WHERE content_hash = ?",
+                (value, time.time(), content_hash)
+            )
+            self._db.commit()
+
+    def duplicates(self, content_hash: str) -> List[str]:
+        """Paths of the videos recorded as duplicates or copies of this one"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT path FROM videos WHERE duplicate_of = ? "
+                "UNION SELECT path FROM copies WHERE content_hash = ? ORDER BY path",
+                (content_hash, content_hash)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def record_error(self, content_hash: str, error: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE videos SET error = ?, updated_at = ? WHERE content_hash = ?",
+                (error, time.time(), content_hash)
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,165 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import bisect
+import logging
+import random
+import threading
+import time
+import uuid
+import zlib
+
+# Seconds; covers everything from a cache lookup to a slow ElevenLabs reply
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+request_id_var: ContextVar[str] = ContextVar('request_id', default='-')
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def new_request_id() -> str:
+    request_id = uuid.uuid4().hex[:12]
+    request_id_var.set(request_id)
+    return request_id
+
+def current_request_id() -> str:
+    return request_id_var.get()
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+
+class MetricsRegistry:
+    """In-process latency histograms, counters and cache statistics.
+
+    Rendered in the Prometheus text exposition format by `render`. Cache
+    objects exposing a `stats` with `hits`/`misses` are read at render time,
+    so caches never need to know about metrics.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = defaultdict(dict)
+        self._counters: Dict[str, Dict[LabelKey, float]] = defaultdict(lambda: defaultdict(float))
+        self._gauges: Dict[str, Callable[[], Dict[LabelKey, float]]] = {}
+        self._caches: Dict[str, object] = {}
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            histogram = self._histograms[name].get(key)
+            if histogram is None:
+                histogram = self._histograms[name][key] = _Histogram(self.buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        with self._lock:
+            self._counters[name][self._key(labels)] += value
+
+    def gauge(self, name: str, collect: Callable[[], Dict[LabelKey, float]]) -> None:
+        """Register a gauge whose labelled values are collected at render time"""
+        self._gauges[name] = collect
+
+    def register_cache(self, name: str, cache) -> None:
+        if cache is not None:
+            self._caches[name] = cache
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Time a pipeline stage into `stage_latency_seconds` and count its failures"""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc('stage_errors_total', stage=stage)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe('stage_latency_seconds', elapsed, stage=stage)
+            self.logger.debug(f"[{current_request_id()}] {stage} took {elapsed * 1000:.1f} ms")
+
+    def summary(self) -> List[str]:
+        """One human-readable line per stage, for batch jobs without a scrape endpoint"""
+        lines = []
+        with self._lock:
+            for key, histogram in sorted(self._histograms.get('stage_latency_seconds', {}).items()):
+                stage = dict(key).get('stage', '')
+                mean = histogram.sum / histogram.total if histogram.total else 0.0
+                lines.append(f"{stage}: {histogram.total} calls, mean {mean * 1000:.1f} ms")
+        return lines
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{self._labels(key, le=repr(bound))} {cumulative}")
+                    lines.append(f"{name}_bucket{self._labels(key, le='+Inf')} {histogram.total}")
+                    lines.append(f"{name}_sum{self._labels(key)} {histogram.sum}")
+                    lines.append(f"{name}_count{self._labels(key)} {histogram.total}")
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{self._labels(key)} {value}")
+
+        for name, collect in sorted(self._gauges.items()):
+            lines.append(f"# TYPE {name} gauge")
+            for key, value in sorted(collect().items()):
+                lines.append(f"{name}{self._labels(key)} {value}")
+
+        if self._caches:
+            for kind in ('hits', 'misses'):
+                lines.append(f"# TYPE cache_{kind}_total counter")
+                for name, cache in sorted(self._caches.items()):
+                    lines.append(f'cache_{kind}_total{{cache="{name}"}} {getattr(cache.stats, kind)}')
+            lines.append("# TYPE cache_hit_ratio gauge")
+            for name, cache in sorted(self._caches.items()):
+                lines.append(f'cache_hit_ratio{{cache="{name}"}} {cache.stats.hit_rate}')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    @staticmethod
+    def _labels(key: LabelKey, **extra: str) -> str:
+        pairs = list(key) + list(extra.items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+metrics = MetricsRegistry()
+
+def _sampled(request_id: str, rate: float) -> bool:
+    if request_id == '-':
+        # Outside a request there is nothing to group lines by
+        return random.random() < rate
+    # Same answer for every line of a request, so a sampled request is logged in full
+    return zlib.crc32(request_id.encode('utf-8')) / 2 ** 32 < rate
+
+def log_sampled(logger: logging.Logger, message: str, rate: Optional[float] = None) -> None:
+    """Log hot-path detail at INFO for a sample of requests and at DEBUG otherwise"""
+    if rate is None:
+        from src.config.settings import get_settings
+        rate = get_settings().query_log_sample_rate
+    request_id = current_request_id()
+    if rate >= 1.0 or _sampled(request_id, rate):
+        logger.info(f"[{request_id}] {message}")
+    else:
+        logger.debug(f"[{request_id}] {message}")
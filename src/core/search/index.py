@@ -0,0 +1,252 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Optional, Any, Sequence
+import json
+import logging
+import os
+import secrets
+import threading
+import numpy as np
+from src.core.search.pagination import paginate
+
+@dataclass
+class IndexStats:
+    rows: int
+    dimensions: int
+    source: str
+
+class VectorIndex:
+    """In-process cosine index over a table of embeddings (`video_content` by default).
+
+    Rows are L2-normalised once at load time so a query is a single
+    matrix-vector product. The matrix can be persisted as a `.npy` snapshot
+    and memory-mapped on the next start instead of pulling every embedding
+    from Supabase again.
+    """
+
+    PAGE_SIZE = 1000
+    DIMENSIONS = 1536  # Ada; only used to shape an index with no rows
+
+    def __init__(
+        self,
+        supabase,
+        snapshot_path: Optional[str] = None,
+        table: str = 'video_content',
+        content_column: str = 'script',
+        url_column: str = 'url',
+        extra_columns: Sequence[str] = ('title',)
+    ):
+        self.supabase = supabase
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.table = table
+        self.content_column = content_column
+        self.url_column = url_column
+        self.extra_columns = tuple(extra_columns)
+        self._columns = ", ".join(('id', content_column, url_column, 'embedding') + self.extra_columns)
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        # Serialises refresh, sync and snapshot reloads; searches only need _lock
+        self._update_lock = threading.RLock()
+        self._matrix = np.zeros((0, self.DIMENSIONS), dtype=np.float32)
+        self._rows: List[Dict[str, Any]] = []
+        self._source = "empty"
+        self._snapshot_mtime = None
+
+    @property
+    def stats(self) -> IndexStats:
+        matrix = self._matrix
+        return IndexStats(rows=matrix.shape[0], dimensions=matrix.shape[1], source=self._source)
+
+    def load(self) -> None:
+        """Load from the on-disk snapshot if present, otherwise from Supabase"""
+        with self._update_lock:
+            if self.snapshot_path and self._snapshot_files_exist():
+                self._load_snapshot()
+            else:
+                self.refresh()
+
+    def refresh(self) -> None:
+        """Rebuild the whole index from Supabase and rewrite the snapshot"""
+        with self._update_lock:
+            rows = self._fetch_rows()
+            self._swap(rows, self._build_matrix(rows, self._matrix.shape[1]), source="supabase")
+            self._save_snapshot()
+        self.logger.info(f"Vector index refreshed: {len(rows)} rows")
+
+    def reload_if_changed(self) -> bool:
+        """Re-map the snapshot when another process has rewritten it since we loaded it"""
+        if not self.snapshot_path or not self._snapshot_files_exist():
+            return False
+        with self._update_lock:
+            if self._current_snapshot_mtime() == self._snapshot_mtime:
+                return False
+            return self._load_snapshot(rebuild_if_inconsistent=False)
+
+    def sync(self) -> int:
+        """Add new rows, replace edited ones and drop deleted ones; returns how many changed.
+
+        Ingestion upserts on url and keeps row ids, so an id alone doesn't
+        say a row is unchanged: rows are compared on their text columns,
+        and only new or edited rows are fetched with their embeddings.
+        """
+        with self._update_lock:
+            columns = ", ".join(('id', self.content_column, self.url_column) + self.extra_columns)
+            remote = {
+                item['id']: self._signature(self._fields(item))
+                for item in paginate(self.supabase, self.table, columns, self.PAGE_SIZE)
+            }
+            rows = self._rows
+            keep = [i for i, row in enumerate(rows) if remote.get(row['id']) == self._signature(row)]
+            kept_ids = {rows[i]['id'] for i in keep}
+            fetch = [row_id for row_id in remote if row_id not in kept_ids]
+            deleted = sum(1 for row in rows if row['id'] not in remote)
+            if not fetch and not deleted:
+                return 0
+
+            new_rows = []
+            for start in range(0, len(fetch), self.PAGE_SIZE):
+                batch = fetch[start:start + self.PAGE_SIZE]
+                response = self.supabase.table(self.table) \
+                    .select(self._columns) \
+                    .in_('id', batch) \
+                    .execute()
+                new_rows.extend(self._parse_row(item) for item in response.data or [])
+            new_rows = [row for row in new_rows if row is not None]
+
+            added = self._build_matrix(new_rows, self._matrix.shape[1])
+            matrix = np.vstack([np.asarray(self._matrix)[keep], added]) if keep else added
+            self._swap([rows[i] for i in keep] + new_rows, matrix, source="supabase")
+            self._save_snapshot()
+        changed = len(new_rows) + deleted
+        self.logger.info(
+            f"Vector index synced: {len(new_rows)} new or edited rows, {deleted} deleted rows"
+        )
+        return changed
+
+    def search(self, query_embedding: List[float], match_threshold: float, match_count: int) -> List[Dict]:
+        """Cosine top-k with the same semantics as the `match_video_content` RPC"""
+        # Take a consistent snapshot of the arrays; refresh swaps both at once
+        matrix, rows = self._matrix, self._rows
+        if not rows or matrix.shape[0] == 0 or match_count <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if query.shape != (matrix.shape[1],):
+            self.logger.warning(f"Query embedding has shape {query.shape}, index has {matrix.shape[1]} dimensions")
+            return []
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        scores = matrix @ (query / norm)
+
+        candidates = np.flatnonzero(scores > match_threshold)
+        if candidates.size == 0:
+            return []
+        if candidates.size > match_count:
+            top = np.argpartition(scores[candidates], -match_count)[-match_count:]
+            candidates = candidates[top]
+        candidates = candidates[np.argsort(scores[candidates])[::-1]]
+
+        results = []
+        for i in candidates:
+            result = {
+                'content': rows[i]['content'],
+                'url': rows[i]['url'],
+                'similarity': float(scores[i])
+            }
+            for column in self.extra_columns:
+                result[column] = rows[i].get(column)
+            results.append(result)
+        return results
+
+    def _swap(self, rows: List[Dict[str, Any]], matrix: np.ndarray, source: str) -> None:
+        with self._lock:
+            self._matrix = matrix
+            self._rows = rows
+            self._source = source
+
+    def _fetch_rows(self) -> List[Dict[str, Any]]:
+        rows = (self._parse_row(item) for item in paginate(self.supabase, self.table, self._columns, self.PAGE_SIZE))
+        return [row for row in rows if row is not None]
+
+    def _parse_row(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        embedding = item.get('embedding')
+        # pgvector columns come back from PostgREST as a "[...]" string
+        if isinstance(embedding, str):
+            embedding = json.loads(embedding)
+        if not embedding:
+            self.logger.warning(f"Skipping {self.table} row {item.get('id')} without embedding")
+            return None
+        row = self._fields(item)
+        row['embedding'] = embedding
+        return row
+
+    def _fields(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        row = {
+            'id': item.get('id'),
+            'content': item.get(self.content_column, ''),
+            'url': item.get(self.url_column, '')
+        }
+        for column in self.extra_columns:
+            row[column] = item.get(column)
+        return row
+
+    def _signature(self, row: Dict[str, Any]) -> tuple:
+        return (row['content'], row['url']) + tuple(row.get(column) for column in self.extra_columns)
+
+    @classmethod
+    def _build_matrix(cls, rows: List[Dict[str, Any]], dimensions: Optional[int] = None) -> np.ndarray:
+        if not rows:
+            # An empty table (fresh deploy, no chunks yet) is a valid, empty index
+            return np.zeros((0, dimensions or cls.DIMENSIONS), dtype=np.float32)
+        matrix = np.ascontiguousarray([row.pop('embedding') for row in rows], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _snapshot_files(self):
+        return self.snapshot_path.with_suffix('.npy'), self.snapshot_path.with_suffix('.json')
+
+    def _snapshot_files_exist(self) -> bool:
+        return all(path.exists() for path in self._snapshot_files())
+
+    def _current_snapshot_mtime(self) -> int:
+        # The rows file is renamed into place last, so it marks a complete snapshot
+        return self._snapshot_files()[1].stat().st_mtime_ns
+
+    def _load_snapshot(self, rebuild_if_inconsistent: bool = True) -> bool:
+        matrix_path, rows_path = self._snapshot_files()
+        mtime = self._current_snapshot_mtime()
+        matrix = np.load(matrix_path, mmap_mode='r')
+        with open(rows_path) as f:
+            rows = json.load(f)
+        if matrix.shape[0] != len(rows):
+            if not rebuild_if_inconsistent:
+                # Caught another worker between its two renames; retry on the next check
+                return False
+            self.logger.warning("Vector index snapshot is inconsistent, rebuilding from Supabase")
+            self.refresh()
+            return True
+        self._swap(rows, matrix, source="snapshot")
+        self._snapshot_mtime = mtime
+        self.logger.info(f"Vector index loaded from snapshot: {len(rows)} rows")
+        return True
+
+    def _save_snapshot(self) -> None:
+        if not self.snapshot_path:
+            return
+        matrix_path, rows_path = self._snapshot_files()
+        matrix_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to temp files and rename so a concurrent reader never maps a partial file
+        # Unique names, so concurrent refreshes in several workers never share a temp file
+        suffix = f".{os.getpid()}.{secrets.token_hex(4)}.tmp"
+        tmp_matrix = matrix_path.with_name(matrix_path.stem + suffix + '.npy')
+        tmp_rows = rows_path.with_name(rows_path.stem + suffix + '.json')
+        np.save(tmp_matrix, np.asarray(self._matrix))
+        with open(tmp_rows, 'w') as f:
+            json.dump(self._rows, f)
+        tmp_matrix.replace(matrix_path)
+        tmp_rows.replace(rows_path)
+        self._snapshot_mtime = self._current_snapshot_mtime()
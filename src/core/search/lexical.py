@@ -0,0 +1,123 @@
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Tuple
+import logging
+import math
+import re
+import threading
+from src.core.search.pagination import paginate
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by do does for from how i in is it me my of on or "
+    "so that the this to what when where who why will with you your".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+class BM25Index:
+    """Local BM25 inverted index over video titles and scripts.
+
+    Titles are short and say what a video is about, so their terms count
+    `title_boost` times. Built from Supabase at startup and brought up to
+    date with `sync` when videos are ingested, edited or deleted.
+    """
+
+    COLUMNS = 'id, title, script, url'
+
+    def __init__(self, supabase, k1: float = 1.5, b: float = 0.75, title_boost: int = 2):
+        self.supabase = supabase
+        self.k1 = k1
+        self.b = b
+        self.title_boost = title_boost
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()  # one load or sync at a time
+        self._docs: List[Dict[str, Any]] = []
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._lengths: List[int] = []
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def load(self) -> None:
+        with self._sync_lock:
+            for item in paginate(self.supabase, 'video_content', self.COLUMNS):
+                self.add(item)
+        self.logger.info(f"Lexical index built: {len(self)} videos")
+
+    def sync(self) -> int:
+        """Index new rows and re-index edited or deleted ones; returns how many changed"""
+        with self._sync_lock:
+            items = list(paginate(self.supabase, 'video_content', self.COLUMNS))
+            with self._lock:
+                current = {doc['id']: doc for doc in self._docs}
+            changed = [item for item in items if current.get(item.get('id')) != self._document(item)]
+            deleted = len(current.keys() - {item.get('id') for item in items})
+            if not changed and not deleted:
+                return 0
+            if deleted or any(item.get('id') in current for item in changed):
+                # Postings can't be taken back out one document at a time; rebuild
+                self._rebuild(items)
+            else:
+                for item in changed:
+                    self.add(item)
+        self.logger.info(f"Lexical index synced: {len(changed)} new or edited, {deleted} deleted videos")
+        return len(changed) + deleted
+
+    @staticmethod
+    def _document(item: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'id': item.get('id'),
+            'title': item.get('title') or '',
+            'content': item.get('script') or item.get('content') or '',
+            'url': item.get('url', '')
+        }
+
+    def _rebuild(self, items: List[Dict[str, Any]]) -> None:
+        fresh = BM25Index(self.supabase, k1=self.k1, b=self.b, title_boost=self.title_boost)
+        for item in items:
+            fresh.add(item)
+        with self._lock:
+            self._docs = fresh._docs
+            self._postings, self._lengths, self._total_length = fresh._postings, fresh._lengths, fresh._total_length
+
+    def add(self, item: Dict[str, Any]) -> None:
+        doc = self._document(item)
+        terms = Counter(tokenize(doc['content']))
+        for term, count in Counter(tokenize(doc['title'])).items():
+            terms[term] += count * self.title_boost
+
+        with self._lock:
+            index = len(self._docs)
+            self._docs.append(doc)
+            for term, count in terms.items():
+                self._postings[term][index] = count
+            length = sum(terms.values())
+            self._lengths.append(length)
+            self._total_length += length
+
+    def search(self, query: str, limit: int = 3) -> List[Tuple[Dict[str, Any], float, float]]:
+        """Top documents as (doc, bm25 score, fraction of query terms the doc contains)"""
+        terms = tokenize(query)
+        with self._lock:
+            count = len(self._docs)
+            if not terms or count == 0:
+                return []
+            average = self._total_length / count
+            scores: Dict[int, float] = defaultdict(float)
+            matched: Dict[int, int] = defaultdict(int)
+            unique = set(terms)
+            for term in unique:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc] / average)
+                    scores[doc] += idf * tf * (self.k1 + 1) / (tf + norm)
+                    matched[doc] += 1
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            return [(self._docs[doc], score, matched[doc] / len(unique)) for doc, score in ranked]
@@ -0,0 +1,25 @@
+from typing import Any, Dict, Iterator
+
+PAGE_SIZE = 1000
+
+def paginate(
+    supabase,
+    table: str,
+    columns: str,
+    page_size: int = PAGE_SIZE,
+    order: str = 'id'
+) -> Iterator[Dict[str, Any]]:
+    """Every row of a Supabase table, fetched `page_size` rows per request"""
+    start = 0
+    while True:
+        # Without a stable order PostgREST may skip or repeat rows across pages
+        response = supabase.table(table) \
+            .select(columns) \
+            .order(order) \
+            .range(start, start + page_size - 1) \
+            .execute()
+        data = response.data or []
+        yield from data
+        if len(data) < page_size:
+            break
+        start += page_size
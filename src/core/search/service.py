@@ -1,10 +1,17 @@
 from dataclasses import dataclass
-from typing import List, Dict
+from typing import List, Dict, Optional
 from langchain_openai import AzureOpenAIEmbeddings
-from supabase import create_client
 import logging
 import sys
+import time
 from src.config.settings import get_settings
+from src.core.clients.registry import get_clients
+from src.core.search.index import VectorIndex
+from src.core.search.lexical import BM25Index, tokenize
+from src.core.tokens import chunk_text
+from src.core.cache.embedding import EmbeddingCache, normalize_query
+from src.core.cache.singleflight import SingleFlight
+from src.core.metrics.registry import metrics, log_sampled
 
 @dataclass
 class SearchResult:
@@ -27,10 +34,31 @@ class SimilaritySearch:
             handler.setFormatter(formatter)
             self.logger.addHandler(handler)
         
-        self.supabase = create_client(
-            self.settings.supabase_url,
-            self.settings.supabase_key
-        )
+        clients = get_clients()
+        self.supabase = clients.supabase()
+
+        # Optional in-process index that replaces the RPC round-trip
+        self.index = None
+        if self.settings.search_index_mode == 'local':
+            if self.settings.chunked_index_enabled:
+                self.index = VectorIndex(
+                    self.supabase,
+                    self.settings.search_index_path,
+                    table='video_chunks',
+                    content_column='content',
+                    url_column='video_url',
+                    extra_columns=('chunk_index',)
+                )
+            else:
+                self.index = VectorIndex(self.supabase, self.settings.search_index_path)
+            self.index.load()
+        self._index_checked_at = time.monotonic()
+
+        # BM25 over titles and scripts for the lexical and hybrid search modes
+        self.lexical = None
+        if self.settings.search_mode in ('lexical', 'hybrid'):
+            self.lexical = BM25Index(self.supabase)
+            self.lexical.load()
         
         self.embeddings = AzureOpenAIEmbeddings(
             azure_endpoint=self.settings.ada_endpoint,
@@ -38,46 +66,75 @@ class SimilaritySearch:
             api_version=self.settings.azure_api_version,
             model=self.settings.ada_deployment_name
         )
+        # Route embeddings through the shared pool (see ChatService for why)
+        self.embeddings.client = clients.scheduled('ada', clients.azure_openai(
+            self.settings.ada_api_key,
+            self.settings.ada_endpoint
+        ).embeddings)
+        self.embedding_cache = EmbeddingCache(
+            max_entries=self.settings.embedding_cache_size,
+            db_path=self.settings.embedding_cache_path
+        )
+        metrics.register_cache('embedding', self.embedding_cache)
+        # Identical questions arriving together share one search
+        self.inflight = SingleFlight('search') if self.settings.singleflight_enabled else None
         
         self.logger.info("Search service initialized")
 
     def search(self, query: str, limit: int = 3) -> List[Dict]:
+        with metrics.span('search'):
+            if self.inflight is None:
+                return self._search(query, limit)
+            results = self.inflight.do(
+                (normalize_query(query), limit),
+                lambda: self._search(query, limit)
+            )
+            # Waiters share the leader's list; hand each caller its own copies
+            return [dict(result) for result in results]
+
+    def _search(self, query: str, limit: int) -> List[Dict]:
         try:
-            self.logger.info(f"Performing search for query: {query}")
-            
-            # Generate embedding for the query
-            embedding = self.embeddings.embed_query(query)
-            
-            # Perform similarity search via Supabase RPC
-            response = self.supabase.rpc(
-                'match_video_content',
-                {
-                    'query_embedding': embedding,
-                    'match_threshold': 0.8,  # Slightly lowered to ensure some results
-                    'match_count': limit
-                }
-            ).execute()
+            log_sampled(self.logger, f"Performing search for query: {query}")
+
+            mode = self.settings.search_mode
+            lexical_matches = self._lexical_match(query, limit) if self.lexical is not None else []
+
+            if mode == 'lexical':
+                matches = lexical_matches
+            elif mode == 'hybrid' and self._lexical_confident(lexical_matches):
+                # Clear keyword hit: skip the embedding round-trip entirely
+                metrics.inc('lexical_fast_path_total')
+                log_sampled(self.logger, "Confident lexical match, skipping vector search")
+                matches = lexical_matches
+            else:
+                matches = self._vector_match(query, limit)
+                if mode == 'hybrid':
+                    matches = self._fuse(matches, lexical_matches, limit)
 
             # Log search results
-            self.logger.info(f"Found {len(response.data) if response.data else 0} results")
+            log_sampled(self.logger, f"Found {len(matches)} results")
 
             # Handle no results
-            if not response.data:
+            if not matches:
                 self.logger.warning("No matches found for the query")
                 return []
 
             # Process and sort results
             results = []
-            for item in response.data:
+            for item in matches:
                 # Ensure we have all necessary fields
                 result = {
                     'content': item.get('content', ''),
                     'url': item.get('url', ''),
                     'similarity': item.get('similarity', 0.0)
                 }
+                if 'chunks' in item:
+                    result['chunks'] = item['chunks']
+                if 'source' in item:
+                    result['source'] = item['source']
                 
                 # Log individual match details
-                self.logger.info(
+                self.logger.debug(
                     f"Match found - "
                     f"Similarity: {result['similarity']:.3f}, "
                     f"URL: {result['url']}"
@@ -93,6 +150,157 @@ class SimilaritySearch:
         except Exception as e:
             # Ensure logging works even if something goes wrong
             print(f"Error in search: {str(e)}")
+            metrics.inc('stage_errors_total', stage='search')
             if self.logger:
                 self.logger.error(f"Search error: {str(e)}", exc_info=True)
-            return []
\ No newline at end of file
+            return []
+
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query, serving repeated questions from the cache"""
+        return self.embedding_cache.get_or_compute(
+            query,
+            self.settings.ada_deployment_name,
+            self._compute_embedding
+        )
+
+    def _compute_embedding(self, query: str) -> List[float]:
+        with metrics.span('embedding'):
+            return self.embeddings.embed_query(query)
+
+    def peek_query_embedding(self, query: str) -> Optional[List[float]]:
+        """Cached query embedding, without ever calling Ada"""
+        return self.embedding_cache.get(query, self.settings.ada_deployment_name)
+
+    def refresh_index(self, full: bool = False) -> int:
+        """Pick up new, re-ingested and deleted videos in the local indexes without a restart"""
+        if self.lexical is not None:
+            if full:
+                self.lexical = BM25Index(self.supabase)
+                self.lexical.load()
+            else:
+                self.lexical.sync()
+        if self.index is None:
+            return 0
+        if full:
+            self.index.refresh()
+            return self.index.stats.rows
+        return self.index.sync()
+
+    def _vector_match(self, query: str, limit: int) -> List[Dict]:
+        # Generate embedding for the query
+        embedding = self.embed_query(query)
+
+        if self.settings.chunked_index_enabled:
+            return self._group_chunks(
+                self._match(embedding, self.settings.search_chunk_candidates), limit
+            )
+        return self._match(embedding, limit)
+
+    def _lexical_match(self, query: str, limit: int) -> List[Dict]:
+        with metrics.span('lexical_search'):
+            hits = self.lexical.search(query, limit)
+        matches = []
+        for doc, score, coverage in hits:
+            # One shared word is not relevance; without this floor NO_MATCH never fires
+            if coverage < self.settings.lexical_floor_coverage:
+                continue
+            match = {
+                'content': doc['content'],
+                'url': doc['url'],
+                'similarity': score,  # BM25 score, not a cosine
+                'lexical_score': score,
+                'coverage': coverage,
+                'source': 'lexical'
+            }
+            if self.settings.chunked_index_enabled:
+                # Whole scripts would bypass the chat context token budget
+                match['chunks'] = self._lexical_chunks(query, doc['content'])
+            matches.append(match)
+        return matches
+
+    def _lexical_chunks(self, query: str, script: str) -> List[Dict]:
+        """Script split like the chunk index, ranked by the share of query terms each chunk has"""
+        terms = set(tokenize(query))
+        chunks = []
+        for i, text in enumerate(chunk_text(script, self.settings.chunk_size_tokens, self.settings.chunk_overlap_tokens)):
+            shared = terms.intersection(tokenize(text))
+            chunks.append({'content': text, 'chunk_index': i, 'similarity': len(shared) / max(len(terms), 1)})
+        chunks.sort(key=lambda c: c['similarity'], reverse=True)
+        return chunks
+
+    def _lexical_confident(self, matches: List[Dict]) -> bool:
+        """Top hit covers the query's terms and is well ahead of the runner-up"""
+        # Raw BM25 scores grow with catalog size, so gate on term coverage instead
+        if not matches or matches[0]['coverage'] < self.settings.lexical_min_coverage:
+            return False
+        if len(matches) == 1:
+            return True
+        return matches[0]['lexical_score'] >= self.settings.lexical_margin * matches[1]['lexical_score']
+
+    @staticmethod
+    def _fuse(vector: List[Dict], lexical: List[Dict], limit: int, k: int = 60) -> List[Dict]:
+        """Reciprocal rank fusion of the vector and lexical rankings, per video.
+
+        Both inputs are already filtered (vector hits by the match threshold,
+        lexical hits by the coverage floor), so fusion only re-orders matches.
+        """
+        fused: Dict[str, Dict] = {}
+        for ranking in (vector, lexical):
+            for rank, item in enumerate(ranking):
+                entry = fused.setdefault(item['url'], {'item': item, 'score': 0.0})
+                entry['score'] += 1.0 / (k + rank + 1)
+        ranked = sorted(fused.values(), key=lambda e: e['score'], reverse=True)[:limit]
+        # Vector items win ties for the payload, so chunks and cosine scores survive
+        return [dict(entry['item'], similarity=entry['score']) for entry in ranked]
+
+    def _match(self, embedding: List[float], limit: int) -> List[Dict]:
+        """Run the match against the local index or the Supabase RPC"""
+        threshold = self.settings.search_match_threshold
+        if self.index is not None:
+            self._reload_shared_index()
+            with metrics.span('vector_search'):
+                return self.index.search(embedding, threshold, limit)
+
+        # Perform similarity search via Supabase RPC
+        with metrics.span('vector_search'):
+            response = self.supabase.rpc(
+                'match_video_chunks' if self.settings.chunked_index_enabled else 'match_video_content',
+                {
+                    'query_embedding': embedding,
+                    'match_threshold': threshold,
+                    'match_count': limit
+                }
+            ).execute()
+        return response.data or []
+
+    def _reload_shared_index(self) -> None:
+        """Adopt a snapshot another worker wrote after a refresh, checked at most every few seconds"""
+        now = time.monotonic()
+        if now - self._index_checked_at < self.settings.search_index_check_seconds:
+            return
+        self._index_checked_at = now
+        if self.index.reload_if_changed() and self.lexical is not None:
+            self.lexical.sync()
+
+    @staticmethod
+    def _group_chunks(chunk_hits: List[Dict], limit: int) -> List[Dict]:
+        """Aggregate chunk hits into one result per video, scored by its best chunk"""
+        videos: Dict[str, Dict] = {}
+        for hit in chunk_hits:
+            url = hit.get('url') or hit.get('video_url', '')
+            video = videos.setdefault(url, {'url': url, 'similarity': 0.0, 'chunks': []})
+            video['chunks'].append({
+                'content': hit.get('content', ''),
+                'chunk_index': hit.get('chunk_index', 0),
+                'similarity': hit.get('similarity', 0.0)
+            })
+            video['similarity'] = max(video['similarity'], hit.get('similarity', 0.0))
+
+        results = sorted(videos.values(), key=lambda v: v['similarity'], reverse=True)[:limit]
+        for video in results:
+            video['chunks'].sort(key=lambda c: c['similarity'], reverse=True)
+            # Keep `content` meaningful for callers that ignore chunks
+            video['content'] = "\n".join(
+                c['content'] for c in sorted(video['chunks'], key=lambda c: c['chunk_index'])
+            )
+        return results
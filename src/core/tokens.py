@@ -0,0 +1,56 @@
+from functools import lru_cache
+from typing import List
+
+@lru_cache
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except ImportError:
+        return None
+    except Exception:
+        # tiktoken downloads its BPE file on first use; offline hosts fall back too
+        return None
+
+def count_tokens(text: str) -> int:
+    """Token count for Ada/GPT inputs; falls back to a chars/4 estimate without tiktoken"""
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+def chunk_text(text: str, size: int, overlap: int) -> List[str]:
+    """Split text into windows of `size` tokens, each overlapping the previous by `overlap`"""
+    if overlap >= size:
+        raise ValueError("Chunk overlap must be smaller than chunk size")
+    encoding = _encoding()
+    # Without tiktoken, words stand in for tokens
+    tokens = encoding.encode(text) if encoding is not None else text.split()
+    if not tokens:
+        return []
+
+    chunks = []
+    step = size - overlap
+    for start in range(0, len(tokens), step):
+        window = tokens[start:start + size]
+        chunks.append(encoding.decode(window) if encoding is not None else " ".join(window))
+        if start + size >= len(tokens):
+            break
+    return chunks
+
+def estimate_request_tokens(request: dict, completion_allowance: int = 256) -> int:
+    """Rough token cost of a chat or embeddings `create` call, for quota accounting"""
+    total = 0
+    for message in request.get('messages') or []:
+        content = message.get('content') if isinstance(message, dict) else getattr(message, 'content', '')
+        total += count_tokens(content if isinstance(content, str) else str(content or ''))
+    if request.get('messages') is not None:
+        total += request.get('max_tokens') or completion_allowance
+
+    inputs = request.get('input')
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    for item in inputs or []:
+        # langchain sends pre-tokenized inputs as lists of token ids
+        total += len(item) if isinstance(item, list) else count_tokens(str(item))
+    return total
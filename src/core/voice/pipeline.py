@@ -0,0 +1,96 @@
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+import re
+import threading
+
+# A sentence ends at terminal punctuation (optionally followed by quotes or
+# brackets) once the next whitespace arrives, so "3.5" never splits mid-number
+_SENTENCE_END = re.compile(r'[.!?…]+["\')\]]*\s+')
+
+class SentenceSplitter:
+    """Cut a token stream into sentences as soon as each one is complete"""
+
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, token: str) -> List[str]:
+        self._buffer += token
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._buffer):
+            # Very short sentences ("Okay!") are merged into the next one
+            if match.end() - start < self.min_chars:
+                continue
+            sentences.append(self._buffer[start:match.end()].strip())
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> List[str]:
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
+
+class SpeechPipeline:
+    """Overlap LLM generation with TTS synthesis, one sentence at a time.
+
+    Sentences are synthesized concurrently on the voice service's executor,
+    but `on_segment(index, text, result)` is always called in sentence order,
+    as soon as every earlier segment has been delivered. Delivery happens from
+    the synthesis futures' callbacks, so a finished segment goes out right away
+    rather than waiting for the next LLM token.
+    """
+
+    def __init__(self, voice_service, on_segment: Callable, min_chars: int = 20):
+        self.voice_service = voice_service
+        self.on_segment = on_segment
+        self.splitter = SentenceSplitter(min_chars=min_chars)
+        self._pending: List[Tuple[int, str, Future]] = []
+        self._next_index = 0
+        self._cond = threading.Condition()
+        self._delivering = False
+        self._error: Optional[BaseException] = None
+
+    def feed(self, token: str) -> None:
+        """LLM token callback; suitable as `on_token` for ChatService.process_chat"""
+        for sentence in self.splitter.feed(token):
+            self._submit(sentence)
+
+    def close(self) -> int:
+        """Synthesize whatever is left and wait for every segment; returns the segment count"""
+        for sentence in self.splitter.flush():
+            self._submit(sentence)
+        with self._cond:
+            self._cond.wait_for(lambda: not self._pending and not self._delivering)
+            if self._error is not None:
+                raise self._error
+        return self._next_index
+
+    def _submit(self, sentence: str) -> None:
+        future = self.voice_service.text_to_speech_async(sentence)
+        with self._cond:
+            self._pending.append((self._next_index, sentence, future))
+            self._next_index += 1
+        future.add_done_callback(lambda _: self._drain())
+
+    def _drain(self) -> None:
+        # Only one thread delivers at a time; it keeps going while the head of the queue is done
+        with self._cond:
+            if self._delivering:
+                return
+            self._delivering = True
+        while True:
+            with self._cond:
+                # Checked and released under one lock, so a segment finishing now is not missed
+                if not self._pending or not self._pending[0][2].done():
+                    self._delivering = False
+                    self._cond.notify_all()
+                    return
+                index, sentence, future = self._pending.pop(0)
+            try:
+                self.on_segment(index, sentence, future.result())
+            except Exception as e:
+                # Callbacks swallow exceptions, so hand it to close() and drop the rest
+                with self._cond:
+                    self._error = e
+                    self._pending.clear()
@@ -1,9 +1,15 @@
 from dataclasses import dataclass
-from typing import Union
+from typing import Callable, Iterable, Optional, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+import contextvars
 import logging
-from openai import AzureOpenAI
-import requests
 from src.config.settings import get_settings
+from src.core.clients.registry import get_clients
+from src.core.cache.audio import AudioCache
+from src.core.cache.singleflight import SingleFlight
+from src.core.audio import ffmpeg
+from src.core.audio.preprocess import AudioPreprocessor, is_empty_clip
+from src.core.metrics.registry import metrics, log_sampled
 
 @dataclass
 class AudioResult:
@@ -15,63 +21,183 @@ class VoiceService:
     def __init__(self):
         self.settings = get_settings()
         
-        # Initialize Whisper
-        self.whisper_client = AzureOpenAI(
-            api_key=self.settings.whisper_api_key,
-            api_version=self.settings.azure_api_version,
-            azure_endpoint=self.settings.whisper_endpoint
-        )
+        clients = get_clients()
+        self.clients = clients
+
+        # Pooled keep-alive client, so replies don't pay a TLS handshake each
+        self.elevenlabs_http = clients.http_client('elevenlabs')
         
         # ElevenLabs settings
         self.elevenlabs_api_key = self.settings.elevenlabs_api_key
         self.elevenlabs_voice_id = self.settings.elevenlabs_voice_id
+        self.elevenlabs_model_id = "eleven_monolingual_v1"
+        self.voice_settings = {
+            "stability": 0.5,
+            "similarity_boost": 0.5
+        }
+
+        # Content-addressed store so repeated replies never hit ElevenLabs twice
+        self.audio_cache = AudioCache(
+            self.settings.tts_cache_dir,
+            max_bytes=self.settings.tts_cache_max_bytes
+        ) if self.settings.tts_cache_dir else None
+        metrics.register_cache('tts', self.audio_cache)
+        # Concurrent requests for the same sentence share one ElevenLabs call
+        self.inflight = SingleFlight('tts') if self.settings.singleflight_enabled else None
+
+        # Used to synthesize several sentences of one reply concurrently
+        self.tts_executor = ThreadPoolExecutor(
+            max_workers=self.settings.tts_pipeline_workers,
+            thread_name_prefix="tts"
+        )
+
+        # Transcribes stable segments of voice notes that are still being recorded
+        self.stt_executor = ThreadPoolExecutor(
+            max_workers=self.settings.voice_stream_workers,
+            thread_name_prefix="stt"
+        )
+
+        # Trim silence and re-encode voice notes before upload, when ffmpeg is available
+        self.preprocessor = AudioPreprocessor(
+            threshold_db=self.settings.voice_vad_threshold_db,
+            padding_ms=self.settings.voice_vad_padding_ms
+        ) if self.settings.voice_preprocess_enabled and ffmpeg.ffmpeg_available() else None
 
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
+    @property
+    def whisper_client(self):
+        # Built on first transcription, so startup doesn't import the openai SDK
+        return self.clients.azure_openai(
+            self.settings.whisper_api_key,
+            self.settings.whisper_endpoint
+        )
+
     def text_to_speech(self, text: str) -> AudioResult:
         """Convert text to speech using ElevenLabs"""
         try:
-            url = f"https://api.elevenlabs.io/v1/text-to-speech/{self.elevenlabs_voice_id}"
-            
-            headers = {
-                "Accept": "audio/mpeg",
-                "Content-Type": "application/json",
-                "xi-api-key": self.elevenlabs_api_key
-            }
-            
-            data = {
-                "text": text,
-                "model_id": "eleven_monolingual_v1",
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.5
-                }
-            }
-
-            response = requests.post(url, json=data, headers=headers)
-            if response.status_code != 200:
-                return AudioResult(False, bytes(), f"ElevenLabs API error: {response.status_code}")
-            
-            return AudioResult(True, response.content)
+            key = AudioCache.make_key(
+                text, self.elevenlabs_voice_id, self.elevenlabs_model_id, self.voice_settings
+            )
+            if self.audio_cache is not None:
+                audio = self.audio_cache.get(key)
+                if audio is not None:
+                    return AudioResult(True, audio)
+
+            if self.inflight is None:
+                return self._synthesize(text, key)
+            return self.inflight.do(key, lambda: self._synthesize(text, key))
 
         except Exception as e:
             self.logger.error(f"Text-to-speech error: {str(e)}")
             return AudioResult(False, bytes(), str(e))
 
-    def speech_to_text(self, audio_data: bytes) -> AudioResult:
-        """Convert speech to text using Azure Whisper"""
-        try:
-            # Transcribe with Whisper
-            transcript = self.whisper_client.audio.transcriptions.create(
+    def _synthesize(self, text: str, key: str) -> AudioResult:
+        url = f"/v1/text-to-speech/{self.elevenlabs_voice_id}"
+        
+        headers = {
+            "Accept": "audio/mpeg",
+            "Content-Type": "application/json",
+            "xi-api-key": self.elevenlabs_api_key
+        }
+        
+        data = {
+            "text": text,
+            "model_id": self.elevenlabs_model_id,
+            "voice_settings": self.voice_settings
+        }
+
+        with metrics.span('elevenlabs'):
+            response = self.clients.scheduler.call(
+                'elevenlabs', self.elevenlabs_http.post, url, json=data, headers=headers, tokens=len(text)
+            )
+        if response.status_code != 200:
+            metrics.inc('stage_errors_total', stage='elevenlabs')
+            return AudioResult(False, bytes(), f"ElevenLabs API error: {response.status_code}")
+
+        if self.audio_cache is not None:
+            self.audio_cache.put(key, response.content)
+        return AudioResult(True, response.content)
+
+    def text_to_speech_async(self, text: str) -> Future:
+        """Schedule text_to_speech on the TTS executor"""
+        # Carry the request id over to the worker thread
+        return self.tts_executor.submit(contextvars.copy_context().run, self.text_to_speech, text)
+
+    def prerender(self, phrases: Iterable[str]) -> int:
+        """Synthesize canned phrases into the audio cache; returns how many were rendered"""
+        if self.audio_cache is None:
+            return 0
+        rendered = 0
+        for phrase in phrases:
+            key = AudioCache.make_key(
+                phrase, self.elevenlabs_voice_id, self.elevenlabs_model_id, self.voice_settings
+            )
+            if key in self.audio_cache:
+                continue
+            if self.text_to_speech(phrase).success:
+                rendered += 1
+        self.logger.info(f"Pre-rendered {rendered} canned phrases")
+        return rendered
+
+    def transcribe(self, audio_data: Union[bytes, memoryview], filename: str) -> str:
+        """One Whisper call; returns the text ('' when nothing was recognized) and raises on errors"""
+        # The multipart upload needs bytes; preprocessed audio already is
+        audio_data = audio_data if isinstance(audio_data, bytes) else bytes(audio_data)
+        with metrics.span('whisper'):
+            transcript = self.clients.scheduler.call(
+                'whisper',
+                self.whisper_client.audio.transcriptions.create,
                 model=self.settings.whisper_deployment_name,
-                file=('audio.wav', audio_data)
+                file=(filename, audio_data)
             )
+        return transcript.text if transcript and transcript.text else ""
 
-            if not transcript or not transcript.text:
+    def stream_transcriber(self, on_partial: Optional[Callable[[str], None]] = None):
+        """Incremental transcriber for a voice note uploaded in timeslices while recording"""
+        from src.core.voice.streaming import StreamingTranscriber
+        return StreamingTranscriber(
+            self,
+            self.stt_executor,
+            on_partial=on_partial,
+            threshold_db=self.settings.voice_vad_threshold_db,
+            padding_ms=self.settings.voice_vad_padding_ms,
+            pause_ms=self.settings.voice_stream_pause_ms,
+            min_segment_ms=self.settings.voice_stream_min_segment_ms,
+            max_bytes=self.settings.voice_stream_max_bytes,
+            partial_interval_ms=self.settings.voice_stream_speculative_interval_ms
+        )
+
+    def speech_to_text(self, audio_data: Union[bytes, memoryview]) -> AudioResult:
+        """Convert speech to text using Azure Whisper"""
+        try:
+            filename = 'audio.wav'
+            if is_empty_clip(audio_data):
+                return AudioResult(False, "", "No speech could be recognized")
+
+            if self.preprocessor is not None:
+                try:
+                    with metrics.span('audio_preprocess'):
+                        prepared = self.preprocessor.process(audio_data)
+                except ffmpeg.FFmpegError as e:
+                    # Whisper can't read what ffmpeg can't decode either; don't pay for the upload
+                    self.logger.warning(f"Audio preprocessing failed, not transcribing: {str(e)}")
+                    return AudioResult(False, "", "Audio could not be decoded")
+                report = prepared.report
+                log_sampled(self.logger, f"Audio preprocessed: {report}")
+                metrics.inc('audio_preprocess_bytes_saved_total', max(0, report.input_bytes - report.output_bytes))
+                metrics.inc('audio_preprocess_seconds_trimmed_total', max(0.0, report.input_seconds - report.output_seconds))
+                if not prepared.has_speech or report.output_seconds == 0:
+                    return AudioResult(False, "", "No speech could be recognized")
+                audio_data, filename = prepared.audio, prepared.filename
+
+            # Transcribe with Whisper
+            text = self.transcribe(audio_data, filename)
+            if not text:
                 return AudioResult(False, "", "No speech could be recognized")
 
-            return AudioResult(True, transcript.text)
+            return AudioResult(True, text)
 
         except Exception as e:
             self.logger.error(f"Speech-to-text error: {str(e)}")
@@ -0,0 +1,207 @@
+from concurrent.futures import Executor, Future
+from typing import Callable, List, Optional
+import logging
+import threading
+import time
+import numpy as np
+from src.core.audio import ffmpeg
+from src.core.audio.preprocess import last_pause, speech_bounds
+from src.core.metrics.registry import metrics
+from src.core.voice.service import AudioResult
+
+class StreamingTranscriber:
+    """Transcribe a voice note while it is still being recorded.
+
+    MediaRecorder timeslices are appended as they arrive. In the background
+    new bytes are fed to one long-lived decoder, and the decoded audio past
+    the last cut is searched for a clear pause; everything up to it is cut
+    off as a stable segment and sent to Whisper right away. When recording
+    stops only the audio after the last cut is left to transcribe, so each
+    stretch of audio is decoded and transcribed once. Without ffmpeg the
+    chunks are just buffered and the whole clip is transcribed at the end.
+    Uploads stop being accepted at `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        voice_service,
+        executor: Executor,
+        on_partial: Optional[Callable[[str], None]] = None,
+        sample_rate: int = 16000,
+        bitrate: str = "32k",
+        threshold_db: float = -40.0,
+        padding_ms: int = 200,
+        pause_ms: int = 500,
+        min_segment_ms: int = 3000,
+        max_bytes: int = ffmpeg.WHISPER_MAX_UPLOAD_BYTES,
+        partial_interval_ms: int = 0
+    ):
+        self.voice_service = voice_service
+        self.executor = executor
+        self.on_partial = on_partial
+        self.sample_rate = sample_rate
+        self.bitrate = bitrate
+        self.threshold_db = threshold_db
+        self.padding_ms = padding_ms
+        self.pause_ms = pause_ms
+        self.min_segment = sample_rate * min_segment_ms // 1000
+        self.max_bytes = max_bytes
+        self.partial_interval = partial_interval_ms / 1000
+        self.enabled = ffmpeg.ffmpeg_available()
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()  # guards the buffer and flags
+        self._work_lock = threading.Lock()  # serialises decoding and cutting
+        self._buffer = bytearray()
+        self._decoder: Optional[ffmpeg.PcmDecoder] = None
+        self._fed = 0  # bytes of the buffer given to the decoder
+        self._committed = 0  # samples already cut into segments
+        self._segments: List[Future] = []
+        self._scheduled = False
+        self._closed = False
+        self._full = False
+        self._last_partial = ""
+        self._last_partial_at = 0.0
+
+    @property
+    def full(self) -> bool:
+        """Whether a timeslice was dropped for going over `max_bytes`"""
+        return self._full
+
+    def append(self, chunk: bytes) -> bool:
+        """Add one timeslice; a background pass looks for a new stable segment.
+
+        Returns False, keeping nothing of the chunk, once the upload would
+        grow past `max_bytes`.
+        """
+        with self._lock:
+            if self._closed or self._full:
+                return False
+            if len(self._buffer) + len(chunk) > self.max_bytes:
+                self._full = True
+                self.logger.warning(f"Streamed voice note over {self.max_bytes} bytes, ignoring the rest")
+                return False
+            self._buffer.extend(chunk)
+            if not self.enabled or self._scheduled:
+                return True
+            self._scheduled = True
+        self.executor.submit(self._advance)
+        return True
+
+    def abort(self) -> None:
+        """Drop the upload, e.g. when the client disconnects mid-recording"""
+        with self._lock:
+            self._closed = True
+        with self._work_lock:
+            if self._decoder is not None:
+                self._decoder.kill()
+                self._decoder = None
+
+    def finish(self) -> AudioResult:
+        """Transcribe what is left and return the full transcript as an AudioResult"""
+        with self._lock:
+            self._closed = True
+            data = bytes(self._buffer)
+
+        with self._work_lock, metrics.span('stt_stream_finish'):
+            if not self.enabled:
+                return self.voice_service.speech_to_text(data)
+            try:
+                self._feed(data[self._fed:])
+                pcm = self._decoder.close(self._committed * 2)
+            except ffmpeg.FFmpegError as e:
+                self.logger.warning(f"Streamed voice note undecodable: {str(e)}")
+                return self.voice_service.speech_to_text(data)
+            finally:
+                if self._decoder is not None:
+                    self._decoder.kill()
+                    self._decoder = None
+
+            tail = self._encode_speech(np.frombuffer(pcm, dtype=np.int16))
+            try:
+                texts = [segment.result() for segment in self._segments]
+                if tail is not None:
+                    texts.append(self.voice_service.transcribe(tail, "segment.mp3"))
+            except Exception as e:
+                # A failed segment would leave a hole; retry the clip in one piece
+                self.logger.warning(f"Segment transcription failed, retrying whole clip: {str(e)}")
+                return self.voice_service.speech_to_text(data)
+
+        transcript = " ".join(t.strip() for t in texts if t and t.strip())
+        if not transcript:
+            return AudioResult(False, "", "No speech could be recognized")
+        return AudioResult(True, transcript)
+
+    def _advance(self) -> None:
+        with self._lock:
+            self._scheduled = False
+            if self._closed:
+                return
+
+        # Never queue behind finish() or another pass; the next chunk tries again
+        if not self._work_lock.acquire(blocking=False):
+            return
+        try:
+            with self._lock:
+                if self._closed:
+                    return
+                new = bytes(self._buffer[self._fed:])
+            self._cut_segment(new)
+        finally:
+            self._work_lock.release()
+
+    def _feed(self, new: bytes) -> None:
+        if self._decoder is None:
+            self._decoder = ffmpeg.PcmDecoder(self.sample_rate)
+        if new:
+            self._fed += len(new)
+            self._decoder.feed(new)
+
+    def _cut_segment(self, new: bytes) -> None:
+        try:
+            self._feed(new)
+        except ffmpeg.FFmpegError:
+            # finish() reports it and falls back to the whole clip
+            return
+        pending = np.frombuffer(self._decoder.pcm(self._committed * 2), dtype=np.int16)
+        cut = last_pause(
+            pending,
+            self.sample_rate,
+            threshold_db=self.threshold_db,
+            pause_ms=self.pause_ms,
+            min_offset=self.min_segment
+        )
+        if cut is None:
+            return
+        audio = self._encode_speech(pending[:cut])
+        self._committed += cut
+        self._decoder.release(self._committed * 2)
+        if audio is None:
+            return
+        metrics.inc('stt_stream_segments_total')
+        segment = self.executor.submit(self.voice_service.transcribe, audio, "segment.mp3")
+        self._segments.append(segment)
+        if self.on_partial is not None:
+            segment.add_done_callback(lambda _: self._report_partial())
+
+    def _report_partial(self) -> None:
+        texts = []
+        for segment in list(self._segments):
+            if not segment.done() or segment.exception() is not None:
+                break
+            texts.append(segment.result().strip())
+        text = " ".join(t for t in texts if t)
+        with self._lock:
+            # Debounced: each report may start a paid search
+            now = time.monotonic()
+            if not text or self._closed or text == self._last_partial or now - self._last_partial_at < self.partial_interval:
+                return
+            self._last_partial, self._last_partial_at = text, now
+        self.on_partial(text)
+
+    def _encode_speech(self, samples: np.ndarray) -> Optional[bytes]:
+        bounds = speech_bounds(samples, self.sample_rate, threshold_db=self.threshold_db, padding_ms=self.padding_ms)
+        if bounds is None:
+            return None
+        start, end = bounds
+        return ffmpeg.encode_pcm(samples[start:end].tobytes(), self.sample_rate, self.bitrate)
@@ -0,0 +1,47 @@
+from collections import defaultdict
+from typing import Dict, List
+import queue
+import threading
+import socketio
+
+class LocalBroker:
+    """In-process pub/sub channel registry.
+
+    Stands in for Redis when several Socket.IO servers share one process,
+    e.g. to exercise cross-worker emits locally without a broker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[queue.Queue]] = defaultdict(list)
+
+    def subscribe(self, channel: str) -> queue.Queue:
+        inbox = queue.Queue()
+        with self._lock:
+            self._subscribers[channel].append(inbox)
+        return inbox
+
+    def publish(self, channel: str, message: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers[channel])
+        for inbox in subscribers:
+            inbox.put(message)
+
+default_broker = LocalBroker()
+
+class LocalPubSubManager(socketio.PubSubManager):
+    """Socket.IO client manager on top of a `LocalBroker` (`local://<channel>` message queue)"""
+
+    name = 'local'
+
+    def __init__(self, channel='socketio', write_only=False, logger=None, broker: LocalBroker = None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.broker = broker or default_broker
+        self._inbox = None if write_only else self.broker.subscribe(channel)
+
+    def _publish(self, data):
+        self.broker.publish(self.channel, data)
+
+    def _listen(self):
+        while True:
+            yield self._inbox.get()
@@ -0,0 +1,68 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Tuple
+import logging
+import threading
+
+class ConnectionDispatcher:
+    """Run socket handlers on a bounded worker pool.
+
+    Each connection gets its own FIFO queue so its messages are processed
+    in order, one at a time, while different connections run in parallel.
+    `submit` refuses work when the connection's queue or the global backlog
+    is full, so callers can shed load instead of piling up latency.
+    """
+
+    def __init__(self, max_workers: int = 16, queue_depth: int = 4, max_pending: int = 256):
+        self.queue_depth = queue_depth
+        self.max_pending = max_pending
+        self.logger = logging.getLogger(__name__)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="socket-worker")
+        self._lock = threading.Lock()
+        self._queues: Dict[str, Deque[Tuple[Callable, tuple]]] = {}
+        self._running = set()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def submit(self, sid: str, fn: Callable, *args) -> bool:
+        """Queue `fn(*args)` for a connection; returns False when the work was rejected"""
+        with self._lock:
+            queue = self._queues.setdefault(sid, deque())
+            if len(queue) >= self.queue_depth or self._pending >= self.max_pending:
+                return False
+            queue.append((fn, args))
+            self._pending += 1
+            if sid in self._running:
+                return True
+            self._running.add(sid)
+        self._executor.submit(self._drain, sid)
+        return True
+
+    def discard(self, sid: str) -> None:
+        """Drop queued (not yet started) work for a closed connection"""
+        with self._lock:
+            queue = self._queues.pop(sid, None)
+            if queue:
+                self._pending -= len(queue)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def _drain(self, sid: str) -> None:
+        while True:
+            with self._lock:
+                queue = self._queues.get(sid)
+                if not queue:
+                    self._running.discard(sid)
+                    self._queues.pop(sid, None)
+                    return
+                fn, args = queue.popleft()
+                self._pending -= 1
+            try:
+                fn(*args)
+            except Exception as e:
+                self.logger.error(f"Unhandled error in socket worker: {str(e)}", exc_info=True)
@@ -0,0 +1,118 @@
+from typing import Callable, Optional
+import ipaddress
+import logging
+import multiprocessing
+import signal
+import socket
+import time
+
+GREEN_MODES = ('gevent', 'eventlet')
+
+def monkey_patch(async_mode: str) -> None:
+    """Make the standard library cooperative for gevent/eventlet; call before anything else runs"""
+    if async_mode == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+    elif async_mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+
+def _is_loopback(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == 'localhost'
+
+def check_server_mode(async_mode: str, host: str, workers: int, debug: bool) -> None:
+    """Werkzeug (the threading mode) is a development server: keep it to local, single-process runs"""
+    if async_mode in GREEN_MODES or debug:
+        return
+    if workers > 1 or not _is_loopback(host):
+        raise SystemExit(
+            "The threading async mode runs on Werkzeug's development server. Set "
+            "SOCKETIO_ASYNC_MODE=gevent (or eventlet) to serve on a public interface or with "
+            "SERVER_WORKERS > 1, or SERVER_DEBUG=true for local testing."
+        )
+
+def check_search_mode(search_mode: str, index_mode: str, index_path: Optional[str], workers: int) -> None:
+    """Each worker builds its own BM25 index and only re-syncs it when it adopts a new vector snapshot"""
+    if workers <= 1 or search_mode not in ('lexical', 'hybrid'):
+        return
+    if search_mode == 'lexical' or index_mode != 'local' or not index_path:
+        raise SystemExit(
+            "Keyword search with SERVER_WORKERS > 1 needs SEARCH_MODE=hybrid with SEARCH_INDEX_MODE=local "
+            "and a shared SEARCH_INDEX_PATH, so every worker picks up refreshes; otherwise run one worker."
+        )
+
+def serve(create_app: Callable, host: str, port: int, workers: int = 1, debug: bool = False) -> None:
+    """Run the Socket.IO app in one process, or pre-fork `workers` processes on one socket.
+
+    Workers share the listening socket, so the kernel spreads connections
+    across them and each websocket stays pinned to the process that
+    accepted it. Anything one worker emits to a client held by another goes
+    through the Socket.IO message queue, which must therefore be a
+    cross-process backend (e.g. Redis) when `workers > 1`. Each worker runs
+    the gevent or eventlet WSGI server of the configured async mode.
+    """
+    logger = logging.getLogger(__name__)
+    if workers <= 1:
+        web = create_app()
+        # Only reached in debug or on loopback when the mode is threading (check_server_mode)
+        web.socketio.run(web.app, host=host, port=port, debug=debug, use_reloader=debug,
+                         allow_unsafe_werkzeug=web.socketio.async_mode == 'threading')
+        return
+
+    sock = socket.create_server((host, port), backlog=2048)
+    sock.set_inheritable(True)
+    context = multiprocessing.get_context('fork')
+    processes = {}
+
+    def spawn(slot: int) -> None:
+        process = context.Process(
+            target=_worker, args=(create_app, host, port, sock.fileno(), debug),
+            name=f"socket-worker-{slot}", daemon=True
+        )
+        process.start()
+        processes[slot] = process
+
+    def stop(*_):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    logger.info(f"Serving on {host}:{port} with {workers} worker processes")
+    for slot in range(workers):
+        spawn(slot)
+    try:
+        while True:
+            time.sleep(1)
+            for slot, process in list(processes.items()):
+                if not process.is_alive():
+                    logger.warning(f"{process.name} exited with {process.exitcode}, restarting")
+                    spawn(slot)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.join(timeout=10)
+        sock.close()
+
+def _worker(create_app: Callable, host: str, port: int, fd: int, debug: bool) -> None:
+    # Default SIGTERM handling again, so the parent can stop us
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    web = create_app()
+    async_mode = web.socketio.async_mode
+    if async_mode == 'gevent':
+        from gevent import pywsgi, socket as gsocket
+        from geventwebsocket.handler import WebSocketHandler
+        pywsgi.WSGIServer(gsocket.socket(fileno=fd), web.app, handler_class=WebSocketHandler,
+                          log='default' if debug else None).serve_forever()
+    elif async_mode == 'eventlet':
+        import eventlet.wsgi
+        from eventlet.green import socket as gsocket
+        eventlet.wsgi.server(gsocket.socket(fileno=fd), web.app, log_output=debug)
+    else:
+        # Development only: check_server_mode refuses this outside debug
+        from werkzeug.serving import make_server
+        make_server(host, port, web.app, threaded=True, fd=fd).serve_forever()
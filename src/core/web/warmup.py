@@ -0,0 +1,56 @@
+from typing import Callable, Dict, List, Tuple
+import logging
+import threading
+import time
+
+class Warmup:
+    """Ordered start-up steps run off the request path.
+
+    The app accepts connections immediately; readiness reports whether the
+    steps (importing heavy SDKs, opening upstream connections, loading
+    indexes and caches) have finished. A failing step is logged and
+    recorded but does not block the rest, since every step is also done
+    lazily on first use.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.started_at = time.monotonic()
+        self._steps: List[Tuple[str, Callable[[], object]]] = []
+        self._durations: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self._current = None
+        self._done = threading.Event()
+
+    def add(self, name: str, fn: Callable[[], object]) -> None:
+        self._steps.append((name, fn))
+
+    def run(self) -> None:
+        for name, fn in self._steps:
+            self._current = name
+            started = time.perf_counter()
+            try:
+                fn()
+            except Exception as e:
+                self.logger.warning(f"Warm-up step {name} failed: {str(e)}")
+                self._errors[name] = str(e)
+            self._durations[name] = round(time.perf_counter() - started, 3)
+        self._current = None
+        self._done.set()
+        self.logger.info(f"Warm-up finished in {time.monotonic() - self.started_at:.2f}s")
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._done.wait(timeout)
+
+    def status(self) -> dict:
+        return {
+            'ready': self.ready,
+            'current_step': self._current,
+            'steps': self._durations,
+            'errors': self._errors,
+            'uptime_seconds': round(time.monotonic() - self.started_at, 3)
+        }
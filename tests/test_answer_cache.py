@@ -0,0 +1,45 @@
+from src.core.cache.answers import AnswerCache
+
+QUESTION = [1.0, 0.0, 0.0]
+PARAPHRASE = [0.99, 0.05, 0.0]
+OTHER_QUESTION = [0.0, 1.0, 0.0]
+
+def test_similar_question_about_same_video_hits():
+    cache = AnswerCache(threshold=0.95)
+    cache.put(QUESTION, "video", "script", "answer")
+    assert cache.get(PARAPHRASE, "video", "script") == "answer"
+    assert cache.get(PARAPHRASE, "other video", "script") is None
+    assert cache.get(OTHER_QUESTION, "video", "script") is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+
+def test_changed_script_invalidates():
+    cache = AnswerCache()
+    cache.put(QUESTION, "video", "old script", "answer")
+    assert cache.get(QUESTION, "video", "new script") is None
+    # The stale entry is gone for good
+    assert cache.get(QUESTION, "video", "old script") is None
+
+def test_different_chunk_selections_do_not_thrash():
+    cache = AnswerCache()
+    chunks = {0: "intro", 1: "bedtime routine", 2: "night waking"}
+    cache.put(QUESTION, "video", {0: chunks[0], 1: chunks[1]}, "routine answer")
+    cache.put(OTHER_QUESTION, "video", {2: chunks[2]}, "waking answer")
+    assert cache.get(QUESTION, "video", {1: chunks[1], 2: chunks[2]}) == "routine answer"
+    assert cache.get(OTHER_QUESTION, "video", {0: chunks[0], 2: chunks[2]}) == "waking answer"
+
+def test_re_ingested_chunk_invalidates():
+    cache = AnswerCache()
+    cache.put(QUESTION, "video", {0: "intro", 1: "bedtime routine"}, "answer")
+    assert cache.get(QUESTION, "video", {1: "a new bedtime routine"}) is None
+
+def test_ttl_and_size_limit(monkeypatch):
+    cache = AnswerCache(ttl_seconds=10, max_entries=1)
+    cache.put(QUESTION, "a", "script", "first")
+    cache.put(QUESTION, "b", "script", "second")
+    assert cache.get(QUESTION, "a", "script") is None
+
+    now = [0.0]
+    monkeypatch.setattr("src.core.cache.answers.time.monotonic", lambda: now[0])
+    cache.put(QUESTION, "c", "script", "third")
+    now[0] = 11.0
+    assert cache.get(QUESTION, "c", "script") is None
@@ -0,0 +1,64 @@
+import os
+from src.core.cache.audio import AudioCache
+
+def directory_size(path):
+    return sum(p.stat().st_size for p in path.glob('*.mp3'))
+
+def test_cap_holds_across_instances_sharing_a_directory(tmp_path):
+    # Stands in for several workers pointing TTS_CACHE_DIR at one directory
+    workers = [AudioCache(str(tmp_path), max_bytes=1000) for _ in range(3)]
+    for n in range(30):
+        workers[n % 3].put(f"key{n}", b"x" * 100)
+        assert directory_size(tmp_path) <= 1000
+    assert directory_size(tmp_path) == 1000
+    assert workers[0].get("key29") is not None
+
+def test_total_is_recovered_from_the_directory(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=1000)
+    for n in range(5):
+        cache.put(f"key{n}", b"x" * 100)
+    # A lost or corrupt total is rebuilt from a scan
+    (tmp_path / '.size').write_text('garbage')
+    for n in range(5, 12):
+        cache.put(f"key{n}", b"x" * 100)
+    assert directory_size(tmp_path) == 1000
+
+def test_overwriting_a_key_is_not_counted_twice(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=250)
+    cache.put("a", b"x" * 100)
+    cache.put("b", b"x" * 100)
+    cache.put("a", b"y" * 100)
+    assert cache.get("b") is not None
+    assert int((tmp_path / '.size').read_text()) == 200
+
+def test_hit_and_miss_are_counted(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    assert cache.get("missing") is None
+    cache.put("hello", b"audio")
+    assert cache.get("hello") == b"audio"
+    assert "hello" in cache and "missing" not in cache
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+def test_entries_survive_a_restart(tmp_path):
+    AudioCache(str(tmp_path)).put("hello", b"audio")
+    assert AudioCache(str(tmp_path)).get("hello") == b"audio"
+
+def test_key_covers_everything_that_changes_the_audio():
+    settings = {'stability': 0.5, 'similarity_boost': 0.75}
+    key = AudioCache.make_key("Hi there", "voice", "model", settings)
+    assert key == AudioCache.make_key("Hi there", "voice", "model", dict(reversed(settings.items())))
+    assert key != AudioCache.make_key("Hi there!", "voice", "model", settings)
+    assert key != AudioCache.make_key("Hi there", "other-voice", "model", settings)
+    assert key != AudioCache.make_key("Hi there", "voice", "other-model", settings)
+    assert key != AudioCache.make_key("Hi there", "voice", "model", {**settings, 'stability': 0.6})
+
+def test_least_recently_used_is_evicted_first(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=300)
+    for n, key in enumerate(("a", "b", "c")):
+        cache.put(key, b"x" * 100)
+        # mtime is the recency marker; spread the writes out
+        os.utime(tmp_path / f"{key}.mp3", (1000 + n, 1000 + n))
+    cache.get("a")
+    cache.put("d", b"x" * 100)
+    assert "a" in cache and "c" in cache and "d" in cache
+    assert "b" not in cache
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from src.core.ingest.batching import AsyncBatcher
+
+class Upstream:
+    """Doubles its inputs; any batch containing a poisoned item fails"""
+
+    def __init__(self, poisoned=()):
+        self.poisoned = set(poisoned)
+        self.batches = []
+
+    async def __call__(self, items):
+        self.batches.append(list(items))
+        if self.poisoned.intersection(items):
+            raise ValueError(f"bad input in {items}")
+        return [item * 2 for item in items]
+
+async def submit_all(batcher, items):
+    results = await asyncio.gather(*(batcher.submit(item) for item in items), return_exceptions=True)
+    await batcher.close()
+    return results
+
+def test_items_are_sent_in_batches():
+    upstream = Upstream()
+    batcher = AsyncBatcher(upstream, max_items=4, flush_interval=10)
+    assert asyncio.run(submit_all(batcher, range(8))) == [n * 2 for n in range(8)]
+    assert upstream.batches == [[0, 1, 2, 3], [4, 5, 6, 7]]
+
+def test_weight_limit_starts_a_new_batch():
+    upstream = Upstream()
+    batcher = AsyncBatcher(upstream, max_items=10, flush_interval=10, max_weight=5, weigh=lambda item: item)
+    asyncio.run(submit_all(batcher, [2, 2, 2, 3]))
+    assert upstream.batches == [[2, 2], [2, 3]]
+
+def test_partial_batch_is_sent_after_the_interval():
+    upstream = Upstream()
+    batcher = AsyncBatcher(upstream, max_items=10, flush_interval=0.01)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(batcher.submit(1), batcher.submit(2)), 1)
+
+    assert asyncio.run(main()) == [2, 4]
+    assert upstream.batches == [[1, 2]]
+
+def test_failed_batch_falls_back_to_one_item_at_a_time():
+    upstream = Upstream(poisoned={3})
+    batcher = AsyncBatcher(upstream, max_items=4, flush_interval=10)
+    results = asyncio.run(submit_all(batcher, [1, 2, 3, 4]))
+    assert results[:2] == [2, 4] and results[3] == 8
+    assert isinstance(results[2], ValueError)
+    assert upstream.batches == [[1, 2, 3, 4], [1], [2], [3], [4]]
+
+def test_single_item_failure_is_not_retried():
+    upstream = Upstream(poisoned={1})
+    batcher = AsyncBatcher(upstream, max_items=1, flush_interval=10)
+
+    async def main():
+        with pytest.raises(ValueError):
+            await batcher.submit(1)
+
+    asyncio.run(main())
+    assert upstream.batches == [[1]]
@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+import logging
+import threading
+import pytest
+from src.config import settings as settings_module
+from src.core.cache.singleflight import SingleFlight
+from src.core.chat.service import ChatService, NO_MATCH_RESPONSE
+
+TOKENS = ["I ", "literally ", "made ", "a video ", "about this!"]
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    # log_sampled reads the sample rate from the settings
+    monkeypatch.setattr(settings_module, 'get_settings', lambda: SimpleNamespace(query_log_sample_rate=0.0))
+
+class FakeModel:
+    """Streams TOKENS; with `gate` set, waits before each token after the first"""
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.streams = 0
+        self.invokes = 0
+        self.first_token = threading.Event()
+
+    def stream(self, messages):
+        self.streams += 1
+        for n, token in enumerate(TOKENS):
+            if n and self.gate is not None:
+                self.gate.wait(5)
+            yield SimpleNamespace(content=token)
+            self.first_token.set()
+
+    def invoke(self, messages):
+        self.invokes += 1
+        self.first_token.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        return SimpleNamespace(content="".join(TOKENS))
+
+class FakeSearch:
+    def __init__(self, results):
+        self.results = results
+
+    def search(self, query):
+        return self.results
+
+def chat_service(model, results=None, coalesce=False):
+    service = ChatService.__new__(ChatService)
+    service.settings = SimpleNamespace()
+    service.logger = logging.getLogger('test.chat')
+    service.chat_model = model
+    service.search = FakeSearch([{'content': 'script', 'url': 'https://video'}] if results is None else results)
+    service.answer_cache = None
+    service.inflight = SingleFlight('chat') if coalesce else None
+    return service
+
+def test_tokens_are_emitted_as_they_stream():
+    service = chat_service(FakeModel())
+    received = []
+    response = service.process_chat("tantrums?", on_token=received.append)
+    assert received == TOKENS
+    assert response.response == "".join(TOKENS)
+    assert response.sources == ['https://video']
+
+def test_canned_answers_reach_streaming_callers_whole():
+    received = []
+    response = chat_service(FakeModel(), results=[]).process_chat("weather?", on_token=received.append)
+    assert received == [NO_MATCH_RESPONSE] and response.response == NO_MATCH_RESPONSE
+
+def run_callers(service, *callbacks):
+    responses = [None] * len(callbacks)
+
+    def ask(n, on_token):
+        responses[n] = service.process_chat("How do I stop tantrums?", on_token=on_token)
+
+    threads = [threading.Thread(target=ask, args=(n, cb)) for n, cb in enumerate(callbacks)]
+    threads[0].start()
+    service.chat_model.first_token.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    return threads, responses
+
+def wait_for_followers(service, count):
+    while not service.inflight._calls or next(iter(service.inflight._calls.values())).waiters < count:
+        threading.Event().wait(0.005)
+
+def test_late_joiners_get_replayed_and_live_tokens():
+    gate = threading.Event()
+    service = chat_service(FakeModel(gate), coalesce=True)
+    leader, follower = [], []
+    threads, responses = run_callers(service, leader.append, follower.append)
+    wait_for_followers(service, 1)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert service.chat_model.streams == 1
+    assert leader == TOKENS and follower == TOKENS
+    assert responses[0] is responses[1]
+
+def test_streaming_follower_of_a_non_streaming_leader_gets_the_text():
+    gate = threading.Event()
+    service = chat_service(FakeModel(gate), coalesce=True)
+    follower = []
+    threads, responses = run_callers(service, None, follower.append)
+    wait_for_followers(service, 1)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert service.chat_model.invokes == 1 and service.chat_model.streams == 0
+    assert follower == ["".join(TOKENS)]
+
+def test_a_failing_subscriber_does_not_break_the_others():
+    gate = threading.Event()
+    service = chat_service(FakeModel(gate), coalesce=True)
+    healthy = []
+
+    def broken(token):
+        raise ConnectionError("socket closed")
+
+    threads, responses = run_callers(service, broken, healthy.append)
+    wait_for_followers(service, 1)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+    assert healthy == TOKENS
+    assert responses[0].error is None and responses[0] is responses[1]
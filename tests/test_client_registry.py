@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+import httpx
+from src.core.clients.registry import ELEVENLABS_BASE_URL, ClientRegistry
+from tests.test_scheduler import settings as scheduler_settings
+
+def registry_settings(**overrides):
+    values = vars(scheduler_settings())
+    values.update(
+        http_max_connections=10, http_max_keepalive=5, http2_enabled=False, http_connect_timeout=2.0,
+        azure_read_timeout=45.0, elevenlabs_read_timeout=15.0, azure_api_version='2024-02-01',
+        gpt4_endpoint='https://gpt.example', whisper_endpoint='https://whisper.example',
+        ada_endpoint='https://gpt.example', supabase_url='https://db.example', supabase_key='key'
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+class FakeSupabase:
+    def __init__(self, error=None):
+        self.error = error
+        self.queries = []
+
+    def table(self, name):
+        self.queries.append(name)
+        return self
+
+    def select(self, columns):
+        return self
+
+    def limit(self, count):
+        return self
+
+    def execute(self):
+        if self.error:
+            raise self.error
+        return SimpleNamespace(data=[])
+
+def recording_client(requests, fail=False):
+    def handle(request):
+        requests.append((request.method, str(request.url)))
+        if fail:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(404)
+    return httpx.Client(transport=httpx.MockTransport(handle))
+
+def test_each_upstream_gets_its_own_timeouts():
+    registry = ClientRegistry(registry_settings())
+    azure, elevenlabs = registry.http_client('azure'), registry.http_client('elevenlabs')
+    assert (azure.timeout.read, azure.timeout.connect) == (45.0, 2.0)
+    assert (elevenlabs.timeout.read, elevenlabs.timeout.connect) == (15.0, 2.0)
+    assert str(elevenlabs.base_url).rstrip('/') == ELEVENLABS_BASE_URL
+    # One pool per upstream, shared by every caller
+    assert registry.http_client('azure') is azure
+    registry.close()
+
+def test_azure_clients_share_the_pool_and_leave_retries_to_the_scheduler():
+    registry = ClientRegistry(registry_settings())
+    client = registry.azure_openai('key', 'https://gpt.example')
+    assert registry.azure_openai('key', 'https://gpt.example') is client
+    assert registry.azure_openai('key', 'https://whisper.example') is not client
+    assert client._client is registry.http_client('azure')
+    assert client.max_retries == 0
+    registry.close()
+
+def test_injected_clients_are_returned_by_the_getters():
+    registry = ClientRegistry(registry_settings())
+    supabase, http, azure = FakeSupabase(), httpx.Client(), object()
+    registry.inject(supabase=supabase, http={'elevenlabs': http}, azure={('key', 'https://gpt.example'): azure})
+    assert registry.supabase() is supabase
+    assert registry.http_client('elevenlabs') is http
+    assert registry.azure_openai('key', 'https://gpt.example') is azure
+
+def test_warm_opens_each_upstream_once():
+    registry = ClientRegistry(registry_settings())
+    requests, supabase = [], FakeSupabase()
+    registry.inject(supabase=supabase, http={
+        'azure': recording_client(requests), 'elevenlabs': recording_client(requests)
+    })
+    registry.warm()
+    assert sorted(requests) == [
+        ('HEAD', 'https://api.elevenlabs.io'), ('HEAD', 'https://gpt.example'), ('HEAD', 'https://whisper.example')
+    ]
+    assert supabase.queries == ['video_content']
+
+def test_warm_failures_are_logged_not_raised(caplog):
+    registry = ClientRegistry(registry_settings())
+    requests = []
+    registry.inject(supabase=FakeSupabase(error=RuntimeError("down")), http={
+        'azure': recording_client(requests, fail=True), 'elevenlabs': recording_client(requests)
+    })
+    registry.warm()
+    assert len(requests) == 3
+    assert 'Warm-up failed for https://gpt.example' in caplog.text
+    assert 'Warm-up failed for Supabase' in caplog.text
@@ -0,0 +1,123 @@
+import threading
+import time
+from src.core.web.dispatcher import ConnectionDispatcher
+
+class FakeEmit:
+    """Records (sid, event, payload) like socketio.emit would send them"""
+
+    def __init__(self):
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def __call__(self, sid, event, payload):
+        with self.lock:
+            self.sent.append((sid, event, payload))
+
+    def events(self, sid):
+        with self.lock:
+            return [payload for to, _, payload in self.sent if to == sid]
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+def submit_or_busy(dispatcher, emit, sid, fn, *args):
+    # Mirrors ChatApp._submit_turn
+    if not dispatcher.submit(sid, fn, *args):
+        emit(sid, 'busy', None)
+
+def test_messages_of_one_connection_run_in_order():
+    dispatcher, emit = ConnectionDispatcher(max_workers=4, queue_depth=50), FakeEmit()
+
+    def turn(sid, n):
+        time.sleep(0.001 * (n % 3))
+        emit(sid, 'response', n)
+
+    for n in range(20):
+        for sid in ('a', 'b'):
+            assert dispatcher.submit(sid, turn, sid, n)
+    assert wait_for(lambda: len(emit.sent) == 40)
+    assert emit.events('a') == list(range(20))
+    assert emit.events('b') == list(range(20))
+    assert dispatcher.pending == 0
+    dispatcher.shutdown()
+
+def test_connections_run_in_parallel():
+    dispatcher, emit = ConnectionDispatcher(max_workers=2), FakeEmit()
+    release = threading.Event()
+    dispatcher.submit('slow', lambda: release.wait(2))
+    dispatcher.submit('fast', emit, 'fast', 'response', 'done')
+    assert wait_for(lambda: emit.events('fast') == ['done'])
+    release.set()
+    dispatcher.shutdown()
+
+def test_full_connection_queue_is_busy():
+    dispatcher, emit = ConnectionDispatcher(max_workers=1, queue_depth=2), FakeEmit()
+    started, release = threading.Event(), threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(2)
+
+    dispatcher.submit('a', blocking)
+    assert started.wait(2)
+    for n in range(4):
+        submit_or_busy(dispatcher, emit, 'a', emit, 'a', 'response', n)
+    # Another connection still has room
+    submit_or_busy(dispatcher, emit, 'b', emit, 'b', 'response', 'ok')
+    assert [event for _, event, _ in emit.sent].count('busy') == 2
+    release.set()
+    assert wait_for(lambda: emit.events('a')[-2:] == [0, 1])
+    assert wait_for(lambda: emit.events('b') == ['ok'])
+    dispatcher.shutdown()
+
+def test_global_backlog_limit_rejects_new_work():
+    dispatcher, emit = ConnectionDispatcher(max_workers=1, queue_depth=4, max_pending=3), FakeEmit()
+    release = threading.Event()
+    dispatcher.submit('a', release.wait, 2)
+    assert wait_for(lambda: dispatcher.pending == 0)
+    for sid in ('b', 'c', 'd', 'e'):
+        submit_or_busy(dispatcher, emit, sid, emit, sid, 'response', 'ok')
+    assert dispatcher.pending == 3
+    assert emit.sent == [('e', 'busy', None)]
+    release.set()
+    assert wait_for(lambda: len(emit.sent) == 4)
+    dispatcher.shutdown()
+
+def test_disconnect_discards_queued_work():
+    dispatcher, emit = ConnectionDispatcher(max_workers=1), FakeEmit()
+    started, release = threading.Event(), threading.Event()
+
+    def current_turn():
+        started.set()
+        release.wait(2)
+        emit('a', 'response', 'current')
+
+    dispatcher.submit('a', current_turn)
+    assert started.wait(2)
+    dispatcher.submit('a', emit, 'a', 'response', 'queued-1')
+    dispatcher.submit('a', emit, 'a', 'response', 'queued-2')
+    dispatcher.discard('a')
+    assert dispatcher.pending == 0
+    release.set()
+    # The running turn finishes; queued ones never start
+    assert wait_for(lambda: emit.events('a') == ['current'])
+    time.sleep(0.05)
+    assert emit.events('a') == ['current']
+    # The sid can be reused by a new connection
+    assert dispatcher.submit('a', emit, 'a', 'response', 'new')
+    assert wait_for(lambda: emit.events('a') == ['current', 'new'])
+    dispatcher.shutdown()
+
+def test_handler_errors_do_not_stop_the_queue():
+    dispatcher, emit = ConnectionDispatcher(max_workers=1), FakeEmit()
+
+    def broken():
+        raise RuntimeError("boom")
+
+    dispatcher.submit('a', broken)
+    dispatcher.submit('a', emit, 'a', 'response', 'after')
+    assert wait_for(lambda: emit.events('a') == ['after'])
+    dispatcher.shutdown()
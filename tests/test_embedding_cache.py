@@ -0,0 +1,38 @@
+from src.core.cache.embedding import EmbeddingCache, normalize_query
+
+def test_trivially_different_phrasings_share_an_entry():
+    assert normalize_query("  How do I get my toddler   to SLEEP?? ") == "how do i get my toddler to sleep"
+    cache = EmbeddingCache(max_entries=10)
+    cache.put("How to sleep?", "ada", [1.0, 2.0])
+    assert cache.get("how to  sleep", "ada") == [1.0, 2.0]
+    # Another deployment never sees this vector
+    assert cache.get("how to sleep", "ada-3") is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+def test_least_recently_used_entry_is_evicted():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put("a", "ada", [1.0])
+    cache.put("b", "ada", [2.0])
+    cache.get("a", "ada")
+    cache.put("c", "ada", [3.0])
+    assert cache.get("b", "ada") is None
+    assert cache.get("a", "ada") == [1.0]
+    assert cache.get("c", "ada") == [3.0]
+
+def test_sqlite_backing_survives_a_restart(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    EmbeddingCache(db_path=path).put("tantrums", "ada", [0.5, -0.25])
+    restarted = EmbeddingCache(db_path=path)
+    assert restarted.get("Tantrums?", "ada") == [0.5, -0.25]
+
+def test_get_or_compute_calls_upstream_once():
+    cache = EmbeddingCache()
+    calls = []
+
+    def embed(query):
+        calls.append(query)
+        return [float(len(query))]
+
+    assert cache.get_or_compute("potty training", "ada", embed) == [14.0]
+    assert cache.get_or_compute("Potty training!", "ada", embed) == [14.0]
+    assert calls == ["potty training"]
@@ -0,0 +1,41 @@
+import asyncio
+from src.core.audio import ffmpeg
+
+ID3_ONLY = b"ID3\x04\x00\x00\x00\x00\x00\x23" + b"\x00" * 0x23
+FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+def test_id3_header_alone_has_no_audio():
+    assert not ffmpeg.has_audio_frames(b"")
+    assert not ffmpeg.has_audio_frames(ID3_ONLY)
+    assert ffmpeg.has_audio_frames(ID3_ONLY + FRAME)
+    assert ffmpeg.has_audio_frames(FRAME)
+
+def stub_runner(monkeypatch, total_seconds, duration):
+    """ffmpeg that returns a full-size first pass, then per-window output or a bare ID3 header"""
+    calls = []
+
+    async def run(args, stdin=None):
+        calls.append(args)
+        if "-ss" not in args:
+            return ID3_ONLY + FRAME * 1000
+        start = float(args[args.index("-ss") + 1])
+        return ID3_ONLY + FRAME if start < total_seconds else ID3_ONLY
+
+    async def probe(source):
+        return duration
+
+    monkeypatch.setattr(ffmpeg, "_run", run)
+    monkeypatch.setattr(ffmpeg, "probe_duration", probe)
+    return calls
+
+def test_segments_stop_at_probed_duration(monkeypatch):
+    calls = stub_runner(monkeypatch, total_seconds=250, duration=250.0)
+    segments = asyncio.run(ffmpeg.extract_audio("in.mp4", bitrate="32k", max_segment_bytes=400_000))
+    # 400 kB at 32 kbit/s with 10% headroom is 90 s per window
+    assert len(segments) == 3
+    assert len(calls) == 4
+
+def test_segments_stop_on_header_only_output_without_duration(monkeypatch):
+    stub_runner(monkeypatch, total_seconds=250, duration=None)
+    segments = asyncio.run(ffmpeg.extract_audio("in.mp4", bitrate="32k", max_segment_bytes=400_000))
+    assert len(segments) == 3
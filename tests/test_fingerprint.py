@@ -0,0 +1,85 @@
+import sqlite3
+import numpy as np
+import pytest
+from src.core.audio.fingerprint import FINGERPRINT_SAMPLE_RATE, compare, fingerprint
+from src.core.ingest.manifest import IngestManifest
+
+SR = FINGERPRINT_SAMPLE_RATE
+
+def speech_like(seconds, seed):
+    """Gliding tone with a syllable-rate envelope and some noise"""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SR)
+    envelope = np.repeat(rng.uniform(0, 1, size=n // 800 + 1), 800)[:n]
+    t = np.arange(n) / SR
+    freq = 300 + 1500 * np.abs(np.sin(t * rng.uniform(0.5, 2)))
+    tone = np.sin(2 * np.pi * np.cumsum(freq) / SR) * envelope * 3000
+    return (tone + rng.normal(size=n) * 300).astype(np.int16)
+
+def repost(samples, shift=1234, gain=0.6, seed=0):
+    noise = np.random.default_rng(seed).normal(0, 80, len(samples) + shift)
+    shifted = np.concatenate([np.zeros(shift), samples * gain])
+    return (shifted + noise).astype(np.int16)
+
+@pytest.fixture
+def original():
+    return fingerprint(speech_like(20, 1), SR)
+
+def test_short_clip_has_no_fingerprint():
+    assert len(fingerprint(np.zeros(100, dtype=np.int16), SR)) == 0
+
+def test_repost_matches(original):
+    similarity, coverage = compare(original, fingerprint(repost(speech_like(20, 1)), SR))
+    assert similarity > 0.75
+    assert coverage > 0.95
+
+def test_unrelated_audio_does_not_match(original):
+    similarity, _ = compare(original, fingerprint(speech_like(20, 2), SR))
+    assert similarity < 0.65
+
+def test_clip_of_a_longer_video_has_low_coverage():
+    full = speech_like(20, 1)
+    _, coverage = compare(fingerprint(full, SR), fingerprint(full[:5 * SR], SR))
+    assert coverage < 0.5
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = IngestManifest(str(tmp_path / "manifest.sqlite"))
+    yield manifest
+    manifest.close()
+
+def test_match_leaves_no_open_transaction(tmp_path, manifest, original):
+    index = manifest.fingerprint_index()
+    index.add("a" * 64, original)
+    video = tmp_path / "b.mp4"
+    video.write_bytes(b"b")
+
+    match = index.match(fingerprint(repost(speech_like(20, 1)), SR), 0.7, 0.8, 10.0)
+    assert match is not None and match[0] == "a" * 64
+    assert not manifest._db.in_transaction
+
+    # Writes on the shared connection and from another connection both go through
+    manifest.register("b" * 64, video)
+    manifest.record("b" * 64, "duplicate_of", "a" * 64)
+    index.add("c" * 64, fingerprint(speech_like(20, 3), SR))
+    other = sqlite3.connect(str(tmp_path / "manifest.sqlite"), timeout=0.1)
+    other.execute("UPDATE videos SET error = 'x'")
+    other.commit()
+    other.close()
+
+def test_match_excludes_self_and_unrelated(manifest, original):
+    index = manifest.fingerprint_index()
+    index.add("a" * 64, original)
+    index.add("b" * 64, fingerprint(speech_like(20, 2), SR))
+    assert index.match(original, 0.7, 0.8, 10.0, exclude="a" * 64) is None
+
+def test_copies_are_listed_as_duplicates(tmp_path, manifest):
+    video, copy, repost_path = (tmp_path / name for name in ("a.mp4", "a_copy.mp4", "b.mp4"))
+    for path in (video, copy, repost_path):
+        path.write_bytes(b"x")
+    manifest.register("a" * 64, video)
+    manifest.register("b" * 64, repost_path)
+    manifest.record("b" * 64, "duplicate_of", "a" * 64)
+    manifest.record_copy("a" * 64, copy)
+    assert manifest.duplicates("a" * 64) == sorted([str(copy), str(repost_path)])
+    assert manifest.get("b" * 64).complete
@@ -0,0 +1,174 @@
+from pathlib import Path
+from types import SimpleNamespace
+import asyncio
+import logging
+import threading
+import pytest
+from video_processing import VideoProcessor
+
+def ingest_settings(tmp_path, **overrides):
+    values = dict(
+        ingest_manifest_path=str(tmp_path / 'manifest.sqlite'), ingest_work_dir=str(tmp_path / 'work'),
+        video_folder_path=str(tmp_path / 'videos'), ingest_audio_extractor='moviepy',
+        ingest_extract_workers=2, ingest_transcribe_concurrency=2, ingest_enrich_concurrency=2,
+        ingest_store_concurrency=2, ingest_queue_size=4, ingest_dedup_enabled=False,
+        chunked_index_enabled=False, ingest_embedding_batch_size=8, ingest_embedding_batch_tokens=8000,
+        ingest_write_batch_size=8, ingest_batch_flush_seconds=0.01, search_refresh_url=None
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+class FakeProcessor(VideoProcessor):
+    """The real pipeline with the upstream calls replaced; `fail` maps a call and file name to an error"""
+
+    def __init__(self, settings, fail=None):
+        self.fail = fail or {}
+        self.calls = []
+        self.rows = {}
+        super().__init__(settings)
+
+    def _setup_clients(self):
+        pass
+
+    def _setup_logging(self):
+        self.logger = logging.getLogger('test.ingest')
+
+    def _check(self, call, name):
+        self.calls.append((call, name))
+        error = self.fail.get((call, name))
+        if error is not None:
+            raise error
+
+    async def extract_audio(self, video_path, output_path):
+        self._check('extract', video_path.name)
+        output_path.write_bytes(video_path.read_bytes())
+
+    async def transcribe_audio(self, audio_path):
+        text = audio_path.read_text()
+        self._check('transcribe', text)
+        return f"transcript of {text}"
+
+    async def generate_title(self, transcript):
+        name = transcript.split()[-1]
+        self._check('title', name)
+        return f"How To {name}"
+
+    async def generate_embeddings(self, texts):
+        return [[1.0, 0.0] for _ in texts]
+
+    async def store_in_supabase(self, data):
+        for row in data if isinstance(data, list) else [data]:
+            self._check('store', Path(row['url']).name)
+            self.rows[row['url']] = row
+
+def add_videos(tmp_path, *names):
+    folder = tmp_path / 'videos'
+    folder.mkdir(exist_ok=True)
+    for name in names:
+        (folder / name).write_text(name)
+
+def run(processor):
+    return {Path(r.video_path).name: r for r in asyncio.run(processor.process_all_videos())}
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # The run summary is written to the working directory
+    monkeypatch.chdir(tmp_path)
+
+def test_unreadable_video_fails_alone(tmp_path):
+    add_videos(tmp_path, 'a.mp4', 'c.mp4')
+    (tmp_path / 'videos' / 'b.mp4').mkdir()  # can't be hashed
+    results = run(FakeProcessor(ingest_settings(tmp_path)))
+    assert not results['b.mp4'].success
+    assert results['a.mp4'].success and results['c.mp4'].success
+    assert len(results) == 3
+
+def test_failed_setup_fails_only_that_video(tmp_path):
+    add_videos(tmp_path, 'a.mp4', 'b.mp4')
+    processor = FakeProcessor(ingest_settings(tmp_path))
+    prepare = processor._prepare_job
+
+    async def flaky_prepare(video_path, temp_dir, content_hash=None):
+        if video_path.name == 'b.mp4':
+            raise OSError("manifest locked")
+        return await prepare(video_path, temp_dir, content_hash)
+
+    processor._prepare_job = flaky_prepare
+    results = run(processor)
+    assert results['a.mp4'].success
+    assert results['b.mp4'].error == "manifest locked"
+    assert [Path(url).name for url in processor.rows] == ['a.mp4']
+
+def test_stage_failure_does_not_stop_other_videos(tmp_path):
+    add_videos(tmp_path, 'a.mp4', 'b.mp4', 'c.mp4')
+    processor = FakeProcessor(ingest_settings(tmp_path), fail={('transcribe', 'b.mp4'): RuntimeError("whisper 500")})
+    results = run(processor)
+    assert results['b.mp4'].error == "whisper 500"
+    assert results['a.mp4'].success and results['c.mp4'].success
+    assert sorted(Path(url).name for url in processor.rows) == ['a.mp4', 'c.mp4']
+
+def test_resume_after_a_crash_skips_finished_stages(tmp_path):
+    add_videos(tmp_path, 'a.mp4', 'b.mp4')
+    settings = ingest_settings(tmp_path, ingest_enrich_concurrency=1)
+    # The process dies while titling b, after its transcript was saved
+    crashed = FakeProcessor(settings, fail={('title', 'b.mp4'): KeyboardInterrupt()})
+    with pytest.raises(KeyboardInterrupt):
+        asyncio.run(crashed.process_all_videos())
+
+    processor = FakeProcessor(settings)
+    results = run(processor)
+    assert results['a.mp4'].success and results['b.mp4'].success
+    # b resumes at the title stage; a is not touched again if it was stored
+    assert ('transcribe', 'b.mp4') not in processor.calls
+    assert ('extract', 'b.mp4') not in processor.calls
+    assert ('title', 'b.mp4') in processor.calls
+    stored_before = {Path(url).name for url in crashed.rows}
+    assert not any(name in stored_before for _, name in processor.calls)
+    assert processor.rows[str(tmp_path / 'videos' / 'b.mp4')]['title'] == "How To b.mp4"
+
+def test_stored_videos_are_skipped_on_the_next_run(tmp_path):
+    add_videos(tmp_path, 'a.mp4')
+    settings = ingest_settings(tmp_path)
+    run(FakeProcessor(settings))
+    processor = FakeProcessor(settings)
+    results = run(processor)
+    assert results['a.mp4'].success
+    assert processor.calls == [] and processor.rows == {}
+
+def test_changed_file_is_processed_again(tmp_path):
+    add_videos(tmp_path, 'a.mp4')
+    settings = ingest_settings(tmp_path)
+    run(FakeProcessor(settings))
+    (tmp_path / 'videos' / 'a.mp4').write_text('a.mp4 re-edited')
+    processor = FakeProcessor(settings)
+    run(processor)
+    assert ('transcribe', 'a.mp4 re-edited') in processor.calls
+
+def test_manifest_writes_run_off_the_event_loop(tmp_path):
+    add_videos(tmp_path, 'a.mp4', 'b.mp4')
+    processor = FakeProcessor(ingest_settings(tmp_path), fail={('title', 'b.mp4'): RuntimeError("gpt 500")})
+    threads = []
+    for name in ('register', 'record', 'record_error'):
+        write = getattr(processor.manifest, name)
+
+        def tracked(*args, _write=write, _name=name):
+            threads.append((_name, threading.current_thread()))
+            return _write(*args)
+
+        setattr(processor.manifest, name, tracked)
+    run(processor)
+    assert {name for name, _ in threads} == {'register', 'record', 'record_error'}
+    assert all(thread is not threading.main_thread() for _, thread in threads)
+
+def test_thread_pool_is_shut_down_after_the_run(tmp_path):
+    add_videos(tmp_path, 'a.mp4')
+    processor = FakeProcessor(ingest_settings(tmp_path))
+    pools = []
+    get_pool = processor._get_thread_pool
+    processor._get_thread_pool = lambda: pools.append(get_pool()) or pools[-1]
+    run(processor)
+    assert processor._thread_pool is None
+    assert pools and all(pool._shutdown for pool in pools)
+    # A second run gets a fresh pool
+    add_videos(tmp_path, 'b.mp4')
+    assert run(processor)['b.mp4'].success
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+from src.core.search.lexical import BM25Index, tokenize
+from src.core.search.service import SimilaritySearch
+from tests.test_vector_index import FakeTable
+
+VIDEOS = [
+    {'id': 1, 'title': "How To Stop Toddler Tantrums", 'url': 'tantrums',
+     'script': "When your toddler has a tantrum, stop, kneel down and name the feeling."},
+    {'id': 2, 'title': "How To Get A Toddler To Sleep", 'url': 'sleep',
+     'script': "A calm bedtime routine helps a toddler fall asleep. Dim the lights an hour before bed."},
+    {'id': 3, 'title': "How To Start Potty Training", 'url': 'potty',
+     'script': "Start potty training when your child shows interest. Praise every try."},
+]
+
+def bm25():
+    index = BM25Index(supabase=None)
+    for video in VIDEOS:
+        index.add(video)
+    return index
+
+def search_service(**overrides):
+    settings = dict(lexical_floor_coverage=0.5, chunked_index_enabled=False,
+                    chunk_size_tokens=8, chunk_overlap_tokens=2)
+    settings.update(overrides)
+    service = SimilaritySearch.__new__(SimilaritySearch)
+    service.settings = SimpleNamespace(**settings)
+    service.lexical = bm25()
+    return service
+
+def test_tokenize_drops_stopwords():
+    assert tokenize("How do I get my toddler to SLEEP?") == ['get', 'toddler', 'sleep']
+
+def test_bm25_ranks_the_matching_video_first():
+    doc, score, coverage = bm25().search("toddler sleep routine")[0]
+    assert doc['url'] == 'sleep'
+    assert coverage == 1.0
+    assert score > 0
+
+def test_single_shared_word_is_not_a_match():
+    # Only "stop" is shared with the tantrums video
+    assert search_service()._lexical_match("how do I stop the car from overheating", 3) == []
+
+def test_relevant_question_passes_the_floor():
+    matches = search_service()._lexical_match("how to stop tantrums", 3)
+    assert [m['url'] for m in matches] == ['tantrums']
+
+def test_chunked_mode_gives_lexical_hits_chunks():
+    match = search_service(chunked_index_enabled=True)._lexical_match("toddler bedtime routine", 1)[0]
+    assert match['url'] == 'sleep'
+    assert len(match['chunks']) > 1
+    assert match['chunks'][0]['similarity'] >= match['chunks'][-1]['similarity']
+    assert 'routine' in match['chunks'][0]['content']
+
+def test_fusion_keeps_only_filtered_inputs():
+    vector = [{'url': 'sleep', 'similarity': 0.9, 'chunks': []}]
+    lexical = [{'url': 'sleep', 'similarity': 4.0}, {'url': 'potty', 'similarity': 2.0}]
+    fused = SimilaritySearch._fuse(vector, lexical, 3)
+    assert [f['url'] for f in fused] == ['sleep', 'potty']
+    assert 'chunks' in fused[0]
+
+def test_sync_reindexes_edited_and_deleted_videos():
+    table = FakeTable([dict(video) for video in VIDEOS])
+    index = BM25Index(table)
+    index.load()
+    assert len(index) == 3
+
+    table.rows[0] = dict(VIDEOS[0], title="How To Handle Meltdowns", script="Meltdowns pass; stay calm.")
+    del table.rows[2]
+    table.rows.append({'id': 4, 'title': "How To Start Reading", 'url': 'reading', 'script': "Read together daily."})
+    assert index.sync() == 3
+    assert len(index) == 3
+    assert index.search("tantrum", 3) == []
+    assert index.search("meltdowns", 3)[0][0]['url'] == 'tantrums'
+    assert index.search("potty training", 3) == []
+    assert index.search("reading", 3)[0][0]['url'] == 'reading'
+    assert index.sync() == 0
+
+def test_sync_appends_new_videos_in_place():
+    table = FakeTable([dict(VIDEOS[0])])
+    index = BM25Index(table)
+    index.load()
+    table.rows.append(dict(VIDEOS[1]))
+    assert index.sync() == 1
+    assert index.search("sleep", 3)[0][0]['url'] == 'sleep'
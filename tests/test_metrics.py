@@ -0,0 +1,97 @@
+import logging
+from types import SimpleNamespace
+import pytest
+from src.core.metrics.registry import MetricsRegistry, log_sampled, request_id_var
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        registry.observe('stage_latency_seconds', value, stage='search')
+    text = registry.render()
+    assert '# TYPE stage_latency_seconds histogram' in text
+    assert 'stage_latency_seconds_bucket{stage="search",le="0.1"} 1' in text
+    assert 'stage_latency_seconds_bucket{stage="search",le="1.0"} 3' in text
+    assert 'stage_latency_seconds_bucket{stage="search",le="+Inf"} 4' in text
+    assert 'stage_latency_seconds_count{stage="search"} 4' in text
+    assert 'stage_latency_seconds_sum{stage="search"} 4.25' in text
+
+def test_counters_add_up_per_label_set():
+    registry = MetricsRegistry()
+    registry.inc('turns_rejected_total')
+    registry.inc('turns_rejected_total', 2)
+    registry.inc('upstream_retries_total', upstream='gpt', status='429')
+    registry.inc('upstream_retries_total', upstream='ada', status='503')
+    text = registry.render()
+    assert '# TYPE turns_rejected_total counter' in text
+    assert 'turns_rejected_total 3.0' in text
+    assert 'upstream_retries_total{status="429",upstream="gpt"} 1.0' in text
+    assert 'upstream_retries_total{status="503",upstream="ada"} 1.0' in text
+
+def test_span_times_stages_and_counts_failures():
+    registry = MetricsRegistry(buckets=(10.0,))
+    with registry.span('chat'):
+        pass
+    with pytest.raises(ValueError):
+        with registry.span('chat'):
+            raise ValueError()
+    text = registry.render()
+    assert 'stage_latency_seconds_count{stage="chat"} 2' in text
+    assert 'stage_errors_total{stage="chat"} 1.0' in text
+    assert registry.summary()[0].startswith('chat: 2 calls')
+
+def test_cache_hit_rates_are_read_at_render_time():
+    registry = MetricsRegistry()
+    stats = SimpleNamespace(hits=0, misses=0, hit_rate=0.0)
+    registry.register_cache('embedding', SimpleNamespace(stats=stats))
+    registry.register_cache('disabled', None)
+    stats.hits, stats.misses, stats.hit_rate = 3, 1, 0.75
+    text = registry.render()
+    assert 'cache_hits_total{cache="embedding"} 3' in text
+    assert 'cache_misses_total{cache="embedding"} 1' in text
+    assert 'cache_hit_ratio{cache="embedding"} 0.75' in text
+    assert 'disabled' not in text
+
+def test_gauges_are_collected_at_render_time():
+    registry = MetricsRegistry()
+    depth = {'gpt': 0}
+    registry.gauge('upstream_queue_depth', lambda: {(('upstream', k),): v for k, v in depth.items()})
+    depth['gpt'] = 4
+    assert 'upstream_queue_depth{upstream="gpt"} 4' in registry.render()
+
+def test_render_is_valid_exposition_text():
+    registry = MetricsRegistry(buckets=(1.0,))
+    registry.observe('a_seconds', 0.5)
+    registry.inc('b_total')
+    text = registry.render()
+    assert text.endswith('\n')
+    for line in text.splitlines():
+        if not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            float(value)
+
+def sampled_requests(caplog, rate, request_ids, lines=3):
+    logger = logging.getLogger('test.sampling')
+    with caplog.at_level(logging.INFO, logger='test.sampling'):
+        for request_id in request_ids:
+            token = request_id_var.set(request_id)
+            try:
+                for n in range(lines):
+                    log_sampled(logger, f"line {n}", rate=rate)
+            finally:
+                request_id_var.reset(token)
+    per_request = {}
+    for record in caplog.records:
+        request_id = record.getMessage().split(']')[0][1:]
+        per_request[request_id] = per_request.get(request_id, 0) + 1
+    return per_request
+
+def test_sampling_keeps_or_drops_whole_requests(caplog):
+    request_ids = [f"{n:012x}" for n in range(400)]
+    per_request = sampled_requests(caplog, 0.25, request_ids)
+    assert set(per_request.values()) == {3}
+    assert 60 < len(per_request) < 140
+
+def test_sampling_rate_bounds(caplog):
+    assert sampled_requests(caplog, 0.0, ['abc', 'def']) == {}
+    caplog.clear()
+    assert sampled_requests(caplog, 1.0, ['abc', 'def']) == {'abc': 3, 'def': 3}
@@ -0,0 +1,90 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import pytest
+from src.core.voice.pipeline import SentenceSplitter, SpeechPipeline
+
+def split(tokens, min_chars=1):
+    splitter = SentenceSplitter(min_chars=min_chars)
+    sentences = [s for token in tokens for s in splitter.feed(token)]
+    return sentences, splitter.flush()
+
+def test_sentence_ends_once_whitespace_follows():
+    assert split(["Hello there", ".", " How", " are you?", " Fine"]) == (["Hello there.", "How are you?"], ["Fine"])
+
+def test_decimals_and_abbreviated_numbers_do_not_split():
+    sentences, rest = split(["It costs 3", ".", "5 dollars. ", "Really"])
+    assert sentences == ["It costs 3.5 dollars."]
+    assert rest == ["Really"]
+
+def test_closing_quotes_and_brackets_stay_with_the_sentence():
+    sentences, _ = split(['He said "stop!" ', "then left (quickly.) ", "end"])
+    assert sentences == ['He said "stop!"', "then left (quickly.)"]
+
+def test_short_sentences_are_merged_into_the_next():
+    sentences, rest = split(["Okay! ", "Let me look that up for you. ", "Done."], min_chars=20)
+    assert sentences == ["Okay! Let me look that up for you."]
+    assert rest == ["Done."]
+
+def test_flush_is_empty_when_nothing_is_left():
+    assert split(["All done. "]) == (["All done."], [])
+
+class ManualVoice:
+    """Hands out futures the test completes by hand"""
+
+    def __init__(self):
+        self.futures = {}
+
+    def text_to_speech_async(self, text):
+        self.futures[text] = Future()
+        return self.futures[text]
+
+def test_segments_are_delivered_in_order_as_soon_as_ready():
+    voice, delivered = ManualVoice(), []
+    pipeline = SpeechPipeline(voice, lambda index, text, result: delivered.append((index, text, result)), min_chars=1)
+    pipeline.feed("One. Two. Three. ")
+    assert list(voice.futures) == ["One.", "Two.", "Three."]
+
+    voice.futures["Three."].set_result("c")
+    voice.futures["Two."].set_result("b")
+    assert delivered == []
+    # Finishing the head releases everything queued behind it, without another token
+    voice.futures["One."].set_result("a")
+    assert delivered == [(0, "One.", "a"), (1, "Two.", "b"), (2, "Three.", "c")]
+
+def test_close_waits_for_the_last_segment():
+    voice, delivered = ManualVoice(), []
+    pipeline = SpeechPipeline(voice, lambda index, text, result: delivered.append(index), min_chars=1)
+    pipeline.feed("First. Second")
+    voice.futures["First."].set_result("a")
+    assert delivered == [0]
+
+    threading.Timer(0.05, lambda: voice.futures["Second"].set_result("b")).start()
+    assert pipeline.close() == 2
+    assert delivered == [0, 1]
+
+def test_order_holds_under_concurrent_synthesis():
+    executor = ThreadPoolExecutor(max_workers=8)
+
+    class Voice:
+        def text_to_speech_async(self, text):
+            return executor.submit(lambda: text.upper())
+
+    delivered = []
+    pipeline = SpeechPipeline(Voice(), lambda index, text, result: delivered.append((index, result)), min_chars=1)
+    for n in range(50):
+        pipeline.feed(f"Sentence {n}. ")
+    assert pipeline.close() == 50
+    assert delivered == [(n, f"SENTENCE {n}.") for n in range(50)]
+    executor.shutdown()
+
+def test_delivery_errors_surface_from_close():
+    voice = ManualVoice()
+
+    def on_segment(index, text, result):
+        raise RuntimeError("socket closed")
+
+    pipeline = SpeechPipeline(voice, on_segment, min_chars=1)
+    pipeline.feed("One. ")
+    voice.futures["One."].set_result("a")
+    with pytest.raises(RuntimeError):
+        pipeline.close()
@@ -0,0 +1,29 @@
+import io
+import wave
+import numpy as np
+from src.core.audio.preprocess import is_empty_clip, speech_bounds
+
+def wav(samples: np.ndarray, rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.astype(np.int16).tobytes())
+    return buffer.getvalue()
+
+def test_empty_clips_are_rejected_without_ffmpeg():
+    assert is_empty_clip(b"")
+    assert is_empty_clip(wav(np.zeros(0)))
+    assert not is_empty_clip(wav(np.zeros(160)))
+    # Not a WAV: left to the decoder
+    assert not is_empty_clip(b"\x1aE\xdf\xa3webm")
+
+def test_speech_bounds_trims_silence():
+    rate = 16000
+    tone = (np.sin(np.arange(rate) * 0.1) * 10000).astype(np.int16)
+    samples = np.concatenate([np.zeros(rate, np.int16), tone, np.zeros(rate, np.int16)])
+    start, end = speech_bounds(samples, rate, padding_ms=0)
+    assert abs(start - rate) < rate * 0.05
+    assert abs(end - 2 * rate) < rate * 0.05
+    assert speech_bounds(np.zeros(rate, np.int16), rate) is None
@@ -0,0 +1,59 @@
+import threading
+import pytest
+from src.config import settings as settings_module
+from src.core.web.warmup import Warmup
+
+ENV = {
+    'GPT4_API_KEY': 'x', 'GPT4_ENDPOINT': 'https://gpt.example', 'GPT4_DEPLOYMENT_NAME': 'gpt4',
+    'WHISPER_API_KEY': 'x', 'WHISPER_ENDPOINT': 'https://whisper.example', 'WHISPER_DEPLOYMENT_NAME': 'whisper',
+    'ADA_API_KEY': 'x', 'ADA_ENDPOINT': 'https://ada.example', 'ADA_DEPLOYMENT_NAME': 'ada',
+    'AZURE_API_VERSION': '2024-02-01', 'SUPABASE_URL': 'https://db.example', 'SUPABASE_KEY': 'key',
+    'VIDEO_FOLDER_PATH': '/tmp', 'ELEVENLABS_API_KEY': 'x', 'ELEVENLABS_VOICE_ID': 'voice',
+    'SOCKETIO_ASYNC_MODE': 'threading', 'SOCKETIO_MESSAGE_QUEUE': '', 'SERVER_WORKERS': '1',
+}
+
+@pytest.fixture
+def web_app(monkeypatch):
+    for name, value in ENV.items():
+        monkeypatch.setenv(name, value)
+    settings_module.get_settings.cache_clear()
+    import app as app_module
+    release = threading.Event()
+
+    def build_warmup(self):
+        # Stands in for the SDK imports and index loads
+        warmup = Warmup()
+        warmup.add('slow_step', lambda: release.wait(5))
+        warmup.add('broken_step', lambda: 1 / 0)
+        return warmup
+
+    monkeypatch.setattr(app_module.WebApp, '_build_warmup', build_warmup)
+    web = app_module.WebApp()
+    yield web, release
+    release.set()
+    web.dispatcher.shutdown()
+    settings_module.get_settings.cache_clear()
+
+def get(web, path):
+    # Full routing without the test client, which needs a matching Werkzeug release
+    with web.app.test_request_context(path):
+        return web.app.full_dispatch_request()
+
+def test_readyz_is_503_until_warmup_finishes(web_app):
+    web, release = web_app
+
+    response = get(web, '/readyz')
+    assert response.status_code == 503
+    assert response.get_json()['ready'] is False
+    # Liveness does not wait for the warm-up
+    assert get(web, '/healthz').status_code == 200
+
+    release.set()
+    assert web.warmup.wait(5)
+    response = get(web, '/readyz')
+    assert response.status_code == 200
+    status = response.get_json()
+    assert status['ready'] is True and status['current_step'] is None
+    # A failed step is reported but does not hold readiness back
+    assert set(status['steps']) == {'slow_step', 'broken_step'}
+    assert 'broken_step' in status['errors']
@@ -0,0 +1,202 @@
+from email.utils import formatdate
+from types import SimpleNamespace
+import threading
+import time
+import pytest
+from src.core.clients import scheduler as scheduler_module
+from src.core.clients.scheduler import Priority, QuotaBuckets, UpstreamScheduler
+
+def settings(**overrides):
+    values = dict(
+        gpt_rpm=0, gpt_tpm=0, ada_rpm=0, ada_tpm=0, whisper_rpm=0, elevenlabs_rpm=0, elevenlabs_cpm=0,
+        upstream_quota_path=None, upstream_batch_reserve=0.2, upstream_max_retries=3,
+        upstream_backoff_base=0.01, upstream_backoff_max=0.05
+    )
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(scheduler_module.time, "time", clock.time)
+    return clock
+
+class Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+def test_bucket_refills_continuously(clock):
+    buckets = QuotaBuckets({'gpt': {'requests': 60}})
+    for _ in range(60):
+        assert buckets.try_take('gpt', {'requests': 1}) == 0.0
+    assert buckets.try_take('gpt', {'requests': 1}) == pytest.approx(1.0)
+    clock.now += 1.0
+    assert buckets.try_take('gpt', {'requests': 1}) == 0.0
+    assert buckets.try_take('gpt', {'requests': 1}) > 0
+
+def test_unlimited_upstreams_never_wait(clock):
+    buckets = QuotaBuckets({'gpt': {'requests': 0, 'tokens': 0}})
+    assert all(buckets.try_take('gpt', {'requests': 1, 'tokens': 10 ** 6}) == 0.0 for _ in range(1000))
+
+def test_batch_callers_leave_the_reserve(clock):
+    buckets = QuotaBuckets({'ada': {'requests': 10}})
+    taken = 0
+    while buckets.try_take('ada', {'requests': 1}, reserve=0.2) == 0.0:
+        taken += 1
+    assert taken == 8
+    # Interactive callers may use the reserve
+    assert buckets.try_take('ada', {'requests': 1}) == 0.0
+    assert buckets.try_take('ada', {'requests': 1}) == 0.0
+    assert buckets.try_take('ada', {'requests': 1}) > 0
+
+def test_oversized_request_drains_instead_of_waiting_forever(clock):
+    buckets = QuotaBuckets({'gpt': {'tokens': 1000}})
+    assert buckets.try_take('gpt', {'tokens': 5000}) == 0.0
+    assert buckets.try_take('gpt', {'tokens': 1}) > 0
+
+def test_sqlite_buckets_are_shared_between_processes(clock, tmp_path):
+    path = str(tmp_path / "quota.sqlite")
+    server = QuotaBuckets({'gpt': {'requests': 10}}, db_path=path)
+    ingestion = QuotaBuckets({'gpt': {'requests': 10}}, db_path=path)
+    for _ in range(6):
+        assert server.try_take('gpt', {'requests': 1}) == 0.0
+    taken = 0
+    while ingestion.try_take('gpt', {'requests': 1}) == 0.0:
+        taken += 1
+    assert taken == 4
+
+def test_retry_after_forms():
+    parse = UpstreamScheduler._retry_after
+    assert parse(None) is None
+    assert parse({'retry-after': '3'}) == 3.0
+    assert parse({'retry-after-ms': '250', 'retry-after': '9'}) == 0.25
+    assert parse({'retry-after': formatdate(time.time() + 30, usegmt=True)}) == pytest.approx(30, abs=2)
+    assert parse({'retry-after': 'soon'}) is None
+
+def test_backoff_is_jittered_capped_and_honours_retry_after():
+    scheduler = UpstreamScheduler(settings(upstream_backoff_base=1.0, upstream_backoff_max=4.0))
+    delays = [scheduler._backoff(1, None) for _ in range(200)]
+    assert all(1.0 <= d <= 2.0 for d in delays) and len(set(delays)) > 1
+    assert all(2.0 <= scheduler._backoff(10, None) <= 4.0 for _ in range(50))
+    assert scheduler._backoff(0, 7.5) == 7.5
+
+def test_throttled_calls_are_retried_then_returned(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(scheduler_module.time, "sleep", sleeps.append)
+    scheduler = UpstreamScheduler(settings())
+    responses = iter([Response(429, {'retry-after': '2'}), Response(503), Response(200)])
+    result = scheduler.call('elevenlabs', lambda: next(responses))
+    assert result.status_code == 200
+    assert sleeps[0] == 2.0 and len(sleeps) == 2
+
+def test_retries_stop_at_the_limit(monkeypatch):
+    monkeypatch.setattr(scheduler_module.time, "sleep", lambda _: None)
+    scheduler = UpstreamScheduler(settings(upstream_max_retries=2))
+    calls = []
+
+    def failing():
+        calls.append(1)
+        error = RuntimeError("throttled")
+        error.status_code = 429
+        raise error
+
+    with pytest.raises(RuntimeError):
+        scheduler.call('gpt', failing)
+    assert len(calls) == 3
+
+def test_other_errors_are_not_retried():
+    scheduler = UpstreamScheduler(settings())
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        scheduler.call('gpt', broken)
+    assert calls == [1]
+
+def test_429_pauses_every_caller_of_the_upstream():
+    scheduler = UpstreamScheduler(settings())
+    responses = iter([Response(429, {'retry-after': '0.3'}), Response(200)])
+    lane = scheduler._lane('whisper')
+    thread = threading.Thread(target=scheduler.call, args=('whisper', lambda: next(responses)))
+    thread.start()
+    while not lane.blocked_until:
+        time.sleep(0.005)
+    throttled_at = time.monotonic()
+    admitted_at = []
+    scheduler.call('whisper', lambda: admitted_at.append(time.monotonic()))
+    thread.join()
+    assert admitted_at[0] >= lane.blocked_until
+    assert admitted_at[0] - throttled_at >= 0.2
+    # Other upstreams are not affected
+    started = time.monotonic()
+    scheduler.call('gpt', lambda: None)
+    assert time.monotonic() - started < 0.1
+
+class GatedBuckets:
+    """Admits one caller per open() call"""
+
+    def __init__(self):
+        self.permits = 0
+        self.lock = threading.Lock()
+
+    def open(self):
+        with self.lock:
+            self.permits += 1
+
+    def try_take(self, upstream, amounts, reserve=0.0):
+        with self.lock:
+            if self.permits:
+                self.permits -= 1
+                return 0.0
+        return 0.01
+
+def test_interactive_callers_go_ahead_of_queued_batch_work():
+    scheduler = UpstreamScheduler(settings())
+    scheduler.buckets = GatedBuckets()
+    order = []
+
+    def start(name, priority):
+        thread = threading.Thread(
+            target=scheduler.call, args=('gpt', lambda: order.append(name)), kwargs={'priority': priority}
+        )
+        thread.start()
+        return thread
+
+    def queued(count):
+        deadline = time.monotonic() + 2
+        while len(scheduler._lane('gpt').waiting) < count and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    threads = [start('batch-1', Priority.BATCH)]
+    queued(1)
+    threads.append(start('batch-2', Priority.BATCH))
+    queued(2)
+    threads.append(start('interactive', Priority.INTERACTIVE))
+    queued(3)
+    for _ in threads:
+        scheduler.buckets.open()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join(2)
+    assert order == ['interactive', 'batch-1', 'batch-2']
+
+def test_limits_without_a_shared_quota_file_are_warned_about(caplog):
+    with caplog.at_level('WARNING'):
+        UpstreamScheduler(settings(gpt_rpm=100))
+    assert 'UPSTREAM_QUOTA_PATH' in caplog.text
+    caplog.clear()
+    with caplog.at_level('WARNING'):
+        UpstreamScheduler(settings())
+        UpstreamScheduler(settings(gpt_rpm=100, upstream_quota_path=':memory:'))
+    assert 'UPSTREAM_QUOTA_PATH' not in caplog.text
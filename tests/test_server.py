@@ -0,0 +1,29 @@
+import pytest
+from src.core.web.server import check_search_mode, check_server_mode
+
+def test_werkzeug_allowed_for_local_single_process():
+    check_server_mode('threading', '127.0.0.1', 1, debug=False)
+    check_server_mode('threading', '0.0.0.0', 4, debug=True)
+    check_server_mode('gevent', '0.0.0.0', 8, debug=False)
+
+@pytest.mark.parametrize('host, workers', [('0.0.0.0', 1), ('127.0.0.1', 2)])
+def test_werkzeug_refused_in_production(host, workers):
+    with pytest.raises(SystemExit):
+        check_server_mode('threading', host, workers, debug=False)
+
+@pytest.mark.parametrize('mode, index_mode, path, workers', [
+    ('vector', 'remote', None, 8),
+    ('lexical', 'remote', None, 1),
+    ('hybrid', 'local', '/srv/index', 8),
+])
+def test_search_modes_allowed(mode, index_mode, path, workers):
+    check_search_mode(mode, index_mode, path, workers)
+
+@pytest.mark.parametrize('mode, index_mode, path', [
+    ('lexical', 'local', '/srv/index'),
+    ('hybrid', 'remote', None),
+    ('hybrid', 'local', None),
+])
+def test_per_process_keyword_index_refused_with_workers(mode, index_mode, path):
+    with pytest.raises(SystemExit):
+        check_search_mode(mode, index_mode, path, 4)
@@ -0,0 +1,93 @@
+import threading
+import pytest
+from src.core.cache.singleflight import SingleFlight
+
+def run_together(flight, count, fn, key='q', **kwargs):
+    """Start `count` callers; returns (results, errors) once all have returned"""
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn, **kwargs))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight('test')
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return 'answer'
+
+    threads, results, errors = run_together(flight, 8, slow)
+    while not calls or flight._calls['q'].waiters < 7:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == ['answer'] * 8 and not errors
+    assert flight.in_flight() == 0
+
+def test_followers_get_the_leaders_exception():
+    flight = SingleFlight('test')
+    release = threading.Event()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError('upstream down')
+
+    threads, results, errors = run_together(flight, 3, failing)
+    started.wait(5)
+    while flight._calls['q'].waiters < 2:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert not results
+    assert len(errors) == 3 and all(isinstance(e, ValueError) for e in errors)
+
+def test_nothing_is_remembered_after_the_call():
+    flight = SingleFlight('test')
+    counter = iter(range(10))
+    assert flight.do('q', lambda: next(counter)) == 0
+    assert flight.do('q', lambda: next(counter)) == 1
+    with pytest.raises(KeyError):
+        flight.do('q', lambda: {}['missing'])
+    assert flight.in_flight() == 0
+
+def test_followers_join_the_leaders_state():
+    flight = SingleFlight('test')
+    release = threading.Event()
+    joined = []
+    state = {'tokens': []}
+
+    def leader():
+        release.wait(5)
+        return 'done'
+
+    threads, results, errors = run_together(flight, 1, leader, state=state)
+    while flight.in_flight() == 0:
+        threading.Event().wait(0.01)
+    follower = threading.Thread(target=lambda: results.append(flight.do('q', leader, on_join=joined.append)))
+    follower.start()
+    while flight._calls['q'].waiters < 1:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads + [follower]:
+        thread.join()
+
+    assert joined == [state]
+    assert results == ['done', 'done']
@@ -0,0 +1,90 @@
+from concurrent.futures import Executor, Future
+import numpy as np
+from src.core.audio import ffmpeg
+from src.core.voice.streaming import StreamingTranscriber
+
+RATE = 16000
+
+class InlineExecutor(Executor):
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+class RawDecoder:
+    """Stands in for ffmpeg: the upload is already 16-bit PCM"""
+    fed = 0
+
+    def __init__(self, sample_rate):
+        self.data = bytearray()
+
+    def feed(self, data):
+        RawDecoder.fed += len(data)
+        self.data.extend(data)
+
+    def pcm(self, start=0):
+        return bytes(self.data[start:])
+
+    def release(self, offset):
+        pass
+
+    def close(self, start=0):
+        return self.pcm(start)
+
+    def kill(self):
+        pass
+
+class FakeVoice:
+    def __init__(self):
+        self.uploads = []
+
+    def transcribe(self, audio, filename):
+        self.uploads.append(len(audio))
+        return f"part{len(self.uploads)}"
+
+def note(*pattern):
+    tone = lambda s: (np.sin(np.arange(int(s * RATE)) * 0.1) * 10000).astype(np.int16)
+    silence = lambda s: np.zeros(int(s * RATE), np.int16)
+    return np.concatenate([tone(s) if loud else silence(s) for loud, s in pattern]).tobytes()
+
+def transcriber(monkeypatch, **kwargs):
+    RawDecoder.fed = 0
+    monkeypatch.setattr(ffmpeg, "ffmpeg_available", lambda: True)
+    monkeypatch.setattr(ffmpeg, "PcmDecoder", RawDecoder)
+    monkeypatch.setattr(ffmpeg, "encode_pcm", lambda pcm, rate, bitrate: pcm)
+    voice = FakeVoice()
+    return voice, StreamingTranscriber(voice, InlineExecutor(), sample_rate=RATE, padding_ms=0, **kwargs)
+
+def chunks(data, seconds=0.25):
+    size = int(seconds * RATE) * 2
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+def test_each_chunk_is_decoded_and_transcribed_once(monkeypatch):
+    data = note((1, 4), (0, 1), (1, 4), (0, 1), (1, 2))
+    voice, stream = transcriber(monkeypatch)
+    for chunk in chunks(data):
+        assert stream.append(chunk)
+    result = stream.finish()
+
+    assert result.success and result.content == "part1 part2 part3"
+    assert RawDecoder.fed == len(data)
+    # Only the speech is uploaded, none of it twice
+    assert sum(voice.uploads) <= len(note((1, 4), (1, 4), (1, 2))) * 1.05
+
+def test_upload_is_capped(monkeypatch):
+    data = note((1, 2))
+    voice, stream = transcriber(monkeypatch, max_bytes=len(data) // 2)
+    accepted = [stream.append(chunk) for chunk in chunks(data)]
+    assert stream.full
+    assert accepted.count(True) == 4 and not any(accepted[4:])
+    assert RawDecoder.fed <= len(data) // 2
+
+def test_partials_are_debounced(monkeypatch):
+    partials = []
+    data = note((1, 4), (0, 1), (1, 4), (0, 1), (1, 4), (0, 1))
+    voice, stream = transcriber(monkeypatch, partial_interval_ms=60000)
+    stream.on_partial = partials.append
+    for chunk in chunks(data):
+        stream.append(chunk)
+    assert len(voice.uploads) == 3
+    assert partials == ["part1"]
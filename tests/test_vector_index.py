@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+from src.core.search.index import VectorIndex
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+class FakeTable:
+    """Just enough of a supabase-py query builder for the index loaders"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self._range = None
+        self._ids = None
+        self._order = None
+
+    def table(self, name):
+        self._range = self._ids = self._order = None
+        return self
+
+    def select(self, columns):
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end)
+        return self
+
+    def in_(self, column, values):
+        self._ids = set(values)
+        return self
+
+    def order(self, column):
+        self._order = column
+        return self
+
+    def execute(self):
+        rows = [dict(row) for row in self.rows]
+        # Unordered, PostgREST promises nothing; newest first here
+        rows = sorted(rows, key=lambda row: row[self._order]) if self._order else rows[::-1]
+        if self._ids is not None:
+            rows = [row for row in rows if row['id'] in self._ids]
+        if self._range is not None:
+            rows = rows[self._range[0]:self._range[1] + 1]
+        return _Response(rows)
+
+def row(i, embedding):
+    return {'id': i, 'script': f"script {i}", 'url': f"url {i}", 'title': f"title {i}", 'embedding': embedding}
+
+def test_empty_table_loads_and_searches():
+    index = VectorIndex(FakeTable([]))
+    index.load()
+    assert index.stats.rows == 0
+    assert index.search([1.0] * VectorIndex.DIMENSIONS, 0.5, 3) == []
+
+def test_empty_snapshot_round_trips(tmp_path):
+    VectorIndex(FakeTable([]), str(tmp_path / "index")).load()
+    index = VectorIndex(FakeTable([]), str(tmp_path / "index"))
+    index.load()
+    assert index.stats.source == "snapshot"
+    assert index.search([1.0] * VectorIndex.DIMENSIONS, 0.5, 3) == []
+
+def test_search_ranks_by_cosine_and_applies_threshold():
+    index = VectorIndex(FakeTable([row(1, [1.0, 0.0]), row(2, [0.7, 0.7]), row(3, [0.0, 1.0])]))
+    index.load()
+    results = index.search([1.0, 0.1], 0.5, 5)
+    assert [r['url'] for r in results] == ["url 1", "url 2"]
+    assert results[0]['similarity'] == pytest.approx(1 / np.sqrt(1.01))
+    assert results[0]['title'] == "title 1"
+    assert index.search([1.0, 0.1], 0.5, 1)[0]['url'] == "url 1"
+
+def test_mismatched_query_dimensions_return_nothing():
+    index = VectorIndex(FakeTable([row(1, [1.0, 0.0])]))
+    index.load()
+    assert index.search([1.0, 0.0, 0.0], 0.0, 3) == []
+
+def test_sync_adds_only_new_rows(tmp_path):
+    table = FakeTable([row(1, [1.0, 0.0])])
+    index = VectorIndex(table, str(tmp_path / "index"))
+    index.load()
+    table.rows.append(row(2, "[0.0, 1.0]"))
+    assert index.sync() == 1
+    assert index.sync() == 0
+    assert index.search([0.0, 1.0], 0.5, 3)[0]['url'] == "url 2"
+
+def test_sync_into_empty_index():
+    table = FakeTable([])
+    index = VectorIndex(table)
+    index.load()
+    table.rows.append(row(1, [1.0, 0.0]))
+    assert index.sync() == 1
+    assert index.stats.rows == 1
+
+def test_sync_replaces_edited_and_drops_deleted_rows(tmp_path):
+    table = FakeTable([row(1, [1.0, 0.0]), row(2, [0.0, 1.0]), row(3, [0.7, 0.7])])
+    index = VectorIndex(table, str(tmp_path / "index"))
+    index.load()
+    # Re-ingestion upserts on url and keeps the id
+    table.rows[0] = dict(row(1, [0.0, 1.0]), script="edited script")
+    del table.rows[2]
+    assert index.sync() == 2
+    assert index.stats.rows == 2
+    results = index.search([0.0, 1.0], 0.5, 5)
+    assert sorted(r['url'] for r in results) == ["url 1", "url 2"]
+    assert {r['content'] for r in results} == {"edited script", "script 2"}
+    assert index.sync() == 0
+
+    reloaded = VectorIndex(table, str(tmp_path / "index"))
+    reloaded.load()
+    assert reloaded.stats.rows == 2 and reloaded.sync() == 0
+
+def test_concurrent_syncs_add_rows_once():
+    import threading
+    table = FakeTable([])
+    index = VectorIndex(table)
+    index.load()
+    table.rows.extend(row(i, [1.0, float(i)]) for i in range(50))
+    threads = [threading.Thread(target=index.sync) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert index.stats.rows == 50
+
+def test_paginate_reads_every_page():
+    from src.core.search.pagination import paginate
+    rows = [{'id': i} for i in range(7)]
+    assert [item['id'] for item in paginate(FakeTable(rows), 'video_content', 'id', page_size=3)] == list(range(7))
+    assert [item['id'] for item in paginate(FakeTable(rows[:6]), 'video_content', 'id', page_size=3)] == list(range(6))
@@ -0,0 +1,66 @@
+import pytest
+from src.config import settings as settings_module
+from src.core.voice.service import VoiceService
+from tests.test_readiness import ENV
+
+class FakeStream:
+    full = False
+
+    def __init__(self):
+        self.chunks = []
+
+    def append(self, chunk):
+        self.chunks.append(chunk)
+
+    def abort(self):
+        pass
+
+class FakeVoice:
+    def __init__(self):
+        self.streams = []
+
+    def stream_transcriber(self, on_partial=None):
+        self.streams.append(FakeStream())
+        return self.streams[-1]
+
+@pytest.fixture
+def client(monkeypatch):
+    for name, value in ENV.items():
+        monkeypatch.setenv(name, value)
+    for name in ('WARMUP_PRELOAD_SERVICES', 'HTTP_WARMUP_ON_STARTUP', 'TTS_PRERENDER_ON_STARTUP'):
+        monkeypatch.setenv(name, 'false')
+    settings_module.get_settings.cache_clear()
+    import app as app_module
+    web = app_module.WebApp()
+    web._voice_service = FakeVoice()
+    emitted, turns = [], []
+    # The Socket.IO test client here does not collect server emits, so record them directly
+    monkeypatch.setattr(app_module, 'emit', lambda event, payload: emitted.append((event, payload)))
+    monkeypatch.setattr(web, '_submit_turn', lambda sid, data: turns.append(data))
+    yield web.socketio.test_client(web.app), web._voice_service, emitted, turns
+    web.dispatcher.shutdown()
+    settings_module.get_settings.cache_clear()
+
+@pytest.mark.parametrize('payload', ["not audio", {'0': 1}, [1, 2, 3], 42])
+def test_non_binary_chunks_are_rejected(client, payload):
+    socket, voice, emitted, turns = client
+    socket.emit('voice_chunk', {'message': payload, 'final': True})
+    assert [event for event, _ in emitted] == ['error']
+    assert voice.streams == [] and turns == []
+
+def test_binary_chunks_are_appended_as_sent(client):
+    socket, voice, emitted, turns = client
+    socket.emit('voice_chunk', {'message': b'RIFF', 'start': True})
+    socket.emit('voice_chunk', {'message': b'more', 'final': True})
+    assert emitted == []
+    assert voice.streams[0].chunks == [b'RIFF', b'more']
+    assert turns[0]['stream'] is voice.streams[0]
+
+def test_speech_to_text_passes_the_buffer_through():
+    service = VoiceService.__new__(VoiceService)
+    service.preprocessor = None
+    received = []
+    service.transcribe = lambda audio, filename: received.append(audio) or "hello"
+    audio = memoryview(b'\x1a\x45\xdf\xa3 webm bytes')
+    assert service.speech_to_text(audio).content == "hello"
+    assert received[0] is audio
@@ -1,14 +1,23 @@
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Callable, Awaitable, Union
 from dataclasses import dataclass
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import logging
 import json
 import asyncio
-from moviepy.editor import VideoFileClip
-from openai import AzureOpenAI
-from supabase import create_client
+import os
+import numpy as np
 from datetime import datetime
-from tqdm.asyncio import tqdm_asyncio
+from tqdm import tqdm
+import httpx
+from src.core.clients.registry import ClientRegistry
+from src.core.clients.scheduler import Priority
+from src.core.ingest.manifest import IngestManifest, file_hash
+from src.core.ingest.batching import AsyncBatcher
+from src.core.tokens import count_tokens, chunk_text
+from src.core.audio import ffmpeg
+from src.core.audio.fingerprint import FINGERPRINT_SAMPLE_RATE, fingerprint, read_wav
+from src.core.metrics.registry import metrics, request_id_var
 
 @dataclass
 class ProcessingResult:
@@ -16,37 +25,86 @@ class ProcessingResult:
     video_path: str
     title: Optional[str] = None
     error: Optional[str] = None
+    duplicate_of: Optional[str] = None  # path of the video this one repeats
+
+@dataclass
+class VideoJob:
+    """A video travelling through the ingestion stages"""
+    video_path: Path
+    temp_dir: Path
+    content_hash: Optional[str] = None
+    audio_path: Optional[Path] = None
+    audio_segments: Optional[List[bytes]] = None
+    transcript: Optional[str] = None
+    title: Optional[str] = None
+    embedding: Optional[List[float]] = None
+    chunks: Optional[List[Dict[str, Any]]] = None
+    stored: bool = False
+    duplicate_of: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.stored or self.duplicate_of is not None
+
+    def result(self, duplicate_path: Optional[str] = None) -> ProcessingResult:
+        return ProcessingResult(
+            success=self.error is None,
+            video_path=str(self.video_path),
+            title=self.title,
+            error=self.error,
+            duplicate_of=duplicate_path
+        )
+
+def _extract_audio_file(video_path: str, output_path: str) -> None:
+    """Module-level so it can run in a worker process"""
+    # moviepy is slow to import and only needed on hosts without ffmpeg
+    from moviepy.editor import VideoFileClip
+    video = VideoFileClip(video_path)
+    try:
+        video.audio.write_audiofile(output_path, verbose=False, logger=None)
+    finally:
+        video.close()
 
 class VideoProcessor:
     def __init__(self, settings):
         self.settings = settings
+        self._process_pool = None
+        self._thread_pool = None
+        # The moviepy/WAV path stays as a fallback for hosts without ffmpeg on PATH
+        self._use_ffmpeg = settings.ingest_audio_extractor == 'ffmpeg' and ffmpeg.ffmpeg_available()
+        self._embedding_batcher = None
+        self._write_batcher = None
+        self.manifest = IngestManifest(self.settings.ingest_manifest_path)
+        self.fingerprints = self.manifest.fingerprint_index()
+        # Serialises match-then-add, so two copies in one run cannot both become originals
+        self._dedup_lock = asyncio.Lock()
         self._setup_clients()
         self._setup_logging()
         
     def _setup_clients(self):
         """Initialize API clients"""
-        self.gpt4_client = AzureOpenAI(
-            api_key=self.settings.gpt4_api_key,
-            api_version=self.settings.azure_api_version,
-            azure_endpoint=self.settings.gpt4_endpoint
-        )
-        
-        self.whisper_client = AzureOpenAI(
-            api_key=self.settings.whisper_api_key,
-            api_version=self.settings.azure_api_version,
-            azure_endpoint=self.settings.whisper_endpoint
-        )
-        
-        self.ada_client = AzureOpenAI(
-            api_key=self.settings.ada_api_key,
-            api_version=self.settings.azure_api_version,
-            azure_endpoint=self.settings.ada_endpoint
-        )
-        
-        self.supabase = create_client(
-            self.settings.supabase_url,
-            self.settings.supabase_key
-        )
+        # One registry, so the three deployments share a single connection pool.
+        # Clients are built on first use, so CLI runs with nothing to do stay fast
+        self.clients = ClientRegistry(self.settings)
+        # Ingestion yields to live chat traffic on shared deployments
+        self.clients.scheduler.default_priority = Priority.BATCH
+
+    @property
+    def gpt4_client(self):
+        return self.clients.azure_openai(self.settings.gpt4_api_key, self.settings.gpt4_endpoint)
+
+    @property
+    def whisper_client(self):
+        return self.clients.azure_openai(self.settings.whisper_api_key, self.settings.whisper_endpoint)
+
+    @property
+    def ada_client(self):
+        return self.clients.azure_openai(self.settings.ada_api_key, self.settings.ada_endpoint)
+
+    @property
+    def supabase(self):
+        return self.clients.supabase()
 
     def _setup_logging(self):
         """Configure logging"""
@@ -60,40 +118,91 @@ class VideoProcessor:
         self.logger.addHandler(file_handler)
 
     async def extract_audio(self, video_path: Path, output_path: Path) -> None:
-        """Extract audio from video file"""
+        """Extract audio from video file in the process pool, off the event loop"""
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self._get_process_pool(), _extract_audio_file, str(video_path), str(output_path)
+            )
+        except Exception as e:
+            self.logger.error(f"Audio extraction failed for {video_path}: {str(e)}")
+            raise
+
+    async def extract_audio_segments(self, video_path: Path) -> List[bytes]:
+        """Pipe the audio track through ffmpeg into memory, split into upload-sized segments"""
         try:
-            video = VideoFileClip(str(video_path))
-            video.audio.write_audiofile(str(output_path), verbose=False, logger=None)
-            video.close()
+            return await ffmpeg.extract_audio(
+                video_path,
+                sample_rate=self.settings.ingest_audio_sample_rate,
+                bitrate=self.settings.ingest_audio_bitrate
+            )
         except Exception as e:
             self.logger.error(f"Audio extraction failed for {video_path}: {str(e)}")
             raise
 
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.settings.ingest_extract_workers or os.cpu_count()
+            )
+        return self._process_pool
+
+    def _get_thread_pool(self) -> ThreadPoolExecutor:
+        # asyncio's default executor has min(32, cpu + 4) threads, fewer than the stages may run at once
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=sum(concurrency for _, _, concurrency in self._stages()) + 4,
+                thread_name_prefix="ingest"
+            )
+        return self._thread_pool
+
     async def transcribe_audio(self, audio_path: Path) -> str:
         """Transcribe audio file using Whisper"""
         try:
-            with open(audio_path, 'rb') as audio_file:
+            with metrics.span('whisper'):
+                # Bytes rather than a file handle, so a retried upload starts from the beginning
                 transcript = await asyncio.to_thread(
+                    self.clients.scheduler.call,
+                    'whisper',
                     self.whisper_client.audio.transcriptions.create,
                     model=self.settings.whisper_deployment_name,
-                    file=audio_file
+                    file=(audio_path.name, audio_path.read_bytes())
                 )
             return transcript.text
         except Exception as e:
             self.logger.error(f"Transcription failed for {audio_path}: {str(e)}")
             raise
 
+    async def transcribe_segments(self, segments: List[bytes]) -> str:
+        """Transcribe in-memory audio segments with Whisper and join the text"""
+        texts = []
+        for i, segment in enumerate(segments):
+            try:
+                with metrics.span('whisper'):
+                    transcript = await asyncio.to_thread(
+                        self.clients.scheduler.call,
+                        'whisper',
+                        self.whisper_client.audio.transcriptions.create,
+                        model=self.settings.whisper_deployment_name,
+                        file=(f"segment_{i}.mp3", segment)
+                    )
+            except Exception as e:
+                self.logger.error(f"Transcription failed for segment {i}: {str(e)}")
+                raise
+            texts.append(transcript.text.strip())
+        return " ".join(texts)
+
     async def generate_title(self, transcript: str) -> str:
         """Generate title using GPT-4"""
         try:
-            response = await asyncio.to_thread(
-                self.gpt4_client.chat.completions.create,
-                model=self.settings.gpt4_deployment_name,
-                messages=[
-                    {"role": "system", "content": "Generate a concise title starting with 'How To' for a video based on its transcript."},
-                    {"role": "user", "content": f"Generate a title for: {transcript[:500]}..."}
-                ]
-            )
+            with metrics.span('gpt'):
+                response = await asyncio.to_thread(
+                    self.clients.scheduled('gpt', self.gpt4_client.chat.completions).create,
+                    model=self.settings.gpt4_deployment_name,
+                    messages=[
+                        {"role": "system", "content": "Generate a concise title starting with 'How To' for a video based on its transcript."},
+                        {"role": "user", "content": f"Generate a title for: {transcript[:500]}..."}
+                    ]
+                )
             return response.choices[0].message.content
         except Exception as e:
             self.logger.error(f"Title generation failed: {str(e)}")
@@ -102,116 +211,545 @@ class VideoProcessor:
     async def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding using Ada"""
         try:
-            response = await asyncio.to_thread(
-                self.ada_client.embeddings.create,
-                model=self.settings.ada_deployment_name,
-                input=text
-            )
+            with metrics.span('embedding'):
+                response = await asyncio.to_thread(
+                    self.clients.scheduled('ada', self.ada_client.embeddings).create,
+                    model=self.settings.ada_deployment_name,
+                    input=text
+                )
             return response.data[0].embedding
         except Exception as e:
             self.logger.error(f"Embedding generation failed: {str(e)}")
             raise
 
-    async def store_in_supabase(self, data: Dict[str, Any]) -> None:
-        """Store processed data in Supabase"""
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for several texts in one Ada request"""
+        try:
+            with metrics.span('embedding'):
+                response = await asyncio.to_thread(
+                    self.clients.scheduled('ada', self.ada_client.embeddings).create,
+                    model=self.settings.ada_deployment_name,
+                    input=texts
+                )
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        except Exception as e:
+            self.logger.error(f"Batch embedding generation failed ({len(texts)} inputs): {str(e)}")
+            raise
+
+    async def store_in_supabase(self, data: Union[Dict[str, Any], List[Dict[str, Any]]]) -> None:
+        """Store one or many rows in Supabase, replacing any earlier row for the same video"""
+        try:
+            with metrics.span('supabase_write'):
+                await asyncio.to_thread(
+                    self.supabase.table('video_content').upsert(data, on_conflict='url').execute
+                )
+        except Exception as e:
+            self.logger.error(f"Database storage failed: {str(e)}")
+            raise
+
+    async def generate_chunks(self, transcript: str) -> List[Dict[str, Any]]:
+        """Split a transcript into overlapping chunks and embed each one"""
+        texts = chunk_text(
+            transcript,
+            self.settings.chunk_size_tokens,
+            self.settings.chunk_overlap_tokens
+        )
+        if self._embedding_batcher is not None:
+            embeddings = await asyncio.gather(*(self._embedding_batcher.submit(t) for t in texts))
+        else:
+            embeddings = await self.generate_embeddings(texts) if texts else []
+        return [{"content": t, "embedding": e} for t, e in zip(texts, embeddings)]
+
+    async def store_chunks(self, video_url: str, chunks: List[Dict[str, Any]]) -> None:
+        """Replace a video's rows in video_chunks with the given chunks"""
+        rows = [
+            {
+                "video_url": video_url,
+                "chunk_index": i,
+                "content": chunk["content"],
+                "embedding": chunk["embedding"]
+            }
+            for i, chunk in enumerate(chunks)
+        ]
         try:
             await asyncio.to_thread(
-                self.supabase.table('video_content').insert(data).execute
+                self.supabase.table('video_chunks')
+                .upsert(rows, on_conflict='video_url,chunk_index').execute
+            )
+            # Drop chunks left over from a longer, earlier version of the script
+            await asyncio.to_thread(
+                self.supabase.table('video_chunks')
+                .delete().eq('video_url', video_url).gte('chunk_index', len(rows)).execute
             )
         except Exception as e:
-            self.logger.error(f"Database storage failed: {str(e)}")
+            self.logger.error(f"Chunk storage failed for {video_url}: {str(e)}")
             raise
 
-    async def process_video(self, video_path: Path, temp_dir: Path) -> ProcessingResult:
-        """Process a single video file"""
-        self.logger.info(f"Processing video: {video_path}")
-        
+    async def link_duplicate(self, original_url: str, duplicates: List[str]) -> None:
+        """List re-posted copies in the metadata of the original's video_content row"""
         try:
-            # Create temporary directory for this video
-            video_temp_dir = temp_dir / video_path.stem
-            video_temp_dir.mkdir(exist_ok=True)
-            
-            # Extract and process audio
-            audio_path = video_temp_dir / f"{video_path.stem}.wav"
-            await self.extract_audio(video_path, audio_path)
-            
-            # Generate transcript
-            transcript = await self.transcribe_audio(audio_path)
-            
-            # Generate title and embedding in parallel
-            title, embedding = await asyncio.gather(
-                self.generate_title(transcript),
-                self.generate_embedding(transcript)
+            with metrics.span('supabase_write'):
+                rows = await asyncio.to_thread(
+                    self.supabase.table('video_content').select('metadata').eq('url', original_url).limit(1).execute
+                )
+                metadata = (rows.data[0].get('metadata') if rows.data else None) or {}
+                metadata["duplicates"] = duplicates
+                await asyncio.to_thread(
+                    self.supabase.table('video_content').update({"metadata": metadata}).eq('url', original_url).execute
+                )
+        except Exception as e:
+            self.logger.error(f"Duplicate linking failed for {original_url}: {str(e)}")
+            raise
+
+    async def refresh_search_index(self) -> None:
+        """Ask the running server to index newly stored videos (SEARCH_REFRESH_URL)"""
+        url = self.settings.search_refresh_url
+        if not url:
+            return
+        headers = {'X-Refresh-Token': self.settings.search_refresh_token} if self.settings.search_refresh_token else {}
+        try:
+            async with httpx.AsyncClient(timeout=60) as client:
+                response = await client.post(url, headers=headers)
+                response.raise_for_status()
+            self.logger.info(f"Search index refreshed: {response.json().get('added')} new rows")
+        except httpx.HTTPError as e:
+            # Videos are stored either way; the next refresh or restart picks them up
+            self.logger.warning(f"Search index refresh failed: {str(e)}")
+
+    async def _write_manifest(self, write: Callable, *args) -> Any:
+        """Manifest writes commit to sqlite, which blocks; run them off the event loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, write, *args)
+
+    async def _identify(self, video_path: Path) -> str:
+        """Content hash from the manifest, hashing the file off-loop only when it changed"""
+        stat = video_path.stat()
+        content_hash = self.manifest.lookup_hash(video_path, stat.st_size, stat.st_mtime)
+        if content_hash is None:
+            content_hash = await asyncio.to_thread(file_hash, video_path)
+        return content_hash
+
+    async def _prepare_job(self, video_path: Path, temp_dir: Path, content_hash: Optional[str] = None) -> VideoJob:
+        """Build a job pre-filled with every stage output the manifest already has"""
+        if content_hash is None:
+            content_hash = await self._identify(video_path)
+        entry = await self._write_manifest(self.manifest.register, content_hash, video_path)
+        if entry.duplicate_of is not None and self._original_lost(entry.duplicate_of):
+            # The original was never stored and is gone from the folder; this copy stands on its own
+            self.fingerprints.remove(entry.duplicate_of)
+            await self._write_manifest(self.manifest.record, content_hash, "duplicate_of", None)
+            entry.duplicate_of = None
+        audio_path = Path(entry.audio_path) if entry.audio_path else None
+        return VideoJob(
+            video_path=video_path,
+            temp_dir=temp_dir,
+            content_hash=content_hash,
+            audio_path=audio_path if audio_path and audio_path.exists() else None,
+            transcript=entry.transcript,
+            title=entry.title,
+            embedding=entry.embedding,
+            chunks=entry.chunks,
+            stored=entry.stored,
+            duplicate_of=entry.duplicate_of
+        )
+
+    def _primary_path(self, content_hash: str, paths: List[Path]) -> Path:
+        """Which of several byte-identical files carries the video; the others are copies"""
+        entry = self.manifest.get(content_hash)
+        if entry is not None and Path(entry.path) in paths:
+            return Path(entry.path)
+        return sorted(paths)[0]
+
+    async def _record_copies(self, job: VideoJob, copies: List[Path]) -> List[ProcessingResult]:
+        """Skip byte-identical copies of a job's video, linking them to its row once stored"""
+        known = set(self.manifest.duplicates(job.content_hash))
+        new = [path for path in copies if str(path) not in known]
+        if job.stored and new:
+            # Otherwise the job's own store stage picks them up from the manifest
+            try:
+                await self.link_duplicate(str(job.video_path), sorted(known.union(map(str, new))))
+            except Exception as e:
+                return [ProcessingResult(success=False, video_path=str(path), error=str(e)) for path in copies]
+        for path in new:
+            await self._write_manifest(self.manifest.record_copy, job.content_hash, path)
+        metrics.inc('ingest_duplicates_total', len(new))
+        return [
+            ProcessingResult(success=True, video_path=str(path), duplicate_of=str(job.video_path))
+            for path in copies
+        ]
+
+    def _original_lost(self, content_hash: str) -> bool:
+        original = self.manifest.get(content_hash)
+        return original is None or (not original.stored and not Path(original.path).exists())
+
+    def _result(self, job: VideoJob) -> ProcessingResult:
+        original = self.manifest.get(job.duplicate_of) if job.duplicate_of else None
+        return job.result(original.path if original else None)
+
+    async def _stage_extract(self, job: VideoJob) -> None:
+        if job.transcript is not None or job.audio_path is not None:
+            return
+        if self._use_ffmpeg:
+            # Stays in memory; nothing to record, re-extraction is cheap
+            job.audio_segments = await self.extract_audio_segments(job.video_path)
+            return
+        audio_path = job.temp_dir / f"{job.content_hash}.wav"
+        await self.extract_audio(job.video_path, audio_path)
+        job.audio_path = audio_path
+        await self._write_manifest(self.manifest.record, job.content_hash, "audio", str(audio_path))
+
+    def _audio_fingerprint(self, job: VideoJob):
+        if job.audio_segments is not None:
+            pcm = ffmpeg.decode_pcm(b"".join(job.audio_segments), FINGERPRINT_SAMPLE_RATE)
+            return fingerprint(np.frombuffer(pcm, dtype=np.int16), FINGERPRINT_SAMPLE_RATE)
+        return fingerprint(*read_wav(job.audio_path))
+
+    async def _stage_fingerprint(self, job: VideoJob) -> None:
+        # Resumed jobs were fingerprinted (and kept) on an earlier run
+        if not self.settings.ingest_dedup_enabled or job.transcript is not None:
+            return
+        if not job.audio_segments and job.audio_path is None:
+            return  # no audio track
+        fp = await asyncio.to_thread(self._audio_fingerprint, job)
+        async with self._dedup_lock:
+            match = await asyncio.to_thread(
+                self.fingerprints.match,
+                fp,
+                min_similarity=self.settings.ingest_dedup_min_similarity,
+                min_coverage=self.settings.ingest_dedup_min_coverage,
+                max_offset_seconds=self.settings.ingest_dedup_max_offset_seconds,
+                max_candidates=self.settings.ingest_dedup_max_candidates,
+                exclude=job.content_hash
             )
-            
-            # Prepare data for storage
-            data = {
-                "title": title,
-                "script": transcript,
-                "embedding": embedding,
-                "url": str(video_path),
-                "metadata": {
-                    "processed_date": datetime.utcnow().isoformat(),
-                    "original_filename": video_path.name,
-                    "file_path": str(video_path)
-                }
+            if match is None:
+                if len(fp):
+                    await asyncio.to_thread(self.fingerprints.add, job.content_hash, fp)
+                return
+
+        original_hash, similarity = match
+        original = self.manifest.get(original_hash)
+        self.logger.info(f"{job.video_path} duplicates {original.path} (similarity {similarity:.2f}), skipping")
+        metrics.inc('ingest_duplicates_total')
+        job.duplicate_of = original_hash
+        await self._write_manifest(self.manifest.record, job.content_hash, "duplicate_of", original_hash)
+        if original.stored:
+            # Otherwise the original's own store stage picks the link up from the manifest
+            try:
+                await self.link_duplicate(original.path, self.manifest.duplicates(original_hash))
+            except Exception:
+                job.duplicate_of = None
+                await self._write_manifest(self.manifest.record, job.content_hash, "duplicate_of", None)
+                raise
+        job.audio_segments = None
+        self._cleanup_audio(job)
+        await self._write_manifest(self.manifest.record, job.content_hash, "audio", None)
+
+    async def _stage_transcribe(self, job: VideoJob) -> None:
+        if job.transcript is not None:
+            return
+        if job.audio_segments is not None:
+            job.transcript = await self.transcribe_segments(job.audio_segments)
+            job.audio_segments = None
+            await self._write_manifest(self.manifest.record, job.content_hash, "transcript", job.transcript)
+            return
+        job.transcript = await self.transcribe_audio(job.audio_path)
+        await self._write_manifest(self.manifest.record, job.content_hash, "transcript", job.transcript)
+        # The WAV is no longer needed once the transcript is durable
+        self._cleanup_audio(job)
+        await self._write_manifest(self.manifest.record, job.content_hash, "audio", None)
+
+    async def _stage_enrich(self, job: VideoJob) -> None:
+        # Generate whichever of title and embedding is missing, in parallel
+        async def title():
+            if job.title is None:
+                job.title = await self.generate_title(job.transcript)
+                await self._write_manifest(self.manifest.record, job.content_hash, "title", job.title)
+
+        async def embedding():
+            if job.embedding is None:
+                if self._embedding_batcher is not None:
+                    job.embedding = await self._embedding_batcher.submit(job.transcript)
+                else:
+                    job.embedding = await self.generate_embedding(job.transcript)
+                await self._write_manifest(self.manifest.record, job.content_hash, "embedding", job.embedding)
+
+        async def chunks():
+            if self.settings.chunked_index_enabled and job.chunks is None:
+                job.chunks = await self.generate_chunks(job.transcript)
+                await self._write_manifest(self.manifest.record, job.content_hash, "chunks", job.chunks)
+
+        await asyncio.gather(title(), embedding(), chunks())
+
+    async def _stage_store(self, job: VideoJob) -> None:
+        if job.stored:
+            return
+        data = {
+            "title": job.title,
+            "script": job.transcript,
+            "embedding": job.embedding,
+            "url": str(job.video_path),
+            "metadata": {
+                "processed_date": datetime.utcnow().isoformat(),
+                "original_filename": job.video_path.name,
+                "file_path": str(job.video_path),
+                "content_hash": job.content_hash
             }
-            
-            # Store in database
+        }
+        duplicates = self.manifest.duplicates(job.content_hash)
+        if duplicates:
+            data["metadata"]["duplicates"] = duplicates
+        if self._write_batcher is not None:
+            await self._write_batcher.submit(data)
+        else:
             await self.store_in_supabase(data)
-            
-            # Cleanup
-            audio_path.unlink()
-            video_temp_dir.rmdir()
-            
-            self.logger.info(f"Successfully processed: {title}")
-            return ProcessingResult(success=True, video_path=str(video_path), title=title)
-            
+        if job.chunks:
+            await self.store_chunks(str(job.video_path), job.chunks)
+        job.stored = True
+        await self._write_manifest(self.manifest.record, job.content_hash, "stored", True)
+        # Copies matched while the row was being written still need linking
+        if self.manifest.duplicates(job.content_hash) != duplicates:
+            await self.link_duplicate(str(job.video_path), self.manifest.duplicates(job.content_hash))
+        self.logger.info(f"Successfully processed: {job.title}")
+
+    def _start_batchers(self) -> None:
+        """Group Ada requests by token budget and Supabase writes into bulk upserts"""
+        async def store_rows(rows: List[Dict[str, Any]]) -> List[None]:
+            await self.store_in_supabase(rows)
+            return [None] * len(rows)
+
+        self._embedding_batcher = AsyncBatcher(
+            self.generate_embeddings,
+            max_items=self.settings.ingest_embedding_batch_size,
+            max_weight=self.settings.ingest_embedding_batch_tokens,
+            weigh=count_tokens,
+            flush_interval=self.settings.ingest_batch_flush_seconds,
+            name="embedding"
+        )
+        self._write_batcher = AsyncBatcher(
+            store_rows,
+            max_items=self.settings.ingest_write_batch_size,
+            flush_interval=self.settings.ingest_batch_flush_seconds,
+            name="supabase write"
+        )
+
+    async def _stop_batchers(self) -> None:
+        for batcher in (self._embedding_batcher, self._write_batcher):
+            if batcher is not None:
+                await batcher.close()
+        self._embedding_batcher = self._write_batcher = None
+
+    def _stages(self):
+        """(name, handler, concurrency) for each ingestion stage, in order"""
+        return [
+            ("extract", self._stage_extract, self.settings.ingest_extract_workers or os.cpu_count()),
+            ("fingerprint", self._stage_fingerprint, self.settings.ingest_extract_workers or os.cpu_count()),
+            ("transcribe", self._stage_transcribe, self.settings.ingest_transcribe_concurrency),
+            ("enrich", self._stage_enrich, self.settings.ingest_enrich_concurrency),
+            ("store", self._stage_store, self.settings.ingest_store_concurrency),
+        ]
+
+    async def process_video(self, video_path: Path, temp_dir: Path) -> ProcessingResult:
+        """Process a single video file, resuming from the last completed stage"""
+        self.logger.info(f"Processing video: {video_path}")
+        job = VideoJob(video_path=video_path, temp_dir=temp_dir)
+        try:
+            job = await self._prepare_job(video_path, temp_dir)
+            for _, handler, _ in self._stages():
+                if job.duplicate_of is not None:
+                    break
+                await handler(job)
         except Exception as e:
-            self.logger.error(f"Failed to process {video_path}: {str(e)}")
-            return ProcessingResult(success=False, video_path=str(video_path), error=str(e))
+            await self._fail(job, f"Failed to process {video_path}", e)
+        return self._result(job)
+
+    async def _fail(self, job: VideoJob, message: str, error: Exception) -> None:
+        self.logger.error(f"{message}: {str(error)}")
+        job.error = str(error)
+        if job.content_hash is not None:
+            await self._write_manifest(self.manifest.record_error, job.content_hash, job.error)
+
+    @staticmethod
+    def _cleanup_audio(job: VideoJob) -> None:
+        if job.audio_path is None:
+            return
+        job.audio_path.unlink(missing_ok=True)
+        job.audio_path = None
+
+    async def _run_stage(
+        self,
+        name: str,
+        handler: Callable[[VideoJob], Awaitable[None]],
+        concurrency: int,
+        inbox: asyncio.Queue,
+        outbox: Optional[asyncio.Queue],
+        downstream_workers: int,
+        progress: tqdm,
+        on_done: Callable[[VideoJob], None]
+    ) -> None:
+        """Run `concurrency` workers for one stage, then signal the next stage to stop"""
+        async def worker():
+            while True:
+                job = await inbox.get()
+                if job is None:
+                    return
+                # Ingestion "requests" are videos; tag their spans with the content hash
+                request_id_var.set(job.content_hash[:12])
+                try:
+                    with metrics.span(f"ingest_{name}"):
+                        await handler(job)
+                except Exception as e:
+                    # Stage outputs stay in the manifest (and the WAV on disk) for the next run
+                    await self._fail(job, f"{name} failed for {job.video_path}", e)
+                progress.update(1)
+                if outbox is None or job.error is not None or job.duplicate_of is not None:
+                    on_done(job)
+                else:
+                    await outbox.put(job)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        if outbox is not None:
+            for _ in range(downstream_workers):
+                await outbox.put(None)
 
     async def process_all_videos(self):
-        """Process all videos in the specified folder"""
-        temp_dir = Path("temp_audio")
-        temp_dir.mkdir(exist_ok=True)
+        """Process all videos in the specified folder.
+
+        Videos flow through extract -> fingerprint -> transcribe -> enrich ->
+        store, each stage with its own worker count and bounded queues in
+        between, so CPU-bound extraction overlaps with the API-bound stages.
+        Copies whose audio matches an earlier video leave after the
+        fingerprint stage. Videos the manifest already marks as stored (or as
+        duplicates) are skipped; partially processed ones resume from their
+        last completed stage.
+        """
+        # Every to_thread call below runs on a pool sized for the stage concurrency settings
+        asyncio.get_running_loop().set_default_executor(self._get_thread_pool())
+        try:
+            return await self._process_all_videos()
+        finally:
+            # Not before: the refresh's httpx client resolves hosts on the default executor too
+            self._thread_pool.shutdown()
+            self._thread_pool = None
+
+    async def _process_all_videos(self) -> List[ProcessingResult]:
+        temp_dir = Path(self.settings.ingest_work_dir)
+        if not self._use_ffmpeg:
+            temp_dir.mkdir(exist_ok=True)
         
         video_folder = Path(self.settings.video_folder_path)
         videos = list(video_folder.glob("*.mp4"))
         
-        self.logger.info(f"Found {len(videos)} videos to process")
-        
-        results = []
-        async for video in tqdm_asyncio(videos, desc="Processing videos"):
-            result = await self.process_video(video, temp_dir)
-            results.append(result)
-            
-            # Save progress
-            with open('processing_progress.json', 'w') as f:
-                json.dump({
-                    'successful': [r.video_path for r in results if r.success],
-                    'failed': [r.video_path for r in results if not r.success],
-                    'total': len(videos),
-                    'completed': len(results)
-                }, f, indent=2)
-        
-        # Cleanup main temp directory
-        temp_dir.rmdir()
+        self.logger.info(f"Found {len(videos)} videos")
+
+        # Byte-identical files share a content hash: one job per hash, the rest are copies.
+        # A video that can't be read or registered fails alone; the others go ahead
+        results: List[ProcessingResult] = []
+        hashes = await asyncio.gather(*(self._identify(video) for video in videos), return_exceptions=True)
+        by_hash: Dict[str, List[Path]] = {}
+        for video, content_hash in zip(videos, hashes):
+            if isinstance(content_hash, Exception):
+                self.logger.error(f"Failed to read {video}: {str(content_hash)}")
+                results.append(ProcessingResult(success=False, video_path=str(video), error=str(content_hash)))
+                continue
+            by_hash.setdefault(content_hash, []).append(video)
+        primaries = {content_hash: self._primary_path(content_hash, paths) for content_hash, paths in by_hash.items()}
+        prepared = await asyncio.gather(*(
+            self._prepare_job(primary, temp_dir, content_hash) for content_hash, primary in primaries.items()
+        ), return_exceptions=True)
+        jobs = []
+        for content_hash, job in zip(primaries, prepared):
+            if isinstance(job, Exception):
+                self.logger.error(f"Failed to prepare {primaries[content_hash]}: {str(job)}")
+                await self._write_manifest(self.manifest.record_error, content_hash, str(job))
+                results.extend(
+                    ProcessingResult(success=False, video_path=str(path), error=str(job))
+                    for path in by_hash[content_hash]
+                )
+            else:
+                jobs.append(job)
+        pending = [job for job in jobs if not job.done]
+        results.extend(self._result(job) for job in jobs if job.done)
+        for job in jobs:
+            copies = [path for path in by_hash[job.content_hash] if path != job.video_path]
+            if copies:
+                results.extend(await self._record_copies(job, copies))
+        failed = sum(not r.success for r in results)
+        self.logger.info(f"{len(results) - failed} unchanged, {failed} failed, {len(pending)} to process")
+
+        stages = self._stages()
+        queues = [asyncio.Queue(maxsize=self.settings.ingest_queue_size) for _ in stages]
+        bars = [
+            tqdm(total=len(pending), desc=f"{name:<10}", position=i)
+            for i, (name, _, _) in enumerate(stages)
+        ]
+
+        async def feed():
+            for job in pending:
+                await queues[0].put(job)
+            for _ in range(stages[0][2]):
+                await queues[0].put(None)
+
+        self._start_batchers()
+        try:
+            await asyncio.gather(
+                feed(),
+                *(
+                    self._run_stage(
+                        name, handler, concurrency,
+                        inbox=queues[i],
+                        outbox=queues[i + 1] if i + 1 < len(stages) else None,
+                        downstream_workers=stages[i + 1][2] if i + 1 < len(stages) else 0,
+                        progress=bars[i],
+                        on_done=lambda job: results.append(self._result(job))
+                    )
+                    for i, (name, handler, concurrency) in enumerate(stages)
+                )
+            )
+        finally:
+            await self._stop_batchers()
+            for bar in bars:
+                bar.close()
+            if self._process_pool is not None:
+                self._process_pool.shutdown()
+                self._process_pool = None
+
+        if any(job.stored for job in pending):
+            await self.refresh_search_index()
+
+        # Per-video state lives in the manifest; this is only a run summary
+        with open('processing_progress.json', 'w') as f:
+            json.dump({
+                'successful': [r.video_path for r in results if r.success],
+                'failed': [r.video_path for r in results if not r.success],
+                'duplicates': {r.video_path: r.duplicate_of for r in results if r.duplicate_of},
+                'total': len(videos),
+                'completed': len(results),
+                'stages': metrics.summary()
+            }, f, indent=2)
+        for line in metrics.summary():
+            self.logger.info(f"Stage latency - {line}")
+
+        # Cleanup main temp directory unless failed videos left audio to resume from
+        try:
+            temp_dir.rmdir()
+        except OSError:
+            pass
         
         return results
 
 def main():
-    from config.settings import get_settings
+    from src.config.settings import get_settings
     
     async def run():
         processor = VideoProcessor(get_settings())
         results = await processor.process_all_videos()
         
-        successful = [r for r in results if r.success]
+        successful = [r for r in results if r.success and not r.duplicate_of]
+        duplicates = [r for r in results if r.duplicate_of]
         failed = [r for r in results if not r.success]
         
         print("\nProcessing Complete!")
         print(f"Successfully processed: {len(successful)} videos")
+        print(f"Skipped as duplicates: {len(duplicates)} videos")
         print(f"Failed to process: {len(failed)} videos")
         
         if failed: